@@ -0,0 +1,90 @@
+# scripts/benchmark_batch_store.py
+# python scripts/benchmark_batch_store.py --count 500 --batch-size 100
+
+import argparse
+import asyncio
+import logging
+import random
+import shutil
+import tempfile
+import time
+
+from mcp_memory_service.models.memory import Memory
+from mcp_memory_service.storage.chroma import ChromaMemoryStorage
+from mcp_memory_service.utils.hashing import generate_content_hash
+
+logger = logging.getLogger(__name__)
+
+WORDS = (
+    "memory agent transcript meeting deadline release python database index "
+    "query latency embedding vector budget review customer feedback design "
+    "bug fix deploy server client config cache token context summary"
+).split()
+
+
+def make_memories(count, seed):
+    """Generate synthetic transcript-like memories."""
+    rng = random.Random(seed)
+    memories = []
+    for i in range(count):
+        content = f"{i}: " + " ".join(rng.choice(WORDS) for _ in range(rng.randint(12, 40)))
+        memories.append(Memory(
+            content=content,
+            content_hash=generate_content_hash(content),
+            tags=[rng.choice(WORDS)],
+            memory_type="note"
+        ))
+    return memories
+
+
+async def store_one_by_one(storage, memories):
+    start = time.perf_counter()
+    for memory in memories:
+        await storage.store(memory)
+    return time.perf_counter() - start
+
+
+async def store_in_batches(storage, memories, batch_size):
+    start = time.perf_counter()
+    for offset in range(0, len(memories), batch_size):
+        await storage.store_batch(memories[offset:offset + batch_size])
+    return time.perf_counter() - start
+
+
+async def main():
+    logging.basicConfig(
+        level=logging.WARNING,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    parser = argparse.ArgumentParser(description='Compare store_memory vs store_memories ingestion throughput')
+    parser.add_argument('--count', type=int, default=500, help='Number of memories to ingest')
+    parser.add_argument('--batch-size', type=int, default=100, help='Memories per store_batch call')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed for the synthetic corpus')
+    args = parser.parse_args()
+
+    memories = make_memories(args.count, args.seed)
+    results = {}
+
+    for mode in ('single', 'batch'):
+        # Fresh database per mode so neither run sees the other's duplicates
+        db_path = tempfile.mkdtemp(prefix=f"memory_bench_{mode}_")
+        try:
+            storage = ChromaMemoryStorage(db_path)
+            if mode == 'single':
+                elapsed = await store_one_by_one(storage, memories)
+            else:
+                elapsed = await store_in_batches(storage, memories, args.batch_size)
+            results[mode] = elapsed
+            storage.close()
+        finally:
+            shutil.rmtree(db_path, ignore_errors=True)
+
+    print(f"\nIngestion benchmark ({args.count} memories, batch size {args.batch_size})")
+    for mode, elapsed in results.items():
+        print(f"{mode:<8} {elapsed:8.2f}s  {args.count / elapsed:8.1f} memories/sec")
+    print(f"speedup: {results['single'] / results['batch']:.1f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
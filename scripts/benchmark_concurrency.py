@@ -0,0 +1,89 @@
+# scripts/benchmark_concurrency.py
+# python scripts/benchmark_concurrency.py --db-path /path/to/your/chroma_db --concurrency 16
+
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import time
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_QUERIES = [
+    "database configuration",
+    "meeting notes from last week",
+    "python error handling",
+    "deployment checklist",
+    "ideas for the next release",
+    "how to reset the password",
+    "performance regression",
+    "customer feedback summary"
+]
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of values."""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+async def timed_retrieve(storage, query, n_results):
+    start = time.perf_counter()
+    await storage.retrieve(query, n_results)
+    return time.perf_counter() - start
+
+
+async def run_benchmark(storage, concurrency, rounds, n_results):
+    latencies = []
+    wall_start = time.perf_counter()
+    for round_number in range(rounds):
+        queries = [SAMPLE_QUERIES[(round_number + i) % len(SAMPLE_QUERIES)] for i in range(concurrency)]
+        latencies.extend(await asyncio.gather(
+            *(timed_retrieve(storage, query, n_results) for query in queries)
+        ))
+    wall_time = time.perf_counter() - wall_start
+    return latencies, wall_time
+
+
+async def main():
+    logging.basicConfig(
+        level=logging.WARNING,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    parser = argparse.ArgumentParser(description='Measure retrieve_memory latency under concurrent load')
+    parser.add_argument('--db-path', required=True, help='Path to ChromaDB database')
+    parser.add_argument('--concurrency', type=int, default=8, help='Number of parallel retrieve calls per round')
+    parser.add_argument('--rounds', type=int, default=10, help='Number of rounds to run')
+    parser.add_argument('--n-results', type=int, default=5, help='Results per retrieve call')
+    parser.add_argument('--workers', type=int, help='Override MCP_MEMORY_STORAGE_WORKERS for this run')
+    args = parser.parse_args()
+
+    if args.workers:
+        os.environ['MCP_MEMORY_STORAGE_WORKERS'] = str(args.workers)
+
+    # Import after the environment is configured so the worker count is picked up
+    from mcp_memory_service.config import STORAGE_THREAD_WORKERS
+    from mcp_memory_service.storage.chroma import ChromaMemoryStorage
+
+    storage = ChromaMemoryStorage(args.db_path)
+
+    # Warm up the model and HNSW index so the first round isn't an outlier
+    await storage.retrieve(SAMPLE_QUERIES[0], args.n_results)
+
+    latencies, wall_time = await run_benchmark(storage, args.concurrency, args.rounds, args.n_results)
+    storage.close()
+
+    total_calls = len(latencies)
+    print(f"\nConcurrent retrieve benchmark ({STORAGE_THREAD_WORKERS} storage workers)")
+    print(f"Calls: {total_calls} ({args.rounds} rounds x {args.concurrency} parallel)")
+    print(f"Wall time: {wall_time:.3f}s ({total_calls / wall_time:.1f} calls/s)")
+    print(f"p50 latency: {percentile(latencies, 50) * 1000:.1f} ms")
+    print(f"p99 latency: {percentile(latencies, 99) * 1000:.1f} ms")
+    print(f"mean latency: {statistics.mean(latencies) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
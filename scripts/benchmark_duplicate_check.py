@@ -0,0 +1,72 @@
+# scripts/benchmark_duplicate_check.py
+# python scripts/benchmark_duplicate_check.py --sizes 1000 10000 50000 200000
+
+import argparse
+import hashlib
+import shutil
+import tempfile
+import time
+
+import chromadb
+import numpy as np
+
+
+def content_hash(i):
+    return hashlib.sha256(f"memory {i}".encode('utf-8')).hexdigest()
+
+
+def grow_collection(collection, start, end, dim, rng, chunk=5000):
+    """Add rows [start, end) with random embeddings, IDs equal to their content hash."""
+    for offset in range(start, end, chunk):
+        stop = min(end, offset + chunk)
+        ids = [content_hash(i) for i in range(offset, stop)]
+        collection.add(
+            ids=ids,
+            embeddings=rng.random((stop - offset, dim), dtype=np.float32).tolist(),
+            documents=[f"memory {i}" for i in range(offset, stop)],
+            metadatas=[{"content_hash": h, "tags": "[]", "timestamp": float(i)}
+                       for i, h in zip(range(offset, stop), ids)]
+        )
+
+
+def time_lookups(lookup, hashes):
+    start = time.perf_counter()
+    for h in hashes:
+        lookup(h)
+    return (time.perf_counter() - start) / len(hashes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Duplicate-check latency: metadata where-scan vs ID lookup')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 50000, 100000, 200000],
+                        help='Collection sizes to measure at')
+    parser.add_argument('--lookups', type=int, default=50, help='Lookups timed per size')
+    parser.add_argument('--dim', type=int, default=384, help='Embedding dimension')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    db_path = tempfile.mkdtemp(prefix="memory_bench_ids_")
+    try:
+        client = chromadb.PersistentClient(path=db_path)
+        collection = client.create_collection("memory_collection", metadata={"hnsw:space": "cosine"})
+
+        print(f"{'rows':>8} {'where content_hash (ms)':>24} {'get(ids=[hash]) (ms)':>22}")
+        size = 0
+        for target in sorted(args.sizes):
+            grow_collection(collection, size, target, args.dim, rng)
+            size = target
+            # Mix of present and absent hashes, like a real duplicate check
+            sample = [content_hash(int(i)) for i in rng.integers(0, size * 2, args.lookups)]
+            where_latency = time_lookups(
+                lambda h: collection.get(where={"content_hash": h}, include=[]), sample
+            )
+            id_latency = time_lookups(
+                lambda h: collection.get(ids=[h], include=[]), sample
+            )
+            print(f"{size:>8} {where_latency * 1000:>24.3f} {id_latency * 1000:>22.3f}")
+    finally:
+        shutil.rmtree(db_path, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
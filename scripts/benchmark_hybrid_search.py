@@ -0,0 +1,115 @@
+# scripts/benchmark_hybrid_search.py
+# python scripts/benchmark_hybrid_search.py --size 5000 --queries 50 --backend chroma
+
+import argparse
+import asyncio
+import logging
+import random
+import shutil
+import statistics
+import tempfile
+import time
+
+from mcp_memory_service.models.memory import Memory
+from mcp_memory_service.storage import create_storage
+from mcp_memory_service.storage.common import SEARCH_MODES
+from mcp_memory_service.utils.hashing import generate_content_hash
+
+logger = logging.getLogger(__name__)
+
+SERVICES = ["billing", "auth", "search", "checkout", "inventory", "reporting", "notifications", "gateway"]
+ACTIONS = ["deployment", "nightly backup", "schema migration", "cache warmup", "load test", "certificate renewal"]
+PEOPLE = ["Alice", "Bob", "Chen", "Dana", "Emeka", "Farah", "Goran", "Hana", "Ivan", "Julia"]
+OBJECTS = ["connection pool", "retry policy", "disk quota", "rate limiter", "feature flag", "config map", "worker queue"]
+
+
+def build_corpus(size, rng):
+    """
+    Synthetic incident notes, each with a unique error code and file path.
+
+    Returns the memories plus two query sets of (query, target content hash): identifier
+    queries naming only the error code, and descriptive queries paraphrasing the note
+    without any identifier (so other notes with the same wording compete for the top k).
+    """
+    memories, identifier_queries, descriptive_queries = [], [], []
+    codes = rng.sample(range(10000, 99999), size)
+    for i in range(size):
+        service, action = rng.choice(SERVICES), rng.choice(ACTIONS)
+        person, thing = rng.choice(PEOPLE), rng.choice(OBJECTS)
+        code = f"ERR_{service.upper()}_{codes[i]}"
+        path = f"src/{service}/{thing.replace(' ', '_')}_{i}.py"
+        content = (
+            f"The {service} {action} failed with {code} in {path}. "
+            f"{person} traced it to the {thing} and note {i} records the fix."
+        )
+        memory = Memory(content=content, content_hash=generate_content_hash(content), tags=[service])
+        memories.append(memory)
+        identifier_queries.append((code, memory.content_hash))
+        descriptive_queries.append(
+            (f"{person} found a {thing} problem during the {service} {action}", memory.content_hash)
+        )
+    return memories, identifier_queries, descriptive_queries
+
+
+async def evaluate(storage, queries, mode, n_results):
+    """Return (recall@n_results, latencies) of a mode over (query, target) pairs."""
+    hits, latencies = 0, []
+    for query, target in queries:
+        storage.result_cache.clear()
+        begin = time.perf_counter()
+        results = await storage.retrieve(query, n_results, mode=mode)
+        latencies.append(time.perf_counter() - begin)
+        hits += any(result.memory.content_hash == target for result in results)
+    return hits / len(queries), latencies
+
+
+async def main():
+    logging.basicConfig(
+        level=logging.WARNING,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    parser = argparse.ArgumentParser(description='Compare semantic, lexical and hybrid retrieval')
+    parser.add_argument('--size', type=int, default=5000, help='Number of synthetic memories')
+    parser.add_argument('--queries', type=int, default=50, help='Queries per query set')
+    parser.add_argument('--n-results', type=int, default=5, help='Results per query (k of recall@k)')
+    parser.add_argument('--backend', default='chroma', help='Storage backend to benchmark')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed of the corpus')
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    memories, identifier_queries, descriptive_queries = build_corpus(args.size, rng)
+    query_sets = {
+        "identifier": rng.sample(identifier_queries, min(args.queries, args.size)),
+        "descriptive": rng.sample(descriptive_queries, min(args.queries, args.size))
+    }
+
+    db_path = tempfile.mkdtemp(prefix="memory_bench_hybrid_")
+    try:
+        storage = create_storage(args.backend, db_path, lazy_model_loading=False)
+        begin = time.perf_counter()
+        for offset in range(0, len(memories), 500):
+            await storage.store_batch(memories[offset:offset + 500])
+        print(f"Stored {args.size} memories in {time.perf_counter() - begin:.1f}s ({args.backend})")
+
+        # Warm up the query embedding cache so only the search is measured
+        for query, _ in query_sets["identifier"] + query_sets["descriptive"]:
+            await storage.retrieve(query, args.n_results)
+
+        print(f"\n{'mode':<10}{'query set':<13}{f'recall@{args.n_results}':>10}{'p50 (ms)':>10}{'p95 (ms)':>10}")
+        for mode in SEARCH_MODES:
+            for name, queries in query_sets.items():
+                recall, latencies = await evaluate(storage, queries, mode, args.n_results)
+                latencies.sort()
+                p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+                print(
+                    f"{mode:<10}{name:<13}{recall:>10.2f}"
+                    f"{statistics.median(latencies) * 1000:>10.1f}{p95 * 1000:>10.1f}"
+                )
+        storage.close()
+    finally:
+        shutil.rmtree(db_path, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
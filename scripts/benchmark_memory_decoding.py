@@ -0,0 +1,127 @@
+# scripts/benchmark_memory_decoding.py
+# python scripts/benchmark_memory_decoding.py --rows 20000 --extra-keys 4
+
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from mcp_memory_service.storage.common import (
+    RESERVED_METADATA_KEYS,
+    TAG_KEY_PREFIX,
+    parse_tags,
+    parse_timestamp,
+    query_results_from_rows,
+    tag_keys
+)
+
+
+@dataclass
+class DataclassMemory:
+    """The record as it was before: a plain dataclass with a per-instance dict."""
+    content: str
+    content_hash: str
+    tags: List[str] = field(default_factory=list)
+    memory_type: Optional[str] = None
+    timestamp: datetime = field(default_factory=datetime.now)
+    metadata: Dict[str, Any] = field(default_factory=dict)
+    embedding: Optional[List[float]] = None
+
+
+@dataclass
+class DataclassResult:
+    memory: DataclassMemory
+    relevance_score: float
+    debug_info: Dict[str, Any] = field(default_factory=dict)
+
+
+def eager_decode(documents, metadatas, distances):
+    """Row-by-row decoding into dataclasses, parsing tags and copying metadata up front."""
+    return [
+        DataclassResult(
+            memory=DataclassMemory(
+                content=documents[i],
+                content_hash=metadatas[i]["content_hash"],
+                tags=parse_tags(metadatas[i]),
+                memory_type=metadatas[i].get("memory_type") or metadatas[i].get("type", ""),
+                timestamp=parse_timestamp(metadatas[i]),
+                metadata={k: v for k, v in metadatas[i].items()
+                          if k not in RESERVED_METADATA_KEYS and not k.startswith(TAG_KEY_PREFIX)}
+            ),
+            relevance_score=1.0 - distances[i]
+        )
+        for i in range(len(documents))
+    ]
+
+
+def lazy_decode(documents, metadatas, distances):
+    return query_results_from_rows(documents, metadatas, distances)
+
+
+def lazy_decode_and_read(documents, metadatas, distances):
+    """Lazy records whose tags are read afterwards, as when results are formatted for a reply."""
+    results = query_results_from_rows(documents, metadatas, distances)
+    for result in results:
+        result.memory.tags
+    return results
+
+
+def synthetic_rows(count, extra_keys):
+    documents, metadatas = [], []
+    for i in range(count):
+        tags = [f"tag{i % 7}", f"topic{i % 13}"]
+        metadata = {
+            "content_hash": f"{i:064x}",
+            "tags": json.dumps(tags),
+            "timestamp": 1.7e9 + i,
+            "memory_type": "note",
+            **tag_keys(tags),
+            **{f"extra{k}": f"value {i} {k}" for k in range(extra_keys)}
+        }
+        documents.append(f"memory number {i} with some content")
+        metadatas.append(metadata)
+    return documents, metadatas, [i / count for i in range(count)]
+
+
+def measure(decode, rows):
+    """Return (microseconds per row, retained bytes per row, peak bytes per row, the results)."""
+    gc.collect()
+    begin = time.perf_counter()
+    decode(*rows)
+    seconds = time.perf_counter() - begin
+
+    gc.collect()
+    tracemalloc.start()
+    results = decode(*rows)
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    count = len(rows[0])
+    return seconds / count * 1e6, retained / count, peak / count, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Time and allocations of decoding ChromaDB rows into memory records')
+    parser.add_argument('--rows', type=int, default=20000, help='Rows per decoded batch')
+    parser.add_argument('--extra-keys', type=int, default=4, help='Extra metadata keys per memory')
+    args = parser.parse_args()
+
+    rows = synthetic_rows(args.rows, args.extra_keys)
+    decoders = {
+        "dataclass, eager": eager_decode,
+        "slots, lazy": lazy_decode,
+        "slots, lazy + tags": lazy_decode_and_read
+    }
+
+    print(f"{args.rows} rows, {args.extra_keys} extra metadata keys")
+    print(f"{'decoder':<20}{'us/row':>10}{'retained B/row':>16}{'peak B/row':>12}")
+    for name, decode in decoders.items():
+        micros, retained, peak, _ = measure(decode, rows)
+        print(f"{name:<20}{micros:>10.2f}{retained:>16.0f}{peak:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
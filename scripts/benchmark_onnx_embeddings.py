@@ -0,0 +1,109 @@
+# scripts/benchmark_onnx_embeddings.py
+# python scripts/benchmark_onnx_embeddings.py --model all-MiniLM-L6-v2 --texts 2000
+#
+# Needs the ONNX extras: pip install optimum[onnxruntime]
+
+import argparse
+import logging
+import random
+import statistics
+import time
+
+import numpy as np
+
+from mcp_memory_service.storage.embeddings import (
+    load_onnx_sentence_transformer,
+    onnx_quantization_config
+)
+from mcp_memory_service.utils.similarity import normalize_rows
+
+logger = logging.getLogger(__name__)
+
+WORDS = (
+    "database configuration meeting notes python error handling deployment checklist customer "
+    "feedback summary release plan budget review incident report latency regression cache "
+    "invalidation schema migration backup restore onboarding roadmap quarterly goals"
+).split()
+
+
+def synthetic_texts(count, rng):
+    """Memory-like sentences of 8 to 40 words."""
+    return [" ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 40))) for _ in range(count)]
+
+
+def measure(model, texts, queries, batch_size):
+    """Return (embeddings, texts per second for batch encoding, single-query latencies)."""
+    model.encode(texts[:batch_size], batch_size=batch_size)  # warm up
+    begin = time.perf_counter()
+    embeddings = model.encode(texts, batch_size=batch_size, convert_to_numpy=True, show_progress_bar=False)
+    throughput = len(texts) / (time.perf_counter() - begin)
+
+    latencies = []
+    for query in queries:
+        begin = time.perf_counter()
+        model.encode(query, convert_to_numpy=True, show_progress_bar=False)
+        latencies.append(time.perf_counter() - begin)
+    return embeddings, throughput, latencies
+
+
+def neighbour_overlap(reference, candidate, queries, k):
+    """Mean share of the reference top-k neighbours that the candidate embeddings also rank in their top k."""
+    overlaps = []
+    for i in queries:
+        top_reference = set(np.argsort(-(reference @ reference[i]))[1:k + 1])
+        top_candidate = set(np.argsort(-(candidate @ candidate[i]))[1:k + 1])
+        overlaps.append(len(top_reference & top_candidate) / k)
+    return float(np.mean(overlaps))
+
+
+def main():
+    logging.basicConfig(
+        level=logging.WARNING,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    parser = argparse.ArgumentParser(description='Compare the fp32 PyTorch and int8 ONNX embedding backends on CPU')
+    parser.add_argument('--model', default='all-MiniLM-L6-v2', help='Model from MODEL_FALLBACKS to compare')
+    parser.add_argument('--texts', type=int, default=2000, help='Texts encoded for throughput and agreement')
+    parser.add_argument('--queries', type=int, default=50, help='Single-query encodes timed for latency')
+    parser.add_argument('--batch-size', type=int, default=32, help='Batch size for throughput')
+    parser.add_argument('--k', type=int, default=10, help='Neighbours compared for ranking agreement')
+    args = parser.parse_args()
+
+    from sentence_transformers import SentenceTransformer
+
+    rng = random.Random(0)
+    texts = synthetic_texts(args.texts, rng)
+    queries = synthetic_texts(args.queries, rng)
+
+    begin = time.perf_counter()
+    torch_model = SentenceTransformer(args.model, device="cpu")
+    torch_load = time.perf_counter() - begin
+    begin = time.perf_counter()
+    onnx_model = load_onnx_sentence_transformer(args.model, args.batch_size)
+    onnx_load = time.perf_counter() - begin
+
+    results = {}
+    for name, model, load_seconds in (("fp32 torch", torch_model, torch_load), ("int8 onnx", onnx_model, onnx_load)):
+        embeddings, throughput, latencies = measure(model, texts, queries, args.batch_size)
+        results[name] = (normalize_rows(np.asarray(embeddings, dtype=np.float32)), throughput, latencies, load_seconds)
+
+    reference, candidate = results["fp32 torch"][0], results["int8 onnx"][0]
+    cosines = np.sum(reference * candidate, axis=1)
+    sample = rng.sample(range(len(texts)), min(200, len(texts)))
+
+    print(f"\n{args.model}, {args.texts} texts, quantization config {onnx_quantization_config()}")
+    print(f"{'backend':<12}{'load (s)':>10}{'texts/s':>10}{'p50 (ms)':>10}{'p95 (ms)':>10}")
+    for name, (_, throughput, latencies, load_seconds) in results.items():
+        latencies = sorted(latencies)
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        print(
+            f"{name:<12}{load_seconds:>10.1f}{throughput:>10.1f}"
+            f"{statistics.median(latencies) * 1000:>10.1f}{p95 * 1000:>10.1f}"
+        )
+    print(f"\nCosine agreement (fp32 vs int8): mean {cosines.mean():.4f}, min {cosines.min():.4f}")
+    print(f"Top-{args.k} neighbour overlap: {neighbour_overlap(reference, candidate, sample, args.k):.3f}")
+
+
+if __name__ == "__main__":
+    main()
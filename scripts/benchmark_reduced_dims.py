@@ -0,0 +1,109 @@
+# scripts/benchmark_reduced_dims.py
+# python scripts/benchmark_reduced_dims.py --size 50000 --dimension 384 --dims 256 128 64
+
+import argparse
+import logging
+import shutil
+import statistics
+import tempfile
+import time
+
+import numpy as np
+
+from mcp_memory_service.storage.projection import EmbeddingProjection
+from mcp_memory_service.storage.sqlite import MemoryStore, VectorTable, search_vectors
+from mcp_memory_service.utils.similarity import normalize_rows
+
+logger = logging.getLogger(__name__)
+
+
+def synthetic_embeddings(size, dimension, decay, rng):
+    """
+    Unit vectors with a power-law variance spectrum in a random basis.
+
+    Sentence embeddings concentrate most of their variance in a minority of
+    directions; a decay of 0.5 to 1.0 gives a similar spectrum.
+    """
+    scales = np.arange(1, dimension + 1, dtype=np.float32) ** -decay
+    basis, _ = np.linalg.qr(rng.normal(size=(dimension, dimension)))
+    return normalize_rows((rng.normal(size=(size, dimension)) * scales) @ basis.T.astype(np.float32))
+
+
+def measure(vectors, store, queries, truth, k, candidate_factor):
+    """Return (recall@k against the exact top k, per-query latencies)."""
+    hits, latencies = 0, []
+    for query, expected in zip(queries, truth):
+        begin = time.perf_counter()
+        results = search_vectors(vectors, store, query, k, candidate_factor=candidate_factor)
+        latencies.append(time.perf_counter() - begin)
+        hits += len(expected & {memory_id for memory_id, _ in results})
+    return hits / (k * len(queries)), latencies
+
+
+def main():
+    logging.basicConfig(
+        level=logging.WARNING,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    parser = argparse.ArgumentParser(description='Recall@k and latency of reduced-dimension vector search (sqlite backend)')
+    parser.add_argument('--size', type=int, default=50000, help='Number of synthetic embeddings')
+    parser.add_argument('--dimension', type=int, default=384, help='Full embedding dimension')
+    parser.add_argument('--dims', type=int, nargs='+', default=[256, 128, 64], help='Reduced dimensions to compare')
+    parser.add_argument('--method', default='pca', choices=['pca', 'truncate'], help='Reduction method')
+    parser.add_argument('--candidates', type=int, default=8, help='Shortlist size as a multiple of k')
+    parser.add_argument('--queries', type=int, default=200, help='Queries per configuration')
+    parser.add_argument('--k', type=int, default=10, help='k of recall@k')
+    parser.add_argument('--decay', type=float, default=0.7, help='Power-law decay of the variance spectrum')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    embeddings = synthetic_embeddings(args.size, args.dimension, args.decay, rng)
+    ids = [f"m{i:08d}" for i in range(args.size)]
+    # Queries are noisy copies of stored embeddings, so the exact neighbourhood is non-trivial
+    sources = rng.choice(args.size, args.queries, replace=False)
+    queries = normalize_rows(embeddings[sources] + rng.normal(scale=0.5 / np.sqrt(args.dimension), size=(args.queries, args.dimension)))
+    truth = [set(ids[i] for i in np.argsort(-(embeddings @ query))[:args.k]) for query in queries]
+
+    db_path = tempfile.mkdtemp(prefix="memory_bench_reduced_")
+    try:
+        store = MemoryStore(db_path)
+        for offset in range(0, args.size, 5000):
+            store.put_many([
+                (ids[i], "", {"tags": "[]"}, embeddings[i])
+                for i in range(offset, min(offset + 5000, args.size))
+            ])
+
+        configurations = [("full", None)]
+        for dims in args.dims:
+            begin = time.perf_counter()
+            if args.method == "pca":
+                projection = EmbeddingProjection.fit_pca(embeddings, dims)
+            else:
+                projection = EmbeddingProjection.truncation(args.dimension, dims)
+            print(f"Fitted {args.method} to {dims} dimensions in {time.perf_counter() - begin:.2f}s")
+            configurations.append((str(dims), projection))
+
+        print(f"\n{args.size} x {args.dimension} embeddings, {args.queries} queries, shortlist {args.candidates}k")
+        print(f"{'dims':<6}{'table MB':>10}{'shortlist':>11}{f'recall@{args.k}':>11}{'p50 (ms)':>10}{'p95 (ms)':>10}")
+        for name, projection in configurations:
+            vectors = VectorTable(projection)
+            vectors.add(ids, embeddings)
+            table_mb = len(vectors) * vectors.dimension * 4 / 2 ** 20
+            # 1 x k skips the rerank's benefit: the reduced ranking alone decides
+            for factor in ([1] if projection is None else [1, args.candidates]):
+                recall, latencies = measure(vectors, store, queries, truth, args.k, factor)
+                latencies.sort()
+                p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+                print(
+                    f"{name:<6}{table_mb:>10.1f}{f'{factor}k':>11}{recall:>11.3f}"
+                    f"{statistics.median(latencies) * 1000:>10.2f}{p95 * 1000:>10.2f}"
+                )
+        store.close()
+    finally:
+        shutil.rmtree(db_path, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+# scripts/benchmark_scan_memory.py
+# python scripts/benchmark_scan_memory.py --sizes 10000 50000 100000 500000
+
+import argparse
+import asyncio
+import hashlib
+import logging
+import shutil
+import tempfile
+import tracemalloc
+
+import numpy as np
+
+from mcp_memory_service.storage.chroma import ChromaMemoryStorage
+
+logger = logging.getLogger(__name__)
+
+
+def grow(storage, start, end, rng, chunk=5000):
+    """Add rows [start, end) with random embeddings and transcript-sized documents."""
+    dim = storage.get_embedding_dimension()
+    for offset in range(start, end, chunk):
+        stop = min(end, offset + chunk)
+        ids = [hashlib.sha256(f"memory {i}".encode('utf-8')).hexdigest() for i in range(offset, stop)]
+        storage.collection.add(
+            ids=ids,
+            embeddings=rng.standard_normal((stop - offset, dim), dtype=np.float32).tolist(),
+            documents=[f"memory {i} " + "lorem ipsum " * 40 for i in range(offset, stop)],
+            metadatas=[{"content_hash": h, "tags": "[]", "timestamp": float(i)}
+                       for i, h in zip(range(offset, stop), ids)]
+        )
+
+
+def peak_mb(func):
+    """Peak Python heap growth while running func, in MB."""
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1] / 1e6
+    finally:
+        tracemalloc.stop()
+
+
+async def main():
+    logging.basicConfig(
+        level=logging.WARNING,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    parser = argparse.ArgumentParser(description='Peak memory of a full-collection scan: single get() vs paged iter_memories')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 50000, 100000],
+                        help='Collection sizes to measure at')
+    parser.add_argument('--batch-size', type=int, default=1000, help='Rows per iter_memories page')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    db_path = tempfile.mkdtemp(prefix="memory_bench_scan_")
+    try:
+        storage = ChromaMemoryStorage(db_path)
+        loop = asyncio.get_running_loop()
+
+        def cleanup():
+            # Run on a fresh loop in this thread so tracemalloc sees every page
+            asyncio.run(storage.cleanup_duplicates())
+
+        print(f"{'rows':>8} {'single get() (MB)':>18} {'paged scan (MB)':>16} {'cleanup (MB)':>13}")
+        size = 0
+        for target in sorted(args.sizes):
+            grow(storage, size, target, rng)
+            size = target
+            single = peak_mb(lambda: storage.collection.get(include=["metadatas", "documents"]))
+            paged = peak_mb(lambda: sum(
+                len(page["ids"])
+                for page in storage.iter_memories(args.batch_size, include=("metadatas", "documents"))
+            ))
+            cleanup_peak = await loop.run_in_executor(None, peak_mb, cleanup)
+            print(f"{size:>8} {single:>18.1f} {paged:>16.1f} {cleanup_peak:>13.1f}")
+        storage.close()
+    finally:
+        shutil.rmtree(db_path, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,103 @@
+# scripts/benchmark_startup.py
+# python scripts/benchmark_startup.py --model all-MiniLM-L6-v2
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+
+def current_rss_mb():
+    """Return the resident set size of this process in MB."""
+    try:
+        with open('/proc/self/status', 'r') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # Fall back to peak RSS where /proc is not available (macOS reports bytes)
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def load_separate(model_name, device):
+    """Previous behaviour: one SentenceTransformer plus a second copy inside ChromaDB."""
+    from sentence_transformers import SentenceTransformer
+    from chromadb.utils import embedding_functions
+
+    model = SentenceTransformer(model_name, device=device)
+    model.encode("Test encoding")
+    embedding_function = embedding_functions.SentenceTransformerEmbeddingFunction(
+        model_name=model_name,
+        device=device
+    )
+    embedding_function(["Test encoding"])
+
+
+def load_shared(model_name, device):
+    """Current behaviour: a single model shared through SharedEmbeddingModel."""
+    from mcp_memory_service.storage.chroma import ChromaMemoryStorage
+    from mcp_memory_service.storage.embeddings import SharedEmbeddingModel
+
+    model = ChromaMemoryStorage._load_sentence_transformer(model_name, device, 1)
+    embedding_function = SharedEmbeddingModel(model, model_name, device, 1)
+    embedding_function(["Test encoding"])
+
+
+def run_child(mode, model_name, device):
+    # Import the heavy libraries up front so only the model load is measured
+    import chromadb  # noqa: F401
+    import sentence_transformers  # noqa: F401
+
+    rss_before = current_rss_mb()
+    start = time.perf_counter()
+    if mode == 'separate':
+        load_separate(model_name, device)
+    else:
+        load_shared(model_name, device)
+    load_time = time.perf_counter() - start
+    rss_after = current_rss_mb()
+
+    print(json.dumps({
+        "mode": mode,
+        "load_time_s": round(load_time, 3),
+        "rss_before_mb": round(rss_before, 1),
+        "rss_after_mb": round(rss_after, 1),
+        "rss_delta_mb": round(rss_after - rss_before, 1)
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare model load time and RSS before/after sharing the embedding model')
+    parser.add_argument('--model', default='all-mpnet-base-v2', help='Sentence-transformer model to load')
+    parser.add_argument('--device', default='cpu', help='Torch device to load the model on')
+    parser.add_argument('--child', choices=['separate', 'shared'], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child, args.model, args.device)
+        return
+
+    results = []
+    for mode in ('separate', 'shared'):
+        # Each mode runs in a fresh interpreter so RSS numbers are independent
+        output = subprocess.check_output(
+            [sys.executable, os.path.abspath(__file__), '--child', mode,
+             '--model', args.model, '--device', args.device],
+            text=True
+        )
+        results.append(json.loads(output.strip().splitlines()[-1]))
+
+    print(f"\nStartup benchmark for {args.model} on {args.device}")
+    print(f"{'mode':<10} {'load time (s)':>14} {'RSS delta (MB)':>15} {'RSS total (MB)':>15}")
+    for result in results:
+        print(f"{result['mode']:<10} {result['load_time_s']:>14.3f} "
+              f"{result['rss_delta_mb']:>15.1f} {result['rss_after_mb']:>15.1f}")
+
+
+if __name__ == "__main__":
+    main()
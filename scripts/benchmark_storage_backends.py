@@ -0,0 +1,121 @@
+# scripts/benchmark_storage_backends.py
+# python scripts/benchmark_storage_backends.py --size 50000 --queries 20
+
+import argparse
+import asyncio
+import hashlib
+import logging
+import shutil
+import statistics
+import tempfile
+import time
+
+import numpy as np
+
+from mcp_memory_service.storage import create_storage
+from mcp_memory_service.storage.common import index_entry
+from mcp_memory_service.storage.stats import component_sizes
+from mcp_memory_service.utils.time_parser import parse_time_expression
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_QUERIES = [
+    "database configuration",
+    "meeting notes",
+    "python error handling",
+    "deployment checklist",
+    "customer feedback summary"
+]
+
+
+def populate(backend, storage, size, days, rng, chunk=5000):
+    """Add synthetic memories with random embeddings spread evenly over the last `days` days."""
+    dim = storage.get_embedding_dimension()
+    now = time.time()
+    for offset in range(0, size, chunk):
+        stop = min(size, offset + chunk)
+        ids = [hashlib.sha256(f"memory {i}".encode('utf-8')).hexdigest() for i in range(offset, stop)]
+        documents = [f"memory {i} " + "lorem ipsum " * 20 for i in range(offset, stop)]
+        metadatas = [
+            {"content_hash": h, "tags": '["bench"]', "memory_type": "note", "timestamp": now - i / size * days * 86400}
+            for i, h in zip(range(offset, stop), ids)
+        ]
+        embeddings = rng.standard_normal((stop - offset, dim), dtype=np.float32)
+        if backend == "chroma":
+            storage.collection.add(ids=ids, embeddings=embeddings.tolist(), documents=documents, metadatas=metadatas)
+            storage.index.add_many([index_entry(h, metadata) for h, metadata in zip(ids, metadatas)])
+        else:
+            storage._write(list(zip(ids, documents, metadatas)), embeddings)
+
+
+async def time_calls(storage, call, queries):
+    latencies = []
+    for query in queries:
+        storage.result_cache.clear()
+        begin = time.perf_counter()
+        await call(query)
+        latencies.append(time.perf_counter() - begin)
+    return latencies
+
+
+async def measure(backend, args, queries, start, end):
+    db_path = tempfile.mkdtemp(prefix=f"memory_bench_{backend}_")
+    try:
+        storage = create_storage(backend, db_path, lazy_model_loading=False)
+        begin = time.perf_counter()
+        populate(backend, storage, args.size, args.days, np.random.default_rng(0))
+        populate_seconds = time.perf_counter() - begin
+        storage.close()
+
+        # Cold start: open the populated store while the model loads in the background
+        begin = time.perf_counter()
+        storage = create_storage(backend, db_path, lazy_model_loading=True)
+        open_seconds = time.perf_counter() - begin
+        await storage.wait_for_model()
+
+        retrieve = lambda query: storage.retrieve(query, args.n_results)
+        recall = lambda query: storage.recall(query, args.n_results, start, end)
+        # Warm up the query embedding cache so only the search is measured
+        await time_calls(storage, retrieve, queries)
+        results = {
+            "populate (rows/s)": args.size / populate_seconds,
+            "open (ms)": open_seconds * 1000,
+            "retrieve p50 (ms)": statistics.median(await time_calls(storage, retrieve, queries)) * 1000,
+            "recall p50 (ms)": statistics.median(await time_calls(storage, recall, queries)) * 1000
+        }
+        storage.close()
+        sizes = component_sizes(db_path)
+        size = sum(value for value in sizes.values() if isinstance(value, int))
+        results["disk (MB)"] = (size + sum(sizes["hnsw_segments_bytes"].values())) / (1024 * 1024)
+        return results
+    finally:
+        shutil.rmtree(db_path, ignore_errors=True)
+
+
+async def main():
+    logging.basicConfig(
+        level=logging.WARNING,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    parser = argparse.ArgumentParser(description='Compare the chroma and sqlite storage backends')
+    parser.add_argument('--size', type=int, default=50000, help='Number of memories per store')
+    parser.add_argument('--days', type=int, default=365, help='Days the memories are spread over')
+    parser.add_argument('--queries', type=int, default=20, help='Calls timed per operation')
+    parser.add_argument('--n-results', type=int, default=10, help='Results per query')
+    parser.add_argument('--expression', default='last week', help='Time expression for the recall benchmark')
+    parser.add_argument('--backends', nargs='+', default=['chroma', 'sqlite'], help='Backends to compare')
+    args = parser.parse_args()
+
+    start, end = parse_time_expression(args.expression)
+    queries = [SAMPLE_QUERIES[i % len(SAMPLE_QUERIES)] + f" {i}" for i in range(args.queries)]
+    results = {backend: await measure(backend, args, queries, start, end) for backend in args.backends}
+
+    print(f"\n{args.size} memories, {args.queries} queries per operation")
+    print(f"{'metric':<20}" + "".join(f"{backend:>12}" for backend in args.backends))
+    for metric in results[args.backends[0]]:
+        print(f"{metric:<20}" + "".join(f"{results[backend][metric]:>12.1f}" for backend in args.backends))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
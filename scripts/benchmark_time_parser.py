@@ -0,0 +1,58 @@
+# scripts/benchmark_time_parser.py
+# python scripts/benchmark_time_parser.py --iterations 2000
+
+import argparse
+import os
+import re
+import time
+
+from mcp_memory_service.utils import time_parser
+from mcp_memory_service.utils.time_parser import extract_time_expression, parse_time_expression
+
+TEST_FILE = os.path.join(os.path.dirname(__file__), '..', 'tests', 'test_time_parser.py')
+
+
+def load_corpus(path):
+    """Collect the string literals passed to the parser functions in the time parser tests."""
+    with open(path) as f:
+        source = f.read()
+    queries = re.findall(r'(?:parse|extract)_time_expression\("([^"]+)"\)', source)
+    # The complex query is assigned to a variable before it is extracted
+    queries += re.findall(r'complex_query = "([^"]+)"', source)
+    return list(dict.fromkeys(queries))
+
+
+def per_call_us(func, queries, iterations, before_each=None):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for query in queries:
+            if before_each:
+                before_each()
+            func(query)
+    return (time.perf_counter() - start) / (iterations * len(queries)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Per-call latency of the time expression parser')
+    parser.add_argument('--iterations', type=int, default=2000, help='Passes over the corpus per measurement')
+    parser.add_argument('--corpus', default=TEST_FILE, help='Test file the query corpus is read from')
+    args = parser.parse_args()
+
+    queries = load_corpus(args.corpus)
+    clear = time_parser._parse_cache.clear
+
+    print(f"Time parser benchmark ({len(queries)} queries, {args.iterations} passes)")
+    print(f"{'measurement':<36} {'us/call':>10}")
+    rows = [
+        ("parse_time_expression (uncached)", per_call_us(parse_time_expression, queries, args.iterations, clear)),
+        ("parse_time_expression (cached)", per_call_us(parse_time_expression, queries, args.iterations)),
+        ("extract_time_expression (uncached)", per_call_us(extract_time_expression, queries, args.iterations, clear)),
+        ("extract_time_expression (cached)", per_call_us(extract_time_expression, queries, args.iterations)),
+    ]
+    for name, latency in rows:
+        print(f"{name:<36} {latency:>10.2f}")
+    print(f"\nparse cache: {time_parser._parse_cache.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+# scripts/benchmark_time_recall.py
+# python scripts/benchmark_time_recall.py --size 100000 --queries 20
+
+import argparse
+import asyncio
+import hashlib
+import logging
+import shutil
+import statistics
+import tempfile
+import time
+
+import numpy as np
+
+from mcp_memory_service.storage import chroma
+from mcp_memory_service.storage.chroma import ChromaMemoryStorage
+from mcp_memory_service.utils.time_parser import parse_time_expression
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_QUERIES = [
+    "database configuration",
+    "meeting notes",
+    "python error handling",
+    "deployment checklist",
+    "customer feedback summary"
+]
+
+
+def populate(storage, size, days, rng, chunk=5000):
+    """Add synthetic memories with random embeddings spread evenly over the last `days` days."""
+    dim = storage.get_embedding_dimension()
+    now = time.time()
+    for offset in range(0, size, chunk):
+        stop = min(size, offset + chunk)
+        ids = [hashlib.sha256(f"memory {i}".encode('utf-8')).hexdigest() for i in range(offset, stop)]
+        storage.collection.add(
+            ids=ids,
+            embeddings=rng.standard_normal((stop - offset, dim), dtype=np.float32).tolist(),
+            documents=[f"memory {i}" for i in range(offset, stop)],
+            metadatas=[
+                {"content_hash": h, "tags": "[]", "memory_type": "note", "timestamp": now - i / size * days * 86400}
+                for i, h in zip(range(offset, stop), ids)
+            ]
+        )
+    storage.rebuild_index()
+
+
+async def time_recall(storage, queries, start, end, n_results):
+    latencies = []
+    for query in queries:
+        storage.result_cache.clear()
+        begin = time.perf_counter()
+        await storage.recall(query, n_results, start, end)
+        latencies.append(time.perf_counter() - begin)
+    return latencies
+
+
+async def main():
+    logging.basicConfig(
+        level=logging.WARNING,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    parser = argparse.ArgumentParser(description='"last week" recall latency: timestamp index vs filtered HNSW query')
+    parser.add_argument('--size', type=int, default=100000, help='Number of memories in the collection')
+    parser.add_argument('--days', type=int, default=365, help='Days the memories are spread over')
+    parser.add_argument('--queries', type=int, default=20, help='Recall calls timed per mode')
+    parser.add_argument('--n-results', type=int, default=10, help='Results per recall')
+    parser.add_argument('--expression', default='last week', help='Time expression to recall')
+    args = parser.parse_args()
+
+    start, end = parse_time_expression(args.expression)
+    queries = [SAMPLE_QUERIES[i % len(SAMPLE_QUERIES)] for i in range(args.queries)]
+    db_path = tempfile.mkdtemp(prefix="memory_bench_time_")
+    try:
+        storage = ChromaMemoryStorage(db_path)
+        populate(storage, args.size, args.days, np.random.default_rng(0))
+        window = len(storage.index.find_by_time_range(start, end))
+
+        results = {}
+        brute_force_limit = chroma.TIME_FILTER_BRUTE_FORCE_LIMIT
+        for mode, limit in (("filtered hnsw", -1), ("timestamp index", brute_force_limit)):
+            chroma.TIME_FILTER_BRUTE_FORCE_LIMIT = limit
+            # Warm up the query embedding cache so only the search is measured
+            await time_recall(storage, queries, start, end, args.n_results)
+            results[mode] = await time_recall(storage, queries, start, end, args.n_results)
+        chroma.TIME_FILTER_BRUTE_FORCE_LIMIT = brute_force_limit
+        storage.close()
+    finally:
+        shutil.rmtree(db_path, ignore_errors=True)
+
+    print(f"\n'{args.expression}' recall over {args.size} memories ({window} in the window)")
+    print(f"{'mode':<16} {'p50 (ms)':>10} {'mean (ms)':>10} {'max (ms)':>10}")
+    for mode, latencies in results.items():
+        print(f"{mode:<16} {statistics.median(latencies) * 1000:>10.2f} "
+              f"{statistics.mean(latencies) * 1000:>10.2f} {max(latencies) * 1000:>10.2f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -7,6 +7,7 @@ import logging
 from datetime import datetime
 from pathlib import Path
 from mcp_memory_service.storage.chroma import ChromaMemoryStorage
+from mcp_memory_service.storage.common import TAG_KEY_PREFIX, sync_tag_keys
 import argparse 
 
 logger = logging.getLogger(__name__)
@@ -46,11 +47,11 @@ async def analyze_tag_formats(metadatas):
             
     return formats
 
-async def find_invalid_tags(metadatas):
+async def find_invalid_tags(metadatas, offset=0):
     """Find any invalid tag formats"""
     invalid_entries = []
     
-    for i, meta in enumerate(metadatas):
+    for i, meta in enumerate(metadatas, start=offset):
         tags = meta.get("tags")
         if tags is None:
             continue
@@ -68,95 +69,110 @@ async def find_invalid_tags(metadatas):
 
 async def backup_memories(storage):
     """Create a backup of all memories"""
-    results = storage.collection.get(include=["metadatas", "documents"])
-    
-    backup_data = {
-        "timestamp": datetime.now().isoformat(),
-        "memories": [{
-            "id": results["ids"][i],
-            "content": results["documents"][i],
-            "metadata": results["metadatas"][i]
-        } for i in range(len(results["ids"]))]
-    }
-    
     backup_path = Path("backups")
     backup_path.mkdir(exist_ok=True)
     
+    # Written one page at a time so the backup never has to fit in memory
     backup_file = backup_path / f"memory_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
     with open(backup_file, 'w') as f:
-        json.dump(backup_data, f)
+        f.write(f'{{"timestamp": {json.dumps(datetime.now().isoformat())}, "memories": [')
+        first = True
+        for page in storage.iter_memories(include=("metadatas", "documents")):
+            for i in range(len(page["ids"])):
+                if not first:
+                    f.write(", ")
+                first = False
+                json.dump({
+                    "id": page["ids"][i],
+                    "content": page["documents"][i],
+                    "metadata": page["metadatas"][i]
+                }, f)
+        f.write("]}")
     
     return backup_file
 
+async def scan_tag_state(storage):
+    """Count memories and summarize their tag formats, one page at a time"""
+    state = {
+        "total_memories": 0,
+        "tag_formats": {},
+        "invalid_tags": [],
+        "stale_tag_keys": 0
+    }
+    for page in storage.iter_memories():
+        formats = await analyze_tag_formats(page["metadatas"])
+        for name, count in formats.items():
+            state["tag_formats"][name] = state["tag_formats"].get(name, 0) + count
+        state["invalid_tags"].extend(await find_invalid_tags(page["metadatas"], state["total_memories"]))
+        # Memories whose boolean tag:<name> filter keys don't match their tags
+        state["stale_tag_keys"] += sum(sync_tag_keys(meta or {}) is not None for meta in page["metadatas"])
+        state["total_memories"] += len(page["ids"])
+    return state
+
 async def validate_current_state(storage):
     """Validate the current state of the database"""
-    results = storage.collection.get(include=["metadatas"])
-    return {
-        "total_memories": len(results["ids"]),
-        "tag_formats": await analyze_tag_formats(results["metadatas"]),
-        "invalid_tags": await find_invalid_tags(results["metadatas"])
-    }
+    return await scan_tag_state(storage)
 
 async def migrate_tags(storage):
-    """Perform the tag migration"""
-    results = storage.collection.get(include=["metadatas", "documents"])
-    
+    """Normalize tags to JSON lists and write the matching tag:<name> filter keys"""
     migrated_count = 0
     error_count = 0
     
-    for i, meta in enumerate(results["metadatas"]):
-        try:
-            # Extract current tags
-            current_tags = meta.get("tags", "[]")
-            
-            # Normalize to list format
-            if isinstance(current_tags, str):
-                try:
-                    # Try parsing as JSON first
-                    tags = json.loads(current_tags)
-                    if isinstance(tags, str):
-                        tags = [t.strip() for t in tags.split(",")]
-                    elif isinstance(tags, list):
-                        tags = [str(t).strip() for t in tags]
-                    else:
-                        tags = []
-                except json.JSONDecodeError:
-                    # Handle as comma-separated string
-                    tags = [t.strip() for t in current_tags.split(",")]
-            elif isinstance(current_tags, list):
-                tags = [str(t).strip() for t in current_tags]
-            else:
-                tags = []
-            
-            # Update with normalized format
-            new_meta = meta.copy()
-            new_meta["tags"] = json.dumps(tags)
-            
-            # Update memory
-            storage.collection.update(
-                ids=[results["ids"][i]],
-                metadatas=[new_meta]
-            )
+    # Rewriting metadata in place doesn't move rows, so it is safe mid-scan
+    for page in storage.iter_memories():
+        ids, metadatas = [], []
+        for i, meta in enumerate(page["metadatas"]):
+            try:
+                # Extract current tags
+                current_tags = meta.get("tags", "[]")
             
-            migrated_count += 1
+                # Normalize to list format
+                if isinstance(current_tags, str):
+                    try:
+                        # Try parsing as JSON first
+                        tags = json.loads(current_tags)
+                        if isinstance(tags, str):
+                            tags = [t.strip() for t in tags.split(",")]
+                        elif isinstance(tags, list):
+                            tags = [str(t).strip() for t in tags]
+                        else:
+                            tags = []
+                    except json.JSONDecodeError:
+                        # Handle as comma-separated string
+                        tags = [t.strip() for t in current_tags.split(",")]
+                elif isinstance(current_tags, list):
+                    tags = [str(t).strip() for t in current_tags]
+                else:
+                    tags = []
             
-        except Exception as e:
-            error_count += 1
-            logger.error(f"Error migrating memory {results['ids'][i]}: {str(e)}")
+                # Update with normalized format and filter keys
+                new_meta = meta.copy()
+                new_meta["tags"] = json.dumps(tags)
+                new_meta = sync_tag_keys(new_meta) or new_meta
+                ids.append(page["ids"][i])
+                metadatas.append(new_meta)
             
+            except Exception as e:
+                error_count += 1
+                logger.error(f"Error migrating memory {page['ids'][i]}: {str(e)}")
+        
+        # One update per page instead of one per memory
+        if ids:
+            try:
+                storage.collection.update(ids=ids, metadatas=metadatas)
+                migrated_count += len(ids)
+            except Exception as e:
+                error_count += len(ids)
+                logger.error(f"Error migrating memories {ids[0]}..{ids[-1]}: {str(e)}")
+    
+    # Tags may have changed, so rebuild the side index from the collection
+    storage.rebuild_index()
+    storage.index.set_meta("tag_keys_migrated", "1")
     return migrated_count, error_count
 
 async def verify_migration(storage):
     """Verify the migration was successful"""
-    results = storage.collection.get(include=["metadatas"])
-    
-    verification = {
-        "total_memories": len(results["ids"]),
-        "tag_formats": await analyze_tag_formats(results["metadatas"]),
-        "invalid_tags": await find_invalid_tags(results["metadatas"])
-    }
-    
-    return verification
+    return await scan_tag_state(storage)
 
 async def rollback_migration(storage, backup_file):
     """Rollback to the backup if needed"""
@@ -164,11 +180,18 @@ async def rollback_migration(storage, backup_file):
         backup = json.load(f)
         
     for memory in backup["memories"]:
+        # Updates can't drop keys, so filter keys added since the backup are reset instead
+        current = storage.collection.get(ids=[memory["id"]], include=["metadatas"])["metadatas"]
+        metadata = {
+            **{key: value for key, value in (current[0] if current else {}).items() if key.startswith(TAG_KEY_PREFIX)},
+            **memory["metadata"]
+        }
         storage.collection.update(
             ids=[memory["id"]],
-            metadatas=[memory["metadata"]],
+            metadatas=[sync_tag_keys(metadata) or metadata],
             documents=[memory["content"]]
         )
+    storage.rebuild_index()
 
 async def main():
     # Configure logging
@@ -11,37 +11,34 @@ logger = logging.getLogger(__name__)
 
 async def repair_missing_hashes(storage):
     """Repair memories missing content_hash by generating new ones"""
-    results = storage.collection.get(
-        include=["metadatas", "documents"]
-    )
-    
     fixed_count = 0
-    for i, meta in enumerate(results["metadatas"]):
-        memory_id = results["ids"][i]
+    for page in storage.iter_memories(include=("metadatas", "documents")):
+        for i, meta in enumerate(page["metadatas"]):
+            memory_id = page["ids"][i]
         
-        if "content_hash" not in meta:
-            try:
-                # Generate hash from content and metadata
-                content = results["documents"][i]
-                # Create a copy of metadata without the content_hash field
-                meta_for_hash = {k: v for k, v in meta.items() if k != "content_hash"}
-                new_hash = generate_content_hash(content, meta_for_hash)
+            if "content_hash" not in meta:
+                try:
+                    # Generate hash from content and metadata
+                    content = page["documents"][i]
+                    # Create a copy of metadata without the content_hash field
+                    meta_for_hash = {k: v for k, v in meta.items() if k != "content_hash"}
+                    new_hash = generate_content_hash(content, meta_for_hash)
                 
-                # Update metadata with new hash
-                new_meta = meta.copy()
-                new_meta["content_hash"] = new_hash
+                    # Update metadata with new hash
+                    new_meta = meta.copy()
+                    new_meta["content_hash"] = new_hash
                 
-                # Update the memory
-                storage.collection.update(
-                    ids=[memory_id],
-                    metadatas=[new_meta]
-                )
+                    # Update the memory
+                    storage.collection.update(
+                        ids=[memory_id],
+                        metadatas=[new_meta]
+                    )
                 
-                logger.info(f"Fixed memory {memory_id} with new hash: {new_hash}")
-                fixed_count += 1
+                    logger.info(f"Fixed memory {memory_id} with new hash: {new_hash}")
+                    fixed_count += 1
                 
-            except Exception as e:
-                logger.error(f"Error fixing memory {memory_id}: {str(e)}")
+                except Exception as e:
+                    logger.error(f"Error fixing memory {memory_id}: {str(e)}")
     
     return fixed_count
 
@@ -20,65 +20,62 @@ async def validate_memory_data(storage):
     }
     
     try:
-        # Get all memories from the collection
-        results = storage.collection.get(
-            include=["metadatas", "documents"]
-        )
-        
-        validation_results["total_memories"] = len(results["ids"])
-        
-        for i, meta in enumerate(results["metadatas"]):
-            memory_id = results["ids"][i]
+        # Walk the collection one page at a time
+        for page in storage.iter_memories():
+            validation_results["total_memories"] += len(page["ids"])
             
-            # 1. Check Required Fields
-            for field in ["content_hash", "tags"]:
-                if field not in meta:
-                    validation_results["missing_required_fields"].append({
-                        "memory_id": memory_id,
-                        "missing_field": field
-                    })
+            for i, meta in enumerate(page["metadatas"]):
+                memory_id = page["ids"][i]
+            
+                # 1. Check Required Fields
+                for field in ["content_hash", "tags"]:
+                    if field not in meta:
+                        validation_results["missing_required_fields"].append({
+                            "memory_id": memory_id,
+                            "missing_field": field
+                        })
             
-            # 2. Validate Tag Format
-            tags = meta.get("tags", "[]")
-            try:
-                if isinstance(tags, str):
-                    parsed_tags = json.loads(tags)
-                    if not isinstance(parsed_tags, list):
+                # 2. Validate Tag Format
+                tags = meta.get("tags", "[]")
+                try:
+                    if isinstance(tags, str):
+                        parsed_tags = json.loads(tags)
+                        if not isinstance(parsed_tags, list):
+                            validation_results["tag_format_issues"].append({
+                                "memory_id": memory_id,
+                                "issue": "Tags not in list format after parsing",
+                                "current_format": type(parsed_tags).__name__
+                            })
+                    elif isinstance(tags, list):
                         validation_results["tag_format_issues"].append({
                             "memory_id": memory_id,
-                            "issue": "Tags not in list format after parsing",
-                            "current_format": type(parsed_tags).__name__
+                            "issue": "Tags stored as raw list instead of JSON string",
+                            "current_format": "list"
                         })
-                elif isinstance(tags, list):
+                except json.JSONDecodeError:
                     validation_results["tag_format_issues"].append({
                         "memory_id": memory_id,
-                        "issue": "Tags stored as raw list instead of JSON string",
-                        "current_format": "list"
+                        "issue": "Invalid JSON in tags field",
+                        "current_value": tags
                     })
-            except json.JSONDecodeError:
-                validation_results["tag_format_issues"].append({
-                    "memory_id": memory_id,
-                    "issue": "Invalid JSON in tags field",
-                    "current_value": tags
-                })
             
-            # 3. Check Tag Content
-            try:
-                stored_tags = json.loads(tags) if isinstance(tags, str) else tags
-                if isinstance(stored_tags, list):
-                    for tag in stored_tags:
-                        if not isinstance(tag, str):
-                            validation_results["inconsistent_formats"].append({
-                                "memory_id": memory_id,
-                                "issue": f"Non-string tag found: {type(tag).__name__}",
-                                "value": str(tag)
-                            })
-            except Exception as e:
-                validation_results["inconsistent_formats"].append({
-                    "memory_id": memory_id,
-                    "issue": f"Error processing tags: {str(e)}",
-                    "current_tags": tags
-                })
+                # 3. Check Tag Content
+                try:
+                    stored_tags = json.loads(tags) if isinstance(tags, str) else tags
+                    if isinstance(stored_tags, list):
+                        for tag in stored_tags:
+                            if not isinstance(tag, str):
+                                validation_results["inconsistent_formats"].append({
+                                    "memory_id": memory_id,
+                                    "issue": f"Non-string tag found: {type(tag).__name__}",
+                                    "value": str(tag)
+                                })
+                except Exception as e:
+                    validation_results["inconsistent_formats"].append({
+                        "memory_id": memory_id,
+                        "issue": f"Error processing tags: {str(e)}",
+                        "current_tags": tags
+                    })
         
         # Generate Recommendations
         if validation_results["tag_format_issues"]:
@@ -3,7 +3,7 @@
 __version__ = "0.1.0"
 
 from .models import Memory, MemoryQueryResult
-from .storage import MemoryStorage, ChromaMemoryStorage
+from .storage import MemoryStorage
 from .utils import generate_content_hash
 
 __all__ = [
@@ -11,6 +11,14 @@ __all__ = [
     'MemoryQueryResult',
     'MemoryStorage',
     'ChromaMemoryStorage',
+    'SQLiteMemoryStorage',
     'generate_content_hash'
 ]
 
+
+def __getattr__(name):
+    # Storage backends load on first use (see storage.__getattr__)
+    if name in ('ChromaMemoryStorage', 'SQLiteMemoryStorage'):
+        from . import storage
+        return getattr(storage, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -5,6 +5,7 @@ Licensed under the MIT License. See LICENSE file in the project root for full li
 """
 import os
 import sys
+import time
 from pathlib import Path
 import logging
 
@@ -54,6 +55,13 @@ def get_base_directory() -> str:
     
     return validate_and_create_path(base)
 
+# Storage backend: "chroma" (ChromaDB, the default) or "sqlite" (single SQLite
+# file with NumPy vector search, no ChromaDB needed)
+STORAGE_BACKEND = os.getenv('MCP_MEMORY_STORAGE_BACKEND', 'chroma').strip().lower()
+if STORAGE_BACKEND not in ('chroma', 'sqlite'):
+    logger.warning(f"Unknown storage backend {STORAGE_BACKEND!r}, using chroma")
+    STORAGE_BACKEND = 'chroma'
+
 # Initialize paths
 try:
     BASE_DIR = get_base_directory()
@@ -84,8 +92,19 @@ try:
         backups_path = os.path.join(BASE_DIR, 'backups')
         logger.info(f"No backups path environment variable found, using default: {backups_path}")
     
+    # SQLite backend directory, only created when that backend is selected
+    sqlite_path = os.getenv('MCP_MEMORY_SQLITE_PATH') or os.path.join(BASE_DIR, 'sqlite_db')
+    
     CHROMA_PATH = validate_and_create_path(chroma_path)
     BACKUPS_PATH = validate_and_create_path(backups_path)
+    if STORAGE_BACKEND == 'sqlite':
+        SQLITE_PATH = validate_and_create_path(sqlite_path)
+        logger.info(f"Using SQLite storage path: {SQLITE_PATH}")
+    else:
+        SQLITE_PATH = os.path.abspath(sqlite_path)
+    
+    # Directory of the selected storage backend
+    STORAGE_PATH = SQLITE_PATH if STORAGE_BACKEND == 'sqlite' else CHROMA_PATH
 
     # Print the final paths used
     logger.info(f"Using ChromaDB path: {CHROMA_PATH}")
@@ -113,3 +132,85 @@ COLLECTION_METADATA = {
     "hnsw:construction_ef": 100,  # Increased for better accuracy
     "hnsw:search_ef": 100        # Increased for better search results
 }
+
+# Storage execution settings
+# Blocking ChromaDB and embedding calls run on a dedicated thread pool so they
+# don't stall the MCP event loop
+STORAGE_THREAD_WORKERS = max(1, int(os.getenv('MCP_MEMORY_STORAGE_WORKERS', '4')))
+
+# Query embedding cache settings
+# Repeated retrieve/recall queries reuse their embedding instead of re-running the model
+QUERY_EMBEDDING_CACHE_SIZE = int(os.getenv('MCP_MEMORY_EMBEDDING_CACHE_SIZE', '1024'))
+QUERY_EMBEDDING_CACHE_MAX_BYTES = int(float(os.getenv('MCP_MEMORY_EMBEDDING_CACHE_MAX_MB', '32')) * 1024 * 1024)
+
+# Model loading settings
+# When enabled the embedding model loads in the background so the server answers
+# list_tools and non-embedding tools right away
+LAZY_MODEL_LOADING = os.getenv('MCP_MEMORY_LAZY_MODEL_LOADING', 'false').lower() in ('1', 'true', 'yes')
+
+# ONNX Runtime embedding backend
+# On CPU, embed with a dynamically int8-quantized ONNX export of the model
+# (needs optimum[onnxruntime]), falling back to PyTorch if that fails. The
+# export is cached under the sentence-transformers cache directory (st_cache).
+USE_ONNX = os.getenv('MCP_MEMORY_USE_ONNX', 'false').lower() in ('1', 'true', 'yes')
+ONNX_CACHE_PATH = os.path.join(
+    os.getenv('SENTENCE_TRANSFORMERS_HOME') or os.path.join(os.path.dirname(CHROMA_PATH), 'st_cache'),
+    'onnx_int8'
+)
+
+# Query result cache settings
+# Identical retrieve/recall calls between writes are served from memory; any write
+# invalidates the cached results
+RESULT_CACHE_SIZE = int(os.getenv('MCP_MEMORY_RESULT_CACHE_SIZE', '256'))
+RESULT_CACHE_TTL = float(os.getenv('MCP_MEMORY_RESULT_CACHE_TTL', '300'))
+
+# Time-window recall settings
+# Semantic recall over a time window with at most this many memories ranks the
+# window's embeddings directly instead of filtering the HNSW search
+TIME_FILTER_BRUTE_FORCE_LIMIT = int(os.getenv('MCP_MEMORY_BRUTE_FORCE_LIMIT', '5000'))
+
+# Filtered search settings
+# When a filtered vector query comes back short, the unfiltered query is
+# repeated fetching this many times more candidates per round and filtered
+# afterwards, until enough results pass the filter
+FILTER_OVERFETCH_FACTOR = max(2, int(os.getenv('MCP_MEMORY_FILTER_OVERFETCH', '4')))
+
+# Hybrid search settings
+# Each ranking contributes this many times n_results candidates to the fusion;
+# a larger RRF constant flattens the weight of the top ranks
+HYBRID_CANDIDATE_FACTOR = max(1, int(os.getenv('MCP_MEMORY_HYBRID_CANDIDATES', '4')))
+HYBRID_RRF_K = max(1, int(os.getenv('MCP_MEMORY_HYBRID_RRF_K', '60')))
+
+# Reranking settings
+# Optional second retrieval stage: n_results x RERANK_CANDIDATE_FACTOR first-stage
+# results are rescored by a CPU cross-encoder within a per-request time budget
+RERANK_MODEL = os.getenv('MCP_MEMORY_RERANK_MODEL', 'cross-encoder/ms-marco-MiniLM-L-6-v2')
+RERANK_CANDIDATE_FACTOR = max(1, int(os.getenv('MCP_MEMORY_RERANK_CANDIDATES', '4')))
+RERANK_BUDGET_MS = max(0.0, float(os.getenv('MCP_MEMORY_RERANK_BUDGET_MS', '300')))
+RERANK_BATCH_SIZE = max(1, int(os.getenv('MCP_MEMORY_RERANK_BATCH_SIZE', '16')))
+RERANK_CACHE_SIZE = max(0, int(os.getenv('MCP_MEMORY_RERANK_CACHE_SIZE', '4096')))
+
+# Reduced-dimension search settings (sqlite backend)
+# With REDUCED_DIMENSIONS > 0 the in-memory vector table holds embeddings
+# projected to that many dimensions ("pca", fitted on the stored embeddings,
+# or "truncate" for Matryoshka models); the top n_results x
+# REDUCED_CANDIDATE_FACTOR matches are reranked with the full embeddings
+REDUCED_DIMENSIONS = max(0, int(os.getenv('MCP_MEMORY_REDUCED_DIMENSIONS', '0')))
+REDUCTION_METHOD = os.getenv('MCP_MEMORY_REDUCTION_METHOD', 'pca').lower()
+REDUCED_CANDIDATE_FACTOR = max(1, int(os.getenv('MCP_MEMORY_REDUCED_CANDIDATES', '8')))
+
+# Structured response settings
+# Default byte budget of format "json" responses from retrieve_memory,
+# recall_memory and search_by_tag; lower-ranked results are dropped to fit.
+# 0 disables the budget
+JSON_RESPONSE_MAX_BYTES = max(0, int(os.getenv('MCP_MEMORY_JSON_RESPONSE_MAX_BYTES', '32768')))
+
+# Full-scan settings
+# Full-collection scans (migrations, index rebuilds, cleanup, repair) read the
+# collection in pages of this many rows so memory use doesn't grow with its size
+SCAN_BATCH_SIZE = int(os.getenv('MCP_MEMORY_SCAN_BATCH_SIZE', '1000'))
+
+# Health check statistics
+# Sizes, tag and memory-type counts are served from a snapshot refreshed in the
+# background this often (seconds) after writes; 0 refreshes on demand instead
+STATS_REFRESH_INTERVAL = float(os.getenv('MCP_MEMORY_STATS_REFRESH_INTERVAL', '60'))
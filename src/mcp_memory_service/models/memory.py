@@ -1,18 +1,115 @@
 """Memory-related data models."""
 from dataclasses import dataclass, field
-from typing import List, Optional, Dict, Any
+from typing import Any, Callable, Dict, List, Optional, Tuple
 from datetime import datetime
 
-@dataclass
+# Turns stored metadata into (tags, extra metadata)
+MetadataDecoder = Callable[[Dict[str, Any]], Tuple[List[str], Dict[str, Any]]]
+
+
 class Memory:
-    """Represents a single memory entry."""
-    content: str
-    content_hash: str
-    tags: List[str] = field(default_factory=list)
-    memory_type: Optional[str] = None
-    timestamp: datetime = field(default_factory=datetime.now)
-    metadata: Dict[str, Any] = field(default_factory=dict)
-    embedding: Optional[List[float]] = None
+    """
+    Represents a single memory entry.
+
+    A __slots__ class rather than a dataclass, so a record has no per-instance
+    dict. Records read back from storage (see Memory.from_stored) keep the
+    stored metadata and only decode tags and extra metadata when either is
+    first accessed; results that are only ranked, filtered on type or time,
+    or dropped never pay for it.
+    """
+
+    __slots__ = ("content", "content_hash", "memory_type", "timestamp", "embedding", "_tags", "_metadata", "_stored", "_decoder")
+
+    def __init__(
+        self,
+        content: str,
+        content_hash: str,
+        tags: Optional[List[str]] = None,
+        memory_type: Optional[str] = None,
+        timestamp: Optional[datetime] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+        embedding: Optional[List[float]] = None
+    ):
+        self.content = content
+        self.content_hash = content_hash
+        self.memory_type = memory_type
+        self.timestamp = timestamp if timestamp is not None else datetime.now()
+        self.embedding = embedding
+        self._tags = tags if tags is not None else []
+        self._metadata = metadata if metadata is not None else {}
+        self._stored = None
+        self._decoder = None
+
+    @classmethod
+    def from_stored(
+        cls,
+        content: str,
+        content_hash: str,
+        memory_type: Optional[str],
+        timestamp: Any,
+        stored: Dict[str, Any],
+        decoder: MetadataDecoder
+    ) -> "Memory":
+        """Build a record whose tags and metadata are decoded from stored on first access."""
+        memory = cls.__new__(cls)
+        memory.content = content
+        memory.content_hash = content_hash
+        memory.memory_type = memory_type
+        memory.timestamp = timestamp
+        memory.embedding = None
+        memory._tags = None
+        memory._metadata = None
+        memory._stored = stored
+        memory._decoder = decoder
+        return memory
+
+    def _decode(self):
+        self._tags, self._metadata = self._decoder(self._stored)
+        self._stored = self._decoder = None
+
+    @property
+    def tags(self) -> List[str]:
+        if self._stored is not None:
+            self._decode()
+        return self._tags
+
+    @tags.setter
+    def tags(self, tags: List[str]):
+        if self._stored is not None:
+            self._decode()
+        self._tags = tags
+
+    @property
+    def metadata(self) -> Dict[str, Any]:
+        if self._stored is not None:
+            self._decode()
+        return self._metadata
+
+    @metadata.setter
+    def metadata(self, metadata: Dict[str, Any]):
+        if self._stored is not None:
+            self._decode()
+        self._metadata = metadata
+
+    def _fields(self) -> Tuple:
+        return (
+            self.content, self.content_hash, self.tags, self.memory_type,
+            self.timestamp, self.metadata, self.embedding
+        )
+
+    def __eq__(self, other: Any) -> bool:
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return self._fields() == other._fields()
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return (
+            f"Memory(content={self.content!r}, content_hash={self.content_hash!r}, tags={self.tags!r}, "
+            f"memory_type={self.memory_type!r}, timestamp={self.timestamp!r}, metadata={self.metadata!r}, "
+            f"embedding={self.embedding!r})"
+        )
 
     def to_dict(self) -> Dict[str, Any]:
         """Convert memory to dictionary format for storage."""
@@ -35,14 +132,14 @@ class Memory:
             tags=[tag for tag in tags if tag],  # Filter out empty tags
             memory_type=data.get("type"),
             timestamp=datetime.fromtimestamp(float(data["timestamp"])) if "timestamp" in data else datetime.now(),
-            metadata={k: v for k, v in data.items() if k not in 
+            metadata={k: v for k, v in data.items() if k not in
                      ["content", "content_hash", "tags_str", "type", "timestamp"]},
             embedding=embedding
         )
 
-@dataclass
+@dataclass(slots=True)
 class MemoryQueryResult:
     """Represents a memory query result with relevance score and debug information."""
     memory: Memory
     relevance_score: float
-    debug_info: Dict[str, Any] = field(default_factory=dict)
\ No newline at end of file
+    debug_info: Dict[str, Any] = field(default_factory=dict)
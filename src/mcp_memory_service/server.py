@@ -9,9 +9,11 @@ import logging
 import traceback
 import argparse
 import sys
+import time
 import json
 import platform
-from typing import List, Dict, Any, Optional, Tuple
+from dataclasses import dataclass
+from typing import List, Dict, Any, Optional, Tuple, Callable, Awaitable
 from datetime import datetime, timedelta
 
 from mcp.server.models import InitializationOptions
@@ -23,12 +25,22 @@ from mcp.types import Resource, Prompt
 from .config import (
     CHROMA_PATH,
     BACKUPS_PATH,
+    STORAGE_BACKEND,
+    STORAGE_PATH,
     SERVER_NAME,
-    SERVER_VERSION
+    SERVER_VERSION,
+    LAZY_MODEL_LOADING,
+    RERANK_CANDIDATE_FACTOR,
+    RERANK_BUDGET_MS,
+    JSON_RESPONSE_MAX_BYTES
 )
-from .storage.chroma import ChromaMemoryStorage
+from .storage import create_storage
+from .storage.rerank import CrossEncoderReranker
 from .models.memory import Memory
 from .utils.hashing import generate_content_hash
+from .utils.performance import ToolStats, track_call
+from .utils.response import RESPONSE_FIELDS, memory_record, parse_fields, structured_response
+from .utils.similarity import MIN_DUPLICATE_SIMILARITY
 from .utils.system_detection import (
     get_system_info,
     print_system_diagnostics,
@@ -82,16 +94,57 @@ def configure_environment():
 # Configure environment before any imports that might use it
 configure_environment()
 
+# Opt-in compact JSON output of retrieve_memory, recall_memory and search_by_tag
+STRUCTURED_RESPONSE_PROPERTIES = {
+    "format": {
+        "type": "string",
+        "enum": ["text", "json"],
+        "default": "text",
+        "description": "Return results as readable text or as one compact JSON object"
+    },
+    "fields": {
+        "type": "array",
+        "items": {"type": "string", "enum": list(RESPONSE_FIELDS)},
+        "description": "JSON only: fields of each result (default: all but metadata)"
+    },
+    "max_content_length": {
+        "type": "number",
+        "description": "JSON only: shorten content to this many characters around the sentence best matching the query"
+    },
+    "max_response_bytes": {
+        "type": "number",
+        "description": "JSON only: drop lower-ranked results to keep the response within this many bytes (0 for no limit)"
+    }
+}
+
+@dataclass(frozen=True)
+class RegisteredTool:
+    """An advertised tool and the handler its calls are dispatched to."""
+    tool: types.Tool
+    handler: Callable[[dict], Awaitable[List[types.TextContent]]]
+
 class MemoryServer:
-    def __init__(self):
-        """Initialize the server with hardware-aware configuration."""
+    def __init__(self, lazy_model_loading: bool = LAZY_MODEL_LOADING, storage_path: Optional[str] = None):
+        """
+        Initialize the server with hardware-aware configuration.
+        
+        With lazy_model_loading the embedding model loads in the background, so
+        list_tools and non-embedding tools are answered before it is ready.
+        storage_path overrides the configured directory of the storage backend.
+        """
+        self._started_at = time.perf_counter()
+        self._first_response_at = None
         self.server = Server(SERVER_NAME)
         self.system_info = get_system_info()
+        self._health_check_task = None
+        self._model_ready_task = None
+        self._stats_refresh_task = None
+        self.storage_path = storage_path or STORAGE_PATH
         
         try:
             # Initialize paths
             logger.info(f"Creating directories if they don't exist...")
-            os.makedirs(CHROMA_PATH, exist_ok=True)
+            os.makedirs(self.storage_path, exist_ok=True)
             os.makedirs(BACKUPS_PATH, exist_ok=True)
             
             # Log system diagnostics
@@ -99,8 +152,8 @@ class MemoryServer:
             logger.info(f"Using accelerator: {self.system_info.accelerator}")
             
             # Initialize storage with hardware-aware settings
-            logger.info("Initializing ChromaMemoryStorage with hardware-aware settings...")
-            self.storage = ChromaMemoryStorage(CHROMA_PATH)
+            logger.info(f"Initializing {STORAGE_BACKEND} storage with hardware-aware settings...")
+            self.storage = create_storage(STORAGE_BACKEND, self.storage_path, lazy_model_loading=lazy_model_loading)
 
         except Exception as e:
             logger.error(f"Initialization error: {str(e)}")
@@ -109,11 +162,18 @@ class MemoryServer:
             # Try to create a minimal storage instance that can at least start
             try:
                 logger.warning("Attempting to create minimal storage instance...")
-                self.storage = ChromaMemoryStorage(CHROMA_PATH)
+                self.storage = create_storage(STORAGE_BACKEND, self.storage_path, lazy_model_loading=lazy_model_loading)
             except Exception as fallback_error:
                 logger.error(f"Failed to create minimal storage: {str(fallback_error)}")
                 raise
         
+        # Optional second retrieval stage; the cross-encoder loads on first use
+        self.reranker = CrossEncoderReranker()
+        
+        # Tool schemas paired with their handlers, and the per-tool call timings
+        self.tools = self._build_tool_registry()
+        self.tool_stats = ToolStats()
+        
         # Register handlers
         self.register_handlers()
         logger.info("Server initialization complete")
@@ -132,16 +192,12 @@ class MemoryServer:
             print(f"Accelerator: {self.system_info.accelerator}", file=sys.stderr, flush=True)
             print(f"Python: {platform.python_version()}", file=sys.stderr, flush=True)
             
-            # Validate database health with timeout
-            try:
-                success = await asyncio.wait_for(
-                    self.validate_database_health(),
-                    timeout=10.0
-                )
-                if not success:
-                    logger.warning("Database health check failed, but server will continue")
-            except asyncio.TimeoutError:
-                logger.warning("Database health check timed out, continuing anyway")
+            # Validate database health in the background so startup never waits on it
+            self._health_check_task = asyncio.create_task(self.validate_database_health())
+            if not self.storage.model_ready:
+                self._model_ready_task = asyncio.create_task(self.report_model_ready())
+            if self.storage.stats is not None and self.storage.stats.refresh_interval > 0:
+                self._stats_refresh_task = asyncio.create_task(self.refresh_stats_periodically())
             
             # Add explicit console error output for Smithery to see
             print("MCP Memory Service initialization completed", file=sys.stderr, flush=True)
@@ -156,32 +212,59 @@ class MemoryServer:
             return False
 
     async def validate_database_health(self):
-        """Validate database health during initialization."""
-        from .utils.db_utils import validate_database, repair_database
+        """
+        Run the read-only database health check during initialization.
+        
+        Problems are only reported; nothing is written or repaired at startup.
+        Use the check_database_health tool with full_check for the write probe.
+        """
+        from .utils.db_utils import validate_database
         
         try:
-            # Check database health
+            start_time = time.perf_counter()
             is_valid, message = await validate_database(self.storage)
+            elapsed_ms = (time.perf_counter() - start_time) * 1000
             if not is_valid:
-                logger.warning(f"Database validation failed: {message}")
-                
-                # Attempt repair
-                logger.info("Attempting database repair...")
-                repair_success, repair_message = await repair_database(self.storage)
-                
-                if not repair_success:
-                    logger.error(f"Database repair failed: {repair_message}")
-                    return False
-                else:
-                    logger.info(f"Database repair successful: {repair_message}")
-                    return True
-            else:
-                logger.info(f"Database validation successful: {message}")
-                return True
+                logger.warning(
+                    f"Database validation failed after {elapsed_ms:.1f}ms: {message}. "
+                    "Run check_database_health with full_check for details."
+                )
+                return False
+            logger.info(f"Database validation successful in {elapsed_ms:.1f}ms: {message}")
+            return True
         except Exception as e:
             logger.error(f"Database validation error: {str(e)}")
             return False
 
+    async def refresh_stats_periodically(self):
+        """Keep the health check statistics snapshot current in the background."""
+        while True:
+            try:
+                await self.storage.refresh_stats()
+            except Exception as e:
+                logger.error(f"Error refreshing storage statistics: {str(e)}")
+            await asyncio.sleep(self.storage.stats.refresh_interval)
+
+    async def report_model_ready(self):
+        """Log how long after startup a background model load finished."""
+        await self.storage.wait_for_model()
+        elapsed = time.perf_counter() - self._started_at
+        logger.info(f"Embedding model ready {elapsed:.2f}s after startup")
+        print(f"Embedding model ready {elapsed:.2f}s after startup", file=sys.stderr, flush=True)
+
+    def record_first_response(self):
+        """Report the time from startup to the first request the server answers."""
+        if self._first_response_at is not None:
+            return
+        self._first_response_at = time.perf_counter()
+        elapsed = self._first_response_at - self._started_at
+        message = (
+            f"Time to first response: {elapsed:.2f}s "
+            f"(embedding model ready: {self.storage.model_ready})"
+        )
+        logger.info(message)
+        print(message, file=sys.stderr, flush=True)
+
     def handle_method_not_found(self, method: str) -> None:
         """Custom handler for unsupported methods.
         
@@ -227,344 +310,689 @@ class MemoryServer:
         
         @self.server.list_tools()
         async def handle_list_tools() -> List[types.Tool]:
-            return [
-                types.Tool(
-                    name="store_memory",
-                    description="""Store new information with optional tags.
-
-                    Accepts two tag formats in metadata:
-                    - Array: ["tag1", "tag2"]
-                    - String: "tag1,tag2"
-
-                   Examples:
-                    # Using array format:
-                    {
-                        "content": "Memory content",
-                        "metadata": {
-                            "tags": ["important", "reference"],
-                            "type": "note"
-                        }
+            self.record_first_response()
+            return [registered.tool for registered in self.tools.values()]
+        
+        @self.server.call_tool()
+        async def handle_call_tool(name: str, arguments: dict | None) -> List[types.TextContent]:
+            self.record_first_response()
+            try:
+                logger.debug(f"Tool call received: {name} with arguments {arguments}")
+                registered = self.tools.get(name)
+                if registered is None:
+                    raise ValueError(f"Unknown tool: {name}")
+                return await self.call_tool(registered, arguments or {})
+            except Exception as e:
+                logger.error(f"Error in {name}: {str(e)}\n{traceback.format_exc()}")
+                return [types.TextContent(type="text", text=f"Error: {str(e)}")]
+
+    def _tool_schemas(self) -> List[types.Tool]:
+        """Schemas of the tools the server advertises."""
+        return [
+            types.Tool(
+                name="store_memory",
+                description="""Store new information with optional tags.
+
+                Accepts two tag formats in metadata:
+                - Array: ["tag1", "tag2"]
+                - String: "tag1,tag2"
+
+               Examples:
+                # Using array format:
+                {
+                    "content": "Memory content",
+                    "metadata": {
+                        "tags": ["important", "reference"],
+                        "type": "note"
                     }
+                }
 
-                    # Using string format(preferred):
-                    {
-                        "content": "Memory content",
+                # Using string format(preferred):
+                {
+                    "content": "Memory content",
+                    "metadata": {
+                        "tags": "important,reference",
+                        "type": "note"
+                    }
+                }""",
+                inputSchema={
+                    "type": "object",
+                    "properties": {
+                        "content": {"type": "string"},
                         "metadata": {
-                            "tags": "important,reference",
-                            "type": "note"
+                            "type": "object",
+                            "properties": {
+                                "tags": {
+                                    "oneOf": [
+                                        {"type": "array", "items": {"type": "string"}},
+                                        {"type": "string"}
+                                    ]
+                                },
+                                "type": {"type": "string"}
+                            }
                         }
-                    }""",
-                    inputSchema={
-                        "type": "object",
-                        "properties": {
-                            "content": {"type": "string"},
-                            "metadata": {
+                    },
+                    "required": ["content"]
+                }
+            ),
+            types.Tool(
+                name="store_memories",
+                description="""Store several memories in one call.
+                Each item takes the same content and metadata as store_memory.
+                Duplicates are checked and embeddings computed in a single batch,
+                and a success or failure result is returned for every item.
+
+                Example:
+                {
+                    "memories": [
+                        {"content": "First memory", "metadata": {"tags": "meeting,notes"}},
+                        {"content": "Second memory", "metadata": {"type": "note"}}
+                    ]
+                }""",
+                inputSchema={
+                    "type": "object",
+                    "properties": {
+                        "memories": {
+                            "type": "array",
+                            "items": {
                                 "type": "object",
                                 "properties": {
-                                    "tags": {
-                                        "oneOf": [
-                                            {"type": "array", "items": {"type": "string"}},
-                                            {"type": "string"}
-                                        ]
-                                    },
-                                    "type": {"type": "string"}
-                                }
+                                    "content": {"type": "string"},
+                                    "metadata": {
+                                        "type": "object",
+                                        "properties": {
+                                            "tags": {
+                                                "oneOf": [
+                                                    {"type": "array", "items": {"type": "string"}},
+                                                    {"type": "string"}
+                                                ]
+                                            },
+                                            "type": {"type": "string"}
+                                        }
+                                    }
+                                },
+                                "required": ["content"]
                             }
+                        }
+                    },
+                    "required": ["memories"]
+                }
+            ),
+            types.Tool(
+                name="recall_memory",
+                description="""Retrieve memories using natural language time expressions and optional semantic search.
+                
+                Supports various time-related expressions such as:
+                - "yesterday", "last week", "2 days ago"
+                - "last summer", "this month", "last January"
+                - "spring", "winter", "Christmas", "Thanksgiving"
+                - "morning", "evening", "yesterday afternoon"
+                
+                Examples:
+                {
+                    "query": "recall what I stored last week"
+                }
+                
+                {
+                    "query": "find information about databases from two months ago",
+                    "n_results": 5
+                }
+                
+                Time-only queries can be paged newest first with page_size; pass
+                the returned cursor to get the next page:
+                {
+                    "query": "last month",
+                    "page_size": 20,
+                    "cursor": "<cursor from the previous page>"
+                }
+                
+                Results can be restricted with tags, match_all, memory_type and
+                metadata, as for retrieve_memory (paging ignores these filters):
+                {
+                    "query": "decisions from last week",
+                    "tags": ["project-x"],
+                    "memory_type": "decision"
+                }
+                
+                format "json" with fields, max_content_length and
+                max_response_bytes returns compact JSON as for retrieve_memory.
+                """,
+                inputSchema={
+                    "type": "object",
+                    "properties": {
+                        "query": {"type": "string"},
+                        "n_results": {"type": "number", "default": 5},
+                        "page_size": {
+                            "type": "number",
+                            "description": "Page through a time-only query, newest first (ignored for semantic or filtered queries)"
                         },
-                        "required": ["content"]
-                    }
-                ),
-                types.Tool(
-                    name="recall_memory",
-                    description="""Retrieve memories using natural language time expressions and optional semantic search.
-                    
-                    Supports various time-related expressions such as:
-                    - "yesterday", "last week", "2 days ago"
-                    - "last summer", "this month", "last January"
-                    - "spring", "winter", "Christmas", "Thanksgiving"
-                    - "morning", "evening", "yesterday afternoon"
-                    
-                    Examples:
-                    {
-                        "query": "recall what I stored last week"
-                    }
-                    
-                    {
-                        "query": "find information about databases from two months ago",
-                        "n_results": 5
-                    }
-                    """,
-                    inputSchema={
-                        "type": "object",
-                        "properties": {
-                            "query": {"type": "string"},
-                            "n_results": {"type": "number", "default": 5}
+                        "cursor": {
+                            "type": "string",
+                            "description": "Cursor returned with the previous page"
                         },
-                        "required": ["query"]
-                    }
-                ),
-                types.Tool(
-                    name="retrieve_memory",
-                    description="""Find relevant memories based on query.
-
-                    Example:
-                    {
-                        "query": "find this memory",
-                        "n_results": 5
-                    }""",
-                    inputSchema={
-                        "type": "object",
-                        "properties": {
-                            "query": {"type": "string"},
-                            "n_results": {"type": "number", "default": 5}
+                        "tags": {
+                            "oneOf": [
+                                {"type": "array", "items": {"type": "string"}},
+                                {"type": "string"}
+                            ],
+                            "description": "Only search memories with any of these tags (array or comma-separated string)"
                         },
-                        "required": ["query"]
-                    }
-                ),
-                types.Tool(
-                    name="search_by_tag",
-                    description="""Search memories by tags. Must use array format.
-                    Returns memories matching ANY of the specified tags.
-
-                    Example:
-                    {
-                        "tags": ["important", "reference"]
-                    }""",
-                    inputSchema={
-                        "type": "object",
-                        "properties": {
-                            "tags": {"type": "array", "items": {"type": "string"}}
+                        "match_all": {
+                            "type": "boolean",
+                            "default": False,
+                            "description": "Require all of the tags instead of any"
                         },
-                        "required": ["tags"]
-                    }
-                ),
-                types.Tool(
-                    name="delete_memory",
-                    description="""Delete a specific memory by its hash.
-
-                    Example:
-                    {
-                        "content_hash": "a1b2c3d4..."
-                    }""",
-                                inputSchema={
-                                    "type": "object",
-                                    "properties": {
-                                        "content_hash": {"type": "string"}
-                                    },
-                                    "required": ["content_hash"]
-                                }
-                            ),
-                types.Tool(
-                    name="delete_by_tag",
-                    description="""Delete all memories with a specific tag.
-                    WARNING: Deletes ALL memories containing the specified tag.
-
-                    Example:
-                    {
-                        "tag": "temporary"
-                    }""",
-                    inputSchema={
-                        "type": "object",
-                        "properties": {
-                            "tag": {"type": "string"}
+                        "memory_type": {
+                            "type": "string",
+                            "description": "Only search memories of this type"
                         },
-                        "required": ["tag"]
-                    }
-                ),
-                types.Tool(
-                    name="cleanup_duplicates",
-                    description="Find and remove duplicate entries",
-                    inputSchema={
-                        "type": "object",
-                        "properties": {}
-                    }
-                ),
-                types.Tool(
-                    name="get_embedding",
-                    description="""Get raw embedding vector for content.
-
-                    Example:
-                    {
-                        "content": "text to embed"
-                    }""",
-                    inputSchema={
-                        "type": "object",
-                        "properties": {
-                            "content": {"type": "string"}
+                        "metadata": {
+                            "type": "object",
+                            "description": "Only search memories whose metadata has these exact values"
                         },
-                        "required": ["content"]
-                    }
-                ),
-                types.Tool(
-                    name="check_embedding_model",
-                    description="Check if embedding model is loaded and working",
-                    inputSchema={
-                        "type": "object",
-                        "properties": {}
-                    }
-                ),
-                types.Tool(
-                    name="debug_retrieve",
-                    description="""Retrieve memories with debug information.
-
-                    Example:
-                    {
-                        "query": "debug this",
-                        "n_results": 5,
-                        "similarity_threshold": 0.0
-                    }""",
-                    inputSchema={
-                        "type": "object",
-                        "properties": {
-                            "query": {"type": "string"},
-                            "n_results": {"type": "number", "default": 5},
-                            "similarity_threshold": {"type": "number", "default": 0.0}
+                        **STRUCTURED_RESPONSE_PROPERTIES
+                    },
+                    "required": ["query"]
+                }
+            ),
+            types.Tool(
+                name="retrieve_memory",
+                description="""Find relevant memories based on query.
+
+                Optionally only memories with any (or, with match_all, all) of
+                the tags, of a memory type, or with exact metadata values are
+                searched. The filter is applied within the search, so up to
+                n_results matching memories are returned.
+
+                mode "lexical" ranks by keyword (BM25) relevance, which finds
+                identifiers, error codes and file paths; "hybrid" combines both
+                rankings.
+
+                With rerank, n_results x rerank_candidates results are rescored
+                by a cross-encoder and the best n_results returned. If that takes
+                longer than rerank_budget_ms, the first-stage order is kept.
+
+                Example:
+                {
+                    "query": "find this memory",
+                    "n_results": 5
+                }
+
+                {
+                    "query": "ERR_CONN_RESET in api/client.py",
+                    "mode": "hybrid"
+                }
+
+                {
+                    "query": "database settings",
+                    "tags": ["config", "production"],
+                    "match_all": true,
+                    "memory_type": "note",
+                    "metadata": {"source": "ops"}
+                }
+
+                format "json" returns one compact JSON object instead of text.
+                fields picks what each result carries, max_content_length
+                shortens content to the part best matching the query, and
+                lower-ranked results are dropped to fit max_response_bytes:
+                {
+                    "query": "database settings",
+                    "format": "json",
+                    "fields": ["hash", "score", "tags", "content"],
+                    "max_content_length": 200
+                }""",
+                inputSchema={
+                    "type": "object",
+                    "properties": {
+                        "query": {"type": "string"},
+                        "n_results": {"type": "number", "default": 5},
+                        "mode": {
+                            "type": "string",
+                            "enum": ["semantic", "lexical", "hybrid"],
+                            "default": "semantic",
+                            "description": "Rank by embedding similarity, keyword relevance or both fused"
                         },
-                        "required": ["query"]
-                    }
-                ),
-                types.Tool(
-                    name="exact_match_retrieve",
-                    description="""Retrieve memories using exact content match.
-
-                    Example:
-                    {
-                        "content": "find exactly this"
-                    }""",
-                    inputSchema={
-                        "type": "object",
-                        "properties": {
-                            "content": {"type": "string"}
+                        "rerank": {
+                            "type": "boolean",
+                            "default": False,
+                            "description": "Rerank over-fetched results with a cross-encoder"
                         },
-                        "required": ["content"]
-                    }
-                ),
-                types.Tool(
-                    name="check_database_health",
-                    description="Check database health and get statistics",
-                    inputSchema={
-                        "type": "object",
-                        "properties": {}
-                    }
-                ),
-                types.Tool(
-                    name="recall_by_timeframe",
-                    description="""Retrieve memories within a specific timeframe.
-
-                    Example:
-                    {
-                        "start_date": "2024-01-01",
-                        "end_date": "2024-01-31",
-                        "n_results": 5
-                    }""",
-                    inputSchema={
-                        "type": "object",
-                        "properties": {
-                            "start_date": {"type": "string", "format": "date"},
-                            "end_date": {"type": "string", "format": "date"},
-                            "n_results": {"type": "number", "default": 5}
+                        "rerank_candidates": {
+                            "type": "number",
+                            "description": "First-stage results reranked, as a multiple of n_results"
+                        },
+                        "rerank_budget_ms": {
+                            "type": "number",
+                            "description": "Time budget for reranking, after which first-stage order is returned"
+                        },
+                        "tags": {
+                            "oneOf": [
+                                {"type": "array", "items": {"type": "string"}},
+                                {"type": "string"}
+                            ],
+                            "description": "Only search memories with any of these tags (array or comma-separated string)"
+                        },
+                        "match_all": {
+                            "type": "boolean",
+                            "default": False,
+                            "description": "Require all of the tags instead of any"
+                        },
+                        "memory_type": {
+                            "type": "string",
+                            "description": "Only search memories of this type"
+                        },
+                        "metadata": {
+                            "type": "object",
+                            "description": "Only search memories whose metadata has these exact values"
+                        },
+                        **STRUCTURED_RESPONSE_PROPERTIES
+                    },
+                    "required": ["query"]
+                }
+            ),
+            types.Tool(
+                name="search_by_tag",
+                description="""Search memories by tags. Must use array format.
+                Returns memories matching ANY of the specified tags,
+                or ALL of them when match_all is true.
+
+                With format "json", the fields, max_content_length and
+                max_response_bytes options work as for retrieve_memory.
+
+                Example:
+                {
+                    "tags": ["important", "reference"],
+                    "match_all": false
+                }""",
+                inputSchema={
+                    "type": "object",
+                    "properties": {
+                        "tags": {"type": "array", "items": {"type": "string"}},
+                        "match_all": {"type": "boolean", "default": False},
+                        **STRUCTURED_RESPONSE_PROPERTIES
+                    },
+                    "required": ["tags"]
+                }
+            ),
+            types.Tool(
+                name="delete_memory",
+                description="""Delete a specific memory by its hash.
+
+                Example:
+                {
+                    "content_hash": "a1b2c3d4..."
+                }""",
+                            inputSchema={
+                                "type": "object",
+                                "properties": {
+                                    "content_hash": {"type": "string"}
+                                },
+                                "required": ["content_hash"]
+                            }
+                        ),
+            types.Tool(
+                name="delete_by_tag",
+                description="""Delete all memories with a specific tag.
+                WARNING: Deletes ALL memories containing the specified tag.
+
+                Example:
+                {
+                    "tag": "temporary"
+                }""",
+                inputSchema={
+                    "type": "object",
+                    "properties": {
+                        "tag": {"type": "string"}
+                    },
+                    "required": ["tag"]
+                }
+            ),
+            types.Tool(
+                name="cleanup_duplicates",
+                description="""Find and remove duplicate entries.
+                Without arguments, removes exact duplicates. With similarity_threshold,
+                also finds paraphrased near-duplicates and keeps the oldest memory of
+                each cluster. Near-duplicate cleanup is a dry run that only reports the
+                clusters unless dry_run is set to false.
+
+                Example:
+                {
+                    "similarity_threshold": 0.95,
+                    "dry_run": true
+                }""",
+                inputSchema={
+                    "type": "object",
+                    "properties": {
+                        "similarity_threshold": {
+                            "type": "number",
+                            "minimum": MIN_DUPLICATE_SIMILARITY,
+                            "maximum": 1,
+                            "description": f"Cosine similarity at or above which memories count as duplicates ({MIN_DUPLICATE_SIMILARITY} to 1)"
                         },
-                        "required": ["start_date"]
+                        "dry_run": {
+                            "type": "boolean",
+                            "description": "Report what would be removed without deleting (default: true with similarity_threshold, false otherwise)"
+                        }
                     }
-                ),
-                types.Tool(
-                    name="delete_by_timeframe",
-                    description="""Delete memories within a specific timeframe.
-                    Optional tag parameter to filter deletions.
-
-                    Example:
-                    {
-                        "start_date": "2024-01-01",
-                        "end_date": "2024-01-31",
-                        "tag": "temporary"
-                    }""",
-                    inputSchema={
-                        "type": "object",
-                        "properties": {
-                            "start_date": {"type": "string", "format": "date"},
-                            "end_date": {"type": "string", "format": "date"},
-                            "tag": {"type": "string"}
+                }
+            ),
+            types.Tool(
+                name="get_embedding",
+                description="""Get raw embedding vector for content.
+
+                Example:
+                {
+                    "content": "text to embed"
+                }""",
+                inputSchema={
+                    "type": "object",
+                    "properties": {
+                        "content": {"type": "string"}
+                    },
+                    "required": ["content"]
+                }
+            ),
+            types.Tool(
+                name="check_embedding_model",
+                description="Check if embedding model is loaded and working",
+                inputSchema={
+                    "type": "object",
+                    "properties": {}
+                }
+            ),
+            types.Tool(
+                name="debug_retrieve",
+                description="""Retrieve memories with debug information.
+
+                With rerank, the first-stage results are rescored by a
+                cross-encoder and both scores are shown.
+
+                Example:
+                {
+                    "query": "debug this",
+                    "n_results": 5,
+                    "similarity_threshold": 0.0
+                }""",
+                inputSchema={
+                    "type": "object",
+                    "properties": {
+                        "query": {"type": "string"},
+                        "n_results": {"type": "number", "default": 5},
+                        "similarity_threshold": {"type": "number", "default": 0.0},
+                        "rerank": {
+                            "type": "boolean",
+                            "default": False,
+                            "description": "Rerank over-fetched results with a cross-encoder"
+                        },
+                        "rerank_candidates": {
+                            "type": "number",
+                            "description": "First-stage results reranked, as a multiple of n_results"
                         },
-                        "required": ["start_date"]
+                        "rerank_budget_ms": {
+                            "type": "number",
+                            "description": "Time budget for reranking, after which first-stage order is returned"
+                        }
+                    },
+                    "required": ["query"]
+                }
+            ),
+            types.Tool(
+                name="exact_match_retrieve",
+                description="""Retrieve memories using exact content match.
+
+                Example:
+                {
+                    "content": "find exactly this"
+                }""",
+                inputSchema={
+                    "type": "object",
+                    "properties": {
+                        "content": {"type": "string"}
+                    },
+                    "required": ["content"]
+                }
+            ),
+            types.Tool(
+                name="check_database_health",
+                description="""Check database health and get statistics.
+
+                The default check is read-only and fast. Set full_check to also
+                write, query and delete a test document.""",
+                inputSchema={
+                    "type": "object",
+                    "properties": {
+                        "full_check": {
+                            "type": "boolean",
+                            "default": False,
+                            "description": "Run the write-probe check (embeds, adds, queries and deletes a test document)"
+                        }
                     }
-                ),
-                types.Tool(
-                    name="delete_before_date",
-                    description="""Delete memories before a specific date.
-                    Optional tag parameter to filter deletions.
-
-                    Example:
-                    {
-                        "before_date": "2024-01-01",
-                        "tag": "temporary"
-                    }""",
-                    inputSchema={
-                        "type": "object",
-                        "properties": {
-                            "before_date": {"type": "string", "format": "date"},
-                            "tag": {"type": "string"}
+                }
+            ),
+            types.Tool(
+                name="recall_by_timeframe",
+                description="""Retrieve memories within a specific timeframe.
+
+                Results are returned newest first, page_size at a time. Pass the
+                returned cursor to get the next page.
+
+                Example:
+                {
+                    "start_date": "2024-01-01",
+                    "end_date": "2024-01-31",
+                    "page_size": 5
+                }""",
+                inputSchema={
+                    "type": "object",
+                    "properties": {
+                        "start_date": {"type": "string", "format": "date"},
+                        "end_date": {"type": "string", "format": "date"},
+                        "n_results": {"type": "number", "default": 5},
+                        "page_size": {
+                            "type": "number",
+                            "description": "Memories per page (defaults to n_results)"
                         },
-                        "required": ["before_date"]
+                        "cursor": {
+                            "type": "string",
+                            "description": "Cursor returned with the previous page"
+                        }
+                    },
+                    "required": ["start_date"]
+                }
+            ),
+            types.Tool(
+                name="delete_by_timeframe",
+                description="""Delete memories within a specific timeframe.
+                Optional tag parameter to filter deletions.
+
+                Example:
+                {
+                    "start_date": "2024-01-01",
+                    "end_date": "2024-01-31",
+                    "tag": "temporary"
+                }""",
+                inputSchema={
+                    "type": "object",
+                    "properties": {
+                        "start_date": {"type": "string", "format": "date"},
+                        "end_date": {"type": "string", "format": "date"},
+                        "tag": {"type": "string"}
+                    },
+                    "required": ["start_date"]
+                }
+            ),
+            types.Tool(
+                name="delete_before_date",
+                description="""Delete memories before a specific date.
+                Optional tag parameter to filter deletions.
+
+                Example:
+                {
+                    "before_date": "2024-01-01",
+                    "tag": "temporary"
+                }""",
+                inputSchema={
+                    "type": "object",
+                    "properties": {
+                        "before_date": {"type": "string", "format": "date"},
+                        "tag": {"type": "string"}
+                    },
+                    "required": ["before_date"]
+                }
+            ),
+            types.Tool(
+                name="get_performance_stats",
+                description="""Get timing statistics of the tool calls since startup.
+
+                For each tool: number of calls, wall time (average, p50, p95,
+                max), average embedding and storage time, and response size.
+                Set reset to clear the statistics afterwards.""",
+                inputSchema={
+                    "type": "object",
+                    "properties": {
+                        "reset": {
+                            "type": "boolean",
+                            "default": False,
+                            "description": "Clear the statistics after reading them"
+                        }
                     }
-                )
-            ]
+                }
+            )
+        ]
+
+    def _build_tool_registry(self) -> Dict[str, RegisteredTool]:
+        """
+        Pair every advertised tool with the handler its calls are dispatched to.
         
-        @self.server.call_tool()
-        async def handle_call_tool(name: str, arguments: dict | None) -> List[types.TextContent]:
-            try:
-                logger.debug(f"Tool call received: {name} with arguments {arguments}")
-                if arguments is None:
-                    arguments = {}
-                
-                if name == "store_memory":
-                    return await self.handle_store_memory(arguments)
-                elif name == "retrieve_memory":
-                    return await self.handle_retrieve_memory(arguments)
-                elif name == "recall_memory":
-                    return await self.handle_recall_memory(arguments)
-                elif name == "search_by_tag":
-                    return await self.handle_search_by_tag(arguments)
-                elif name == "delete_memory":
-                    return await self.handle_delete_memory(arguments)
-                elif name == "delete_by_tag":
-                    return await self.handle_delete_by_tag(arguments)
-                elif name == "cleanup_duplicates":
-                    return await self.handle_cleanup_duplicates(arguments)
-                elif name == "get_embedding":
-                    return await self.handle_get_embedding(arguments)
-                elif name == "check_embedding_model":
-                    return await self.handle_check_embedding_model(arguments)
-                elif name == "debug_retrieve":
-                    return await self.handle_debug_retrieve(arguments)
-                elif name == "exact_match_retrieve":
-                    return await self.handle_exact_match_retrieve(arguments)
-                elif name == "check_database_health":
-                    return await self.handle_check_database_health(arguments)
-                else:
-                    raise ValueError(f"Unknown tool: {name}")
-            except Exception as e:
-                logger.error(f"Error in {name}: {str(e)}\n{traceback.format_exc()}")
-                return [types.TextContent(type="text", text=f"Error: {str(e)}")]
+        Raises if a schema has no handler or a handler no schema, so the tools
+        listed and the tools dispatched can't drift apart.
+        """
+        handlers = {
+            "store_memory": self.handle_store_memory,
+            "store_memories": self.handle_store_memories,
+            "recall_memory": self.handle_recall_memory,
+            "retrieve_memory": self.handle_retrieve_memory,
+            "search_by_tag": self.handle_search_by_tag,
+            "delete_memory": self.handle_delete_memory,
+            "delete_by_tag": self.handle_delete_by_tag,
+            "cleanup_duplicates": self.handle_cleanup_duplicates,
+            "get_embedding": self.handle_get_embedding,
+            "check_embedding_model": self.handle_check_embedding_model,
+            "debug_retrieve": self.handle_debug_retrieve,
+            "exact_match_retrieve": self.handle_exact_match_retrieve,
+            "check_database_health": self.handle_check_database_health,
+            "recall_by_timeframe": self.handle_recall_by_timeframe,
+            "delete_by_timeframe": self.handle_delete_by_timeframe,
+            "delete_before_date": self.handle_delete_before_date,
+            "get_performance_stats": self.handle_get_performance_stats
+        }
+        schemas = {tool.name: tool for tool in self._tool_schemas()}
+        if schemas.keys() != handlers.keys():
+            raise RuntimeError(
+                f"Tools without a handler: {sorted(schemas.keys() - handlers.keys())}, "
+                f"handlers without a schema: {sorted(handlers.keys() - schemas.keys())}"
+            )
+        return {name: RegisteredTool(tool, handlers[name]) for name, tool in schemas.items()}
 
-    async def validate_database_health(self):
-        """Validate database health during initialization."""
-        from .utils.db_utils import validate_database, repair_database
+    async def call_tool(self, registered: RegisteredTool, arguments: dict) -> List[types.TextContent]:
+        """
+        Run a tool's handler and record the call in self.tool_stats.
         
-        # Check database health
-        is_valid, message = await validate_database(self.storage)
-        if not is_valid:
-            logger.warning(f"Database validation failed: {message}")
-            
-            # Attempt repair
-            logger.info("Attempting database repair...")
-            repair_success, repair_message = await repair_database(self.storage)
-            
-            if not repair_success:
-                raise RuntimeError(f"Database repair failed: {repair_message}")
-            else:
-                logger.info(f"Database repair successful: {repair_message}")
+        Wall time, the time spent embedding and on the storage thread pool,
+        and the size of the response are recorded per tool, as are calls that
+        raised.
+        """
+        start_time = time.perf_counter()
+        response: List[types.TextContent] = []
+        error = True
+        with track_call() as timings:
+            try:
+                response = await registered.handler(arguments)
+                error = False
+                return response
+            finally:
+                self.tool_stats.record(
+                    registered.tool.name,
+                    time.perf_counter() - start_time,
+                    timings,
+                    sum(len(content.text.encode("utf-8")) for content in response if hasattr(content, "text")),
+                    error
+                )
+
+    def _build_memory(self, content: str, metadata: dict) -> Memory:
+        """Create a Memory object from store_memory style tool arguments."""
+        # Normalize tags to a list
+        tags = metadata.get("tags", "")
+        if isinstance(tags, str):
+            tags = [tag.strip() for tag in tags.split(",") if tag.strip()]
         else:
-            logger.info(f"Database validation successful: {message}")
+            tags = []  # If tags is not a string, default to empty list to be consistent with the Memory Model
+
+        sanitized_tags = self.storage.sanitized(tags)
+        
+        # Create memory object
+        content_hash = generate_content_hash(content, metadata)
+        return Memory(
+            content=content,
+            content_hash=content_hash,
+            tags=tags,  # keep as a list for easier use in other methods
+            memory_type=metadata.get("type"),
+            metadata = {**metadata, "tags":sanitized_tags}  # include the stringified tags in the meta data
+        )
+
+    def _filter_arguments(self, arguments: dict) -> Dict[str, Any]:
+        """Read the optional tags, match_all, memory_type and metadata search filter from tool arguments."""
+        tags = arguments.get("tags") or []
+        if isinstance(tags, str):
+            tags = [tag.strip() for tag in tags.split(",") if tag.strip()]
+        metadata = arguments.get("metadata") or {}
+        if not isinstance(metadata, dict):
+            raise ValueError("metadata filter must be an object")
+        return {
+            "tags": tags,
+            "match_all": bool(arguments.get("match_all", False)),
+            "memory_type": arguments.get("memory_type"),
+            "metadata": metadata
+        }
+
+    def _first_stage_size(self, arguments: dict, n_results: int) -> int:
+        """Number of results to fetch before the optional reranking stage."""
+        if not arguments.get("rerank"):
+            return n_results
+        return n_results * max(1, int(arguments.get("rerank_candidates") or RERANK_CANDIDATE_FACTOR))
+
+    async def _rerank(self, query: str, results: list, n_results: int, arguments: dict) -> Tuple[list, bool]:
+        """Rerank first-stage results with the cross-encoder within the call's time budget."""
+        budget_ms = arguments.get("rerank_budget_ms")
+        budget_ms = RERANK_BUDGET_MS if budget_ms is None else float(budget_ms)
+        return await self.storage.run_in_executor(
+            self.reranker.rerank, query, results, n_results, budget_ms / 1000
+        )
+
+    def _wants_json(self, arguments: dict) -> bool:
+        """Whether the call asked for a structured JSON response."""
+        response_format = arguments.get("format", "text")
+        if response_format not in ("text", "json"):
+            raise ValueError(f"Unknown response format {response_format!r}, expected text or json")
+        return response_format == "json"
+
+    def _json_response(
+        self,
+        arguments: dict,
+        scored: List[Tuple[Memory, Optional[float]]],
+        query: Optional[str] = None,
+        **extra: Any
+    ) -> List[types.TextContent]:
+        """Format (memory, score) pairs as a compact JSON response, see utils.response."""
+        fields = parse_fields(arguments.get("fields"))
+        max_content_length = int(arguments.get("max_content_length") or 0) or None
+        max_bytes = arguments.get("max_response_bytes")
+        max_bytes = JSON_RESPONSE_MAX_BYTES if max_bytes is None else int(max_bytes)
+        records = [
+            memory_record(memory, score, fields, query, max_content_length)
+            for memory, score in scored
+        ]
+        return [types.TextContent(type="text", text=structured_response(records, max_bytes, **extra))]
 
     async def handle_store_memory(self, arguments: dict) -> List[types.TextContent]:
         content = arguments.get("content")
@@ -574,24 +1002,7 @@ class MemoryServer:
             return [types.TextContent(type="text", text="Error: Content is required")]
         
         try:
-            # Normalize tags to a list
-            tags = metadata.get("tags", "")
-            if isinstance(tags, str):
-                tags = [tag.strip() for tag in tags.split(",") if tag.strip()]
-            else:
-                tags = []  # If tags is not a string, default to empty list to be consistent with the Memory Model
-
-            sanitized_tags = self.storage.sanitized(tags)
-            
-            # Create memory object
-            content_hash = generate_content_hash(content, metadata)
-            memory = Memory(
-                content=content,
-                content_hash=content_hash,
-                tags=tags,  # keep as a list for easier use in other methods
-                memory_type=metadata.get("type"),
-                metadata = {**metadata, "tags":sanitized_tags}  # include the stringified tags in the meta data
-            )
+            memory = self._build_memory(content, metadata)
             
             # Store memory
             success, message = await self.storage.store(memory)
@@ -600,6 +1011,41 @@ class MemoryServer:
             logger.error(f"Error storing memory: {str(e)}\n{traceback.format_exc()}")
             return [types.TextContent(type="text", text=f"Error storing memory: {str(e)}")]
     
+    async def handle_store_memories(self, arguments: dict) -> List[types.TextContent]:
+        items = arguments.get("memories", [])
+        
+        if not items:
+            return [types.TextContent(type="text", text="Error: Memories are required")]
+        
+        try:
+            # Build every memory first so invalid items fail individually
+            results: List[Optional[Tuple[bool, str]]] = [None] * len(items)
+            memories, positions = [], []
+            for i, item in enumerate(items):
+                content = item.get("content") if isinstance(item, dict) else None
+                if not content:
+                    results[i] = (False, "Error: Content is required")
+                    continue
+                try:
+                    memories.append(self._build_memory(content, item.get("metadata", {})))
+                    positions.append(i)
+                except Exception as e:
+                    results[i] = (False, f"Error storing memory: {str(e)}")
+            
+            if memories:
+                for position, result in zip(positions, await self.storage.store_batch(memories)):
+                    results[position] = result
+            
+            stored = sum(1 for success, _ in results if success)
+            lines = [f"Stored {stored} of {len(items)} memories:"]
+            for i, (success, message) in enumerate(results):
+                lines.append(f"{i+1}. {'OK' if success else 'FAILED'}: {message}")
+            
+            return [types.TextContent(type="text", text="\n".join(lines))]
+        except Exception as e:
+            logger.error(f"Error storing memories: {str(e)}\n{traceback.format_exc()}")
+            return [types.TextContent(type="text", text=f"Error storing memories: {str(e)}")]
+    
     async def handle_retrieve_memory(self, arguments: dict) -> List[types.TextContent]:
         query = arguments.get("query")
         n_results = arguments.get("n_results", 5)
@@ -608,7 +1054,20 @@ class MemoryServer:
             return [types.TextContent(type="text", text="Error: Query is required")]
         
         try:
-            results = await self.storage.retrieve(query, n_results)
+            results = await self.storage.retrieve(
+                query,
+                self._first_stage_size(arguments, n_results),
+                mode=arguments.get("mode", "semantic"),
+                **self._filter_arguments(arguments)
+            )
+            reranked = False
+            if arguments.get("rerank"):
+                results, reranked = await self._rerank(query, results, n_results, arguments)
+            
+            if self._wants_json(arguments):
+                return self._json_response(
+                    arguments, [(result.memory, result.relevance_score) for result in results], query, reranked=reranked
+                )
             
             if not results:
                 return [types.TextContent(type="text", text="No matching memories found")]
@@ -629,7 +1088,7 @@ class MemoryServer:
             
             return [types.TextContent(
                 type="text",
-                text="Found the following memories:\
+                text=f"Found the following memories{' (reranked)' if reranked else ''}:\
 \
 " + "\
 ".join(formatted_results)
@@ -641,12 +1100,17 @@ class MemoryServer:
 
     async def handle_search_by_tag(self, arguments: dict) -> List[types.TextContent]:
         tags = arguments.get("tags", [])
+        match_all = arguments.get("match_all", False)
         
         if not tags:
             return [types.TextContent(type="text", text="Error: Tags are required")]
         
         try:
-            memories = await self.storage.search_by_tag(tags)
+            memories = await self.storage.search_by_tag(tags, match_all=match_all)
+            
+            if self._wants_json(arguments):
+                # Snippets are taken around the sentences mentioning the tags
+                return self._json_response(arguments, [(memory, None) for memory in memories], " ".join(tags))
             
             if not memories:
                 return [types.TextContent(
@@ -686,7 +1150,17 @@ class MemoryServer:
         return [types.TextContent(type="text", text=message)]
 
     async def handle_cleanup_duplicates(self, arguments: dict) -> List[types.TextContent]:
-        count, message = await self.storage.cleanup_duplicates()
+        threshold = arguments.get("similarity_threshold")
+        if threshold is not None:
+            threshold = float(threshold)
+            if not MIN_DUPLICATE_SIMILARITY <= threshold <= 1:
+                return [types.TextContent(
+                    type="text",
+                    text=f"Error: similarity_threshold must be between {MIN_DUPLICATE_SIMILARITY} and 1"
+                )]
+        # Near-duplicate matches are fuzzy, so report them unless deletion is asked for explicitly
+        dry_run = bool(arguments.get("dry_run", threshold is not None))
+        count, message = await self.storage.cleanup_duplicates(similarity_threshold=threshold, dry_run=dry_run)
         return [types.TextContent(type="text", text=message)]
 
     async def handle_get_embedding(self, arguments: dict) -> List[types.TextContent]:
@@ -696,7 +1170,8 @@ class MemoryServer:
         
         try:
             from .utils.debug import get_raw_embedding
-            result = get_raw_embedding(self.storage, content)
+            await self.storage.wait_for_model()
+            result = await self.storage.run_in_executor(get_raw_embedding, self.storage, content)
             return [types.TextContent(
                 type="text",
                 text=f"Embedding results:\
@@ -708,7 +1183,8 @@ class MemoryServer:
     async def handle_check_embedding_model(self, arguments: dict) -> List[types.TextContent]:
         try:
             from .utils.debug import check_embedding_model
-            result = check_embedding_model(self.storage)
+            await self.storage.wait_for_model()
+            result = await self.storage.run_in_executor(check_embedding_model, self.storage)
             return [types.TextContent(
                 type="text",
                 text=f"Embedding model status:\
@@ -730,9 +1206,11 @@ class MemoryServer:
             results = await debug_retrieve_memory(
                 self.storage,
                 query,
-                n_results,
+                self._first_stage_size(arguments, n_results),
                 similarity_threshold
             )
+            if arguments.get("rerank"):
+                results, _ = await self._rerank(query, results, n_results, arguments)
             
             if not results:
                 return [types.TextContent(type="text", text="No matching memories found")]
@@ -747,6 +1225,9 @@ class MemoryServer:
                     f"Raw Distance: {result.debug_info['raw_distance']:.4f}",
                     f"Memory ID: {result.debug_info['memory_id']}"
                 ]
+                if "first_stage_rank" in result.debug_info:
+                    memory_info.append(f"Rerank Score: {result.relevance_score:.4f}")
+                    memory_info.append(f"First-stage Rank: {result.debug_info['first_stage_rank']}")
                 if result.memory.tags:
                     memory_info.append(f"Tags: {', '.join(result.memory.tags)}")
                 memory_info.append("---")
@@ -809,6 +1290,8 @@ class MemoryServer:
             return [types.TextContent(type="text", text="Error: Query is required")]
         
         try:
+            search_filter = self._filter_arguments(arguments)
+            
             # Parse natural language time expressions
             cleaned_query, (start_timestamp, end_timestamp) = extract_time_expression(query)
             
@@ -835,14 +1318,40 @@ class MemoryServer:
             # we should perform time-based retrieval only
             semantic_query = cleaned_query.strip() if cleaned_query.strip() else None
             
-            # Use the enhanced recall method from ChromaMemoryStorage that combines
-            # semantic search with time filtering, or just time filtering if no semantic query
-            results = await self.storage.recall(
-                query=semantic_query,
-                n_results=n_results,
-                start_timestamp=start_timestamp,
-                end_timestamp=end_timestamp
-            )
+            page_size = arguments.get("page_size")
+            cursor = arguments.get("cursor")
+            next_cursor = None
+            filtered = any(search_filter[key] for key in ("tags", "memory_type", "metadata"))
+            if semantic_query is None and not filtered and (page_size is not None or cursor):
+                # Time-only queries can be paged through newest first
+                results, next_cursor = await self.storage.recall_page(
+                    start_timestamp=start_timestamp,
+                    end_timestamp=end_timestamp,
+                    page_size=int(page_size or n_results),
+                    cursor=cursor
+                )
+            else:
+                # Use the enhanced recall method from ChromaMemoryStorage that combines
+                # semantic search with time filtering, or just time filtering if no semantic query
+                results = await self.storage.recall(
+                    query=semantic_query,
+                    n_results=n_results,
+                    start_timestamp=start_timestamp,
+                    end_timestamp=end_timestamp,
+                    **search_filter
+                )
+            
+            if self._wants_json(arguments):
+                extra = {}
+                if start_timestamp is not None:
+                    extra["start"] = datetime.fromtimestamp(start_timestamp).isoformat(timespec="seconds")
+                if end_timestamp is not None:
+                    extra["end"] = datetime.fromtimestamp(end_timestamp).isoformat(timespec="seconds")
+                if next_cursor:
+                    extra["next_cursor"] = next_cursor
+                return self._json_response(
+                    arguments, [(result.memory, result.relevance_score) for result in results], semantic_query, **extra
+                )
             
             if not results:
                 no_results_msg = f"No memories found{time_range_str}"
@@ -880,10 +1389,10 @@ class MemoryServer:
             
             # Include time range in response if available
             found_msg = f"Found {len(results)} memories{time_range_str}:"
-            return [types.TextContent(
-                type="text",
-                text=f"{found_msg}\n\n" + "\n".join(formatted_results)
-            )]
+            text = f"{found_msg}\n\n" + "\n".join(formatted_results)
+            if next_cursor:
+                text += f"\nNext cursor: {next_cursor}"
+            return [types.TextContent(type="text", text=text)]
             
         except Exception as e:
             logger.error(f"Error in recall_memory: {str(e)}\n{traceback.format_exc()}")
@@ -895,18 +1404,26 @@ class MemoryServer:
         
         try:
             # Get validation status
-            is_valid, message = await validate_database(self.storage)
+            full_check = bool(arguments.get("full_check", False))
+            is_valid, message = await validate_database(self.storage, full_check=full_check)
             
-            # Get database stats
-            stats = get_database_stats(self.storage)
+            # Get database stats; counting and a stale snapshot's size walk block
+            stats = await self.storage.run_in_executor(get_database_stats, self.storage)
             
             # Combine results
             result = {
                 "validation": {
                     "status": "healthy" if is_valid else "unhealthy",
+                    "mode": "full" if full_check else "fast",
                     "message": message
                 },
-                "statistics": stats
+                "statistics": stats,
+                "reranker": {
+                    "model": self.reranker.model_name,
+                    "loaded": self.reranker.model is not None,
+                    "load_error": self.reranker.load_error,
+                    "score_cache": self.reranker.score_cache.stats()
+                }
             }
             
             return [types.TextContent(
@@ -919,6 +1436,16 @@ class MemoryServer:
                 text=f"Error checking database health: {str(e)}"
             )]
 
+    async def handle_get_performance_stats(self, arguments: dict) -> List[types.TextContent]:
+        """Report the per-tool call timings collected by call_tool."""
+        result = self.tool_stats.snapshot()
+        if arguments.get("reset"):
+            self.tool_stats.reset()
+        return [types.TextContent(
+            type="text",
+            text=f"Tool Performance Statistics:\n{json.dumps(result, indent=2)}"
+        )]
+
     async def handle_recall_by_timeframe(self, arguments: dict) -> List[types.TextContent]:
         """Handle recall by timeframe requests."""
         from datetime import datetime
@@ -926,35 +1453,41 @@ class MemoryServer:
         try:
             start_date = datetime.fromisoformat(arguments["start_date"]).date()
             end_date = datetime.fromisoformat(arguments.get("end_date", arguments["start_date"])).date()
-            n_results = arguments.get("n_results", 5)
+            page_size = int(arguments.get("page_size") or arguments.get("n_results", 5))
             
             # Get timestamp range
             start_timestamp = datetime(start_date.year, start_date.month, start_date.day).timestamp()
             end_timestamp = datetime(end_date.year, end_date.month, end_date.day, 23, 59, 59).timestamp()
             
-            # Retrieve memories
-            results = await self.storage.recall(n_results, start_timestamp, end_timestamp)
+            # Retrieve one page of memories, newest first
+            results, next_cursor = await self.storage.recall_page(
+                start_timestamp=start_timestamp,
+                end_timestamp=end_timestamp,
+                page_size=page_size,
+                cursor=arguments.get("cursor")
+            )
             
             if not results:
                 return [types.TextContent(type="text", text="No memories found in timeframe")]
             
             formatted_results = []
             for i, result in enumerate(results):
+                memory_dt = datetime.fromtimestamp(float(result.memory.timestamp))
                 memory_info = [
                     f"Memory {i+1}:",
+                    f"Timestamp: {memory_dt.strftime('%Y-%m-%d %H:%M:%S')}",
                     f"Content: {result.memory.content}",
-                    f"Hash: {result.memory.content_hash}",
-                    f"Relevance Score: {result.similarity:.2f}"
+                    f"Hash: {result.memory.content_hash}"
                 ]
                 if result.memory.tags:
                     memory_info.append(f"Tags: {', '.join(result.memory.tags)}")
                 memory_info.append("---")
                 formatted_results.append("\n".join(memory_info))
             
-            return [types.TextContent(
-                type="text",
-                text=f"Found {len(results)} memories:\n\n" + "\n".join(formatted_results)
-            )]
+            text = f"Found {len(results)} memories:\n\n" + "\n".join(formatted_results)
+            if next_cursor:
+                text += f"\nNext cursor: {next_cursor}"
+            return [types.TextContent(type="text", text=text)]
             
         except Exception as e:
             return [types.TextContent(
@@ -972,10 +1505,7 @@ class MemoryServer:
             tag = arguments.get("tag")
             
             count, message = await self.storage.delete_by_timeframe(start_date, end_date, tag)
-            return [types.TextContent(
-                type="text",
-                text=f"Deleted {count} memories: {message}"
-            )]
+            return [types.TextContent(type="text", text=message)]
             
         except Exception as e:
             return [types.TextContent(
@@ -992,10 +1522,7 @@ class MemoryServer:
             tag = arguments.get("tag")
             
             count, message = await self.storage.delete_before_date(before_date, tag)
-            return [types.TextContent(
-                type="text",
-                text=f"Deleted {count} memories: {message}"
-            )]
+            return [types.TextContent(type="text", text=message)]
             
         except Exception as e:
             return [types.TextContent(
@@ -1018,6 +1545,12 @@ def parse_args():
         default=CHROMA_PATH,
         help="Path to ChromaDB storage"
     )
+    parser.add_argument(
+        "--lazy-model-loading",
+        action="store_true",
+        default=LAZY_MODEL_LOADING,
+        help="Load the embedding model in the background and answer non-embedding requests immediately"
+    )
     return parser.parse_args()
 
 async def async_main():
@@ -1027,8 +1560,8 @@ async def async_main():
         logging.getLogger().setLevel(logging.DEBUG)
         logger.debug("Debug logging enabled")
     
-    global CHROMA_PATH
-    CHROMA_PATH = args.chroma_path
+    # --chroma-path only applies to the ChromaDB backend
+    storage_path = args.chroma_path if STORAGE_BACKEND == 'chroma' else STORAGE_PATH
     
     # Print system diagnostics to console
     system_info = get_system_info()
@@ -1039,14 +1572,15 @@ async def async_main():
     print(f"Memory: {system_info.memory_gb:.2f} GB", file=sys.stderr, flush=True)
     print(f"Optimal Model: {system_info.get_optimal_model()}", file=sys.stderr, flush=True)
     print(f"Optimal Batch Size: {system_info.get_optimal_batch_size()}", file=sys.stderr, flush=True)
-    print(f"ChromaDB Path: {CHROMA_PATH}", file=sys.stderr, flush=True)
+    print(f"Storage Backend: {STORAGE_BACKEND}", file=sys.stderr, flush=True)
+    print(f"Storage Path: {storage_path}", file=sys.stderr, flush=True)
     print("================================================\n", file=sys.stderr, flush=True)
     
-    logger.info(f"Starting MCP Memory Service with ChromaDB path: {CHROMA_PATH}")
+    logger.info(f"Starting MCP Memory Service with {STORAGE_BACKEND} storage path: {storage_path}")
     
     try:
         # Create server instance with hardware-aware configuration
-        memory_server = MemoryServer()
+        memory_server = MemoryServer(lazy_model_loading=args.lazy_model_loading, storage_path=storage_path)
         
         # Set up async initialization with timeout and retry logic
         max_retries = 2
@@ -1,4 +1,26 @@
 from .base import MemoryStorage
-from .chroma import ChromaMemoryStorage
 
-__all__ = ['MemoryStorage', 'ChromaMemoryStorage']
\ No newline at end of file
+__all__ = ['MemoryStorage', 'ChromaMemoryStorage', 'SQLiteMemoryStorage', 'create_storage']
+
+# Backends are imported on first use, so the sqlite backend never imports ChromaDB
+_BACKENDS = {
+    'chroma': ('.chroma', 'ChromaMemoryStorage'),
+    'sqlite': ('.sqlite', 'SQLiteMemoryStorage')
+}
+
+
+def __getattr__(name):
+    for module, class_name in _BACKENDS.values():
+        if name == class_name:
+            from importlib import import_module
+            return getattr(import_module(module, __name__), class_name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def create_storage(backend: str, path: str, **kwargs) -> MemoryStorage:
+    """Create the storage backend named backend ("chroma" or "sqlite") at path."""
+    if backend not in _BACKENDS:
+        raise ValueError(f"Unknown storage backend: {backend}")
+    module, class_name = _BACKENDS[backend]
+    from importlib import import_module
+    return getattr(import_module(module, __name__), class_name)(path, **kwargs)
@@ -15,14 +15,30 @@ class MemoryStorage(ABC):
         """Store a memory. Returns (success, message)."""
         pass
     
+    async def store_batch(self, memories: List[Memory]) -> List[Tuple[bool, str]]:
+        """Store several memories. Returns a (success, message) result per memory, in order."""
+        return [await self.store(memory) for memory in memories]
+    
     @abstractmethod
-    async def retrieve(self, query: str, n_results: int = 5) -> List[MemoryQueryResult]:
-        """Retrieve memories by semantic search."""
+    async def retrieve(
+        self,
+        query: str,
+        n_results: int = 5,
+        tags: Optional[List[str]] = None,
+        match_all: bool = False,
+        memory_type: Optional[str] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+        mode: str = "semantic"
+    ) -> List[MemoryQueryResult]:
+        """
+        Retrieve memories by semantic, lexical (BM25) or hybrid search, optionally
+        only among memories passing a tag, type or metadata filter.
+        """
         pass
     
     @abstractmethod
-    async def search_by_tag(self, tags: List[str]) -> List[Memory]:
-        """Search memories by tags."""
+    async def search_by_tag(self, tags: List[str], match_all: bool = False) -> List[Memory]:
+        """Search memories by tags. Matches ANY tag, or ALL tags when match_all is True."""
         pass
     
     @abstractmethod
@@ -36,6 +52,16 @@ class MemoryStorage(ABC):
         pass
     
     @abstractmethod
-    async def cleanup_duplicates(self) -> Tuple[int, str]:
-        """Remove duplicate memories. Returns (count_removed, message)."""
+    async def cleanup_duplicates(
+        self,
+        similarity_threshold: Optional[float] = None,
+        dry_run: bool = False
+    ) -> Tuple[int, str]:
+        """
+        Remove duplicate memories. Returns (count_removed, message).
+        
+        With similarity_threshold, near-duplicates (cosine similarity of their
+        embeddings at or above it) are removed as well. With dry_run, nothing is
+        deleted and count_removed is what would have been removed.
+        """
         pass
\ No newline at end of file
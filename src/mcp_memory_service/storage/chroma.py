@@ -4,54 +4,68 @@ Copyright (c) 2024 Heinrich Krupp
 Licensed under the MIT License. See LICENSE file in the project root for full license text.
 """
 
-from mcp_memory_service.models.memory import Memory
-
 import chromadb
-import json
 import sys
 import os
 import time
 import traceback
-from chromadb.utils import embedding_functions
-from sentence_transformers import SentenceTransformer
 import logging
-from typing import List, Dict, Any, Tuple, Set, Optional
-from datetime import datetime, date
-
-from .base import MemoryStorage
+import numpy as np
+from typing import List, Dict, Any, Tuple, Set, Optional, Callable, Iterator, Sequence
+
+from .indexed import IndexedMemoryStorage, MemoryRow
+from ..config import (
+    LAZY_MODEL_LOADING,
+    TIME_FILTER_BRUTE_FORCE_LIMIT,
+    FILTER_OVERFETCH_FACTOR,
+    SCAN_BATCH_SIZE,
+    STATS_REFRESH_INTERVAL
+)
+from .embeddings import (
+    DeferredEmbeddingFunction,
+    load_embedding_model
+)
+from .index import MemoryIndex
+from .common import (
+    parse_timestamp,
+    index_entry,
+    group_near_duplicates,
+    oldest_first,
+    memory_from_metadata,
+    memories_from_rows,
+    query_results_from_rows,
+    sync_tag_keys,
+    combine_conditions,
+    time_conditions,
+    MemoryFilter
+)
+from .stats import StorageStats
 from ..models.memory import Memory, MemoryQueryResult
+from ..utils.performance import timed
 from ..utils.hashing import generate_content_hash
+from ..utils.similarity import normalize_rows, find_similar_pairs, cluster_pairs
 from ..utils.system_detection import (
     get_system_info,
-    get_optimal_embedding_settings,
-    get_torch_device,
-    print_system_diagnostics,
     AcceleratorType
 )
-import mcp.types as types
 
 logger = logging.getLogger(__name__)
 
-# List of models to try in order of preference
-# From most capable to least capable
-MODEL_FALLBACKS = [
-    'all-mpnet-base-v2',      # High quality, larger model
-    'all-MiniLM-L6-v2',       # Good balance of quality and size
-    'paraphrase-MiniLM-L6-v2', # Alternative with similar size
-    'paraphrase-MiniLM-L3-v2', # Smaller model for constrained environments
-    'paraphrase-albert-small-v2' # Smallest model, last resort
-]
-
-class ChromaMemoryStorage(MemoryStorage):
-    def __init__(self, path: str):
-        """Initialize ChromaDB storage with hardware-aware embedding function."""
-        self.path = path
-        self.model = None
-        self.embedding_function = None
+class ChromaMemoryStorage(IndexedMemoryStorage):
+    def __init__(self, path: str, lazy_model_loading: bool = LAZY_MODEL_LOADING):
+        """
+        Initialize ChromaDB storage with hardware-aware embedding function.
+        
+        Args:
+            path: Directory holding the ChromaDB data and the side index.
+            lazy_model_loading: Load the embedding model on the storage thread pool
+                instead of blocking here. Embedding-dependent calls wait for it
+                through wait_for_model().
+        """
+        super().__init__(path)
         self.client = None
         self.collection = None
         self.system_info = get_system_info()
-        self.embedding_settings = get_optimal_embedding_settings()
         
         # Log system information
         logger.info(f"Detected system: {self.system_info.os_name} {self.system_info.architecture}")
@@ -72,7 +86,7 @@ class ChromaMemoryStorage(MemoryStorage):
         
         try:
             # Initialize with hardware-aware settings
-            self._initialize_embedding_model()
+            self._start_model_loading(lazy_model_loading)
             
             # Initialize ChromaDB with new client format
             logger.info(f"Initializing ChromaDB client at path: {path}")
@@ -85,9 +99,24 @@ class ChromaMemoryStorage(MemoryStorage):
             self.collection = self.client.get_or_create_collection(
                 name="memory_collection",
                 metadata={"hnsw:space": "cosine"},
-                embedding_function=self.embedding_function
+                embedding_function=(
+                    DeferredEmbeddingFunction(self._resolve_embedding_function)
+                    if lazy_model_loading else self.embedding_function
+                )
             )
             logger.info("Collection initialized successfully")
+            
+            # Open the tag index and populate it once for existing databases
+            self.index = MemoryIndex(path)
+            if self.index.get_meta("ids_migrated") != "1":
+                self.migrate_legacy_ids()
+            if self.index.get_meta("timestamps_migrated") != "1":
+                self.migrate_timestamps()
+            if self.index.get_meta("tag_keys_migrated") != "1":
+                self.migrate_tag_keys()
+            if not self.index.is_built():
+                self.rebuild_index()
+            self.stats = StorageStats(path, self.index, STATS_REFRESH_INTERVAL)
         except Exception as e:
             logger.error(f"Error initializing ChromaDB: {str(e)}")
             logger.error(traceback.format_exc())
@@ -97,67 +126,11 @@ class ChromaMemoryStorage(MemoryStorage):
     
     def _initialize_embedding_model(self):
         """Initialize the embedding model with fallbacks for different hardware."""
-        # Start with the optimal model for this system
-        preferred_model = self.embedding_settings["model_name"]
-        device = self.embedding_settings["device"]
-        batch_size = self.embedding_settings["batch_size"]
-        
-        # Try the preferred model first, then fall back to alternatives
-        models_to_try = [preferred_model] + [m for m in MODEL_FALLBACKS if m != preferred_model]
-        
-        for model_name in models_to_try:
-            try:
-                logger.info(f"Attempting to load model: {model_name} on {device}")
-                start_time = time.time()
-                
-                # Try to initialize the model with the current settings
-                self.model = SentenceTransformer(
-                    model_name,
-                    device=device
-                )
-                
-                # Set batch size based on available resources
-                self.model.max_seq_length = 384  # Default max sequence length
-                
-                # Test the model with a simple encoding
-                _ = self.model.encode("Test encoding", batch_size=batch_size)
-                
-                load_time = time.time() - start_time
-                logger.info(f"Successfully loaded model {model_name} in {load_time:.2f}s")
-                
-                # Create embedding function for ChromaDB
-                self.embedding_function = embedding_functions.SentenceTransformerEmbeddingFunction(
-                    model_name=model_name,
-                    device=device
-                )
-                
-                logger.info(f"Embedding function initialized with model {model_name}")
-                return
-                
-            except Exception as e:
-                logger.warning(f"Failed to initialize model {model_name} on {device}: {str(e)}")
-                
-                # If we're not on CPU already, try falling back to CPU
-                if device != "cpu":
-                    try:
-                        logger.info(f"Falling back to CPU for model: {model_name}")
-                        self.model = SentenceTransformer(model_name, device="cpu")
-                        _ = self.model.encode("Test encoding", batch_size=max(1, batch_size // 2))
-                        
-                        # Update settings to reflect CPU usage
-                        self.embedding_settings["device"] = "cpu"
-                        self.embedding_settings["batch_size"] = max(1, batch_size // 2)
-                        
-                        # Create embedding function
-                        self.embedding_function = embedding_functions.SentenceTransformerEmbeddingFunction(
-                            model_name=model_name,
-                            device="cpu"
-                        )
-                        
-                        logger.info(f"Successfully loaded model {model_name} on CPU")
-                        return
-                    except Exception as cpu_e:
-                        logger.warning(f"Failed to initialize model {model_name} on CPU: {str(cpu_e)}")
+        self.model = load_embedding_model(self.embedding_settings, self._load_sentence_transformer)
+        if self.model is not None:
+            # Share the loaded model between direct encode calls and ChromaDB
+            self.embedding_function = self.model
+            return
         
         # If we've tried all models and none worked, raise an exception
         error_msg = "Failed to initialize any embedding model. Service may not function correctly."
@@ -181,499 +154,443 @@ class ChromaMemoryStorage(MemoryStorage):
         except Exception as e:
             logger.error(f"Failed to create minimal embedding function: {str(e)}")
 
-    def sanitized(self, tags):
-        if tags is None:
-            return json.dumps([])
-        
-        # If we get a string, split it into an array
-        if isinstance(tags, str):
-            tags = [tag.strip() for tag in tags.split(",") if tag.strip()]
-        # If we get an array, use it directly
-        elif isinstance(tags, list):
-            tags = [str(tag).strip() for tag in tags if str(tag).strip()]
-        else:
-            return json.dumps([])
-                
-        # Return JSON string representation of the array
-        return json.dumps(tags)
+    def _resolve_embedding_function(self) -> Callable:
+        """Block until the model is loaded and return the real embedding function."""
+        if self._model_future is not None:
+            self._model_future.result()
+        return self.embedding_function
+
+    def _embed_documents(self, documents: List[str]) -> Any:
+        """Embed documents in one batched forward pass, with the last-resort function if no model loaded."""
+        with timed("embedding"):
+            if self.model is not None:
+                return self.model.encode(
+                    documents,
+                    batch_size=self.embedding_settings["batch_size"],
+                    convert_to_numpy=True
+                ).tolist()
+            return self.embedding_function(documents)
+
+    async def _query_arguments(self, query: str) -> Dict[str, Any]:
+        """Build the query_embeddings (or query_texts) arguments for collection.query."""
+        await self.wait_for_model()
+        if self.model is None:
+            # Only the last-resort embedding function is available, let ChromaDB call it
+            return {"query_texts": [query]}
+        embedding = await self.run_in_executor(self.embed_query, query)
+        return {"query_embeddings": [embedding.tolist()]}
+
+    def _unavailable_reason(self) -> Optional[str]:
+        """Requests fail while the ChromaDB collection could not be opened."""
+        return "Collection not initialized" if self.collection is None else None
+
+    def _existing(self, content_hashes: Sequence[str]) -> Set[str]:
+        """Return the subset of content_hashes stored in the collection, with one ID lookup."""
+        return set(self.collection.get(ids=list(content_hashes), include=[])["ids"])
+
+    def _write(self, rows: List[MemoryRow], embeddings: List[List[float]]):
+        """Add (content_hash, content, metadata) rows with their embeddings to the collection and the side index."""
+        self.collection.add(
+            ids=[content_hash for content_hash, _, _ in rows],
+            documents=[content for _, content, _ in rows],
+            metadatas=[metadata for _, _, metadata in rows],
+            embeddings=embeddings
+        )
+        self.index.add_many([index_entry(content_hash, metadata, content) for content_hash, content, metadata in rows])
+
+    def _remove(self, memory_ids: List[str]):
+        """Delete memories from the collection and the side index."""
+        self.collection.delete(ids=memory_ids)
+        self.index.remove(memory_ids)
+
+    def iter_memories(
+        self,
+        batch_size: int = SCAN_BATCH_SIZE,
+        include: Sequence[str] = ("metadatas",)
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Yield the whole collection one page at a time.
+        
+        Each page is a collection.get() result with at most batch_size rows,
+        read with limit/offset so only one page is held in memory. Callers must
+        not add or delete rows while iterating, as that shifts the offsets;
+        collect the IDs and write once the scan is done. Updating metadata in
+        place is safe.
+        """
+        offset = 0
+        while True:
+            page = self.collection.get(limit=batch_size, offset=offset, include=list(include))
+            if not page["ids"]:
+                return
+            yield page
+            if len(page["ids"]) < batch_size:
+                return
+            offset += batch_size
 
-    async def store(self, memory: Memory) -> Tuple[bool, str]:
-        """Store a memory with proper embedding handling."""
-        try:
-            # Check if collection is initialized
-            if self.collection is None:
-                error_msg = "Collection not initialized, cannot store memory"
-                logger.error(error_msg)
-                return False, error_msg
-                
-            # Check for duplicates
-            existing = self.collection.get(
-                where={"content_hash": memory.content_hash}
-            )
-            if existing["ids"]:
-                return False, "Duplicate content detected"
-            
-            # Format metadata properly
-            metadata = self._format_metadata_for_chroma(memory)
-            
-            # Add additional metadata
-            metadata.update(memory.metadata)
+    def rebuild_index(self):
+        """Rebuild the tag, timestamp and keyword index from the ChromaDB collection."""
+        logger.info("Building tag index from collection...")
+        start_time = time.time()
+        count = 0
 
-            # Generate ID based on content hash
-            memory_id = memory.content_hash
-            
-            # Add to collection - embedding will be automatically generated
-            self.collection.add(
-                documents=[memory.content],
-                metadatas=[metadata],
-                ids=[memory_id]
-            )
-            
-            return True, f"Successfully stored memory with ID: {memory_id}"
-            
-        except Exception as e:
-            error_msg = f"Error storing memory: {str(e)}"
-            logger.error(error_msg)
-            return False, error_msg
+        def entries():
+            nonlocal count
+            for page in self.iter_memories(include=("metadatas", "documents")):
+                count += len(page["ids"])
+                for memory_id, metadata, document in zip(page["ids"], page["metadatas"], page["documents"]):
+                    yield index_entry(memory_id, metadata or {}, document)
 
-    async def search_by_tag(self, tags: List[str]) -> List[Memory]:
-        try:
-            results = self.collection.get(
-                include=["metadatas", "documents"]
-            )
+        self.index.rebuild(entries())
+        logger.info(f"Indexed tags for {count} memories in {time.time() - start_time:.2f}s")
 
-            memories = []
-            if results["ids"]:
-                for i, doc in enumerate(results["documents"]):
-                    memory_meta = results["metadatas"][i]
-                    
-                    # Always expect JSON string in storage
-                    try:
-                        stored_tags = json.loads(memory_meta.get("tags", "[]"))
-                        stored_tags = [str(tag).strip() for tag in stored_tags]
-                    except (json.JSONDecodeError, TypeError):
-                        logger.debug(f"Invalid tags format in memory: {memory_meta.get('content_hash')}")
+    def migrate_legacy_ids(self) -> int:
+        """
+        Rewrite rows whose ChromaDB ID is not their content hash.
+        
+        Older databases may contain IDs that differ from the content hash, which
+        breaks the ID-based lookups used by store and delete. Affected rows are
+        re-added under their hash (keeping their embeddings) and the old rows are
+        removed. Returns the number of rows migrated.
+        """
+        legacy_ids = [
+            memory_id
+            for page in self.iter_memories()
+            for memory_id, metadata in zip(page["ids"], page["metadatas"])
+            if (metadata or {}).get("content_hash") != memory_id
+        ]
+        
+        if legacy_ids:
+            logger.info(f"Migrating {len(legacy_ids)} memories to content-hash IDs...")
+            migrated: Set[str] = set()
+            for offset in range(0, len(legacy_ids), SCAN_BATCH_SIZE):
+                legacy = self.collection.get(
+                    ids=legacy_ids[offset:offset + SCAN_BATCH_SIZE],
+                    include=["metadatas", "documents", "embeddings"]
+                )
+                hashes = []
+                for i, document in enumerate(legacy["documents"]):
+                    metadata = dict(legacy["metadatas"][i] or {})
+                    metadata["content_hash"] = metadata.get("content_hash") or generate_content_hash(
+                        document, metadata
+                    )
+                    legacy["metadatas"][i] = metadata
+                    hashes.append(metadata["content_hash"])
+                existing_ids = set(self.collection.get(ids=hashes, include=[])["ids"])
+                
+                new_ids, documents, metadatas, embeddings = [], [], [], []
+                for i, content_hash in enumerate(hashes):
+                    # A row already stored under this hash makes the legacy row a duplicate
+                    if content_hash in existing_ids or content_hash in migrated:
                         continue
-                    
-                    # Normalize search tags
-                    search_tags = [str(tag).strip() for tag in tags if str(tag).strip()]
-                    
-                    if any(search_tag in stored_tags for search_tag in search_tags):
-                        memory = Memory(
-                            content=doc,
-                            content_hash=memory_meta["content_hash"],
-                            tags=stored_tags,
-                            memory_type=memory_meta.get("type")
-                        )
-                        memories.append(memory)
-            
-            return memories
-            
-        except Exception as e:
-            logger.error(f"Error searching by tags: {e}")
-            return []
-
-    async def delete_by_tag(self, tag: str) -> Tuple[int, str]:
-        """Deletes memories that match the specified tag."""
-        try:
-            # Get all the documents from ChromaDB
-            results = self.collection.get(
-                include=["metadatas"]
-            )
-
-            ids_to_delete = []
-            if results["ids"]:
-                for i, meta in enumerate(results["metadatas"]):
-                    try:
-                        retrieved_tags_string = meta.get("tags", "[]")
-                        retrieved_tags = json.loads(retrieved_tags_string)
-                    except json.JSONDecodeError:
-                        retrieved_tags = []
-
-                    if tag in retrieved_tags:
-                        ids_to_delete.append(results["ids"][i])
-
-            if not ids_to_delete:
-                return 0, f"No memories found with tag: {tag}"
+                    migrated.add(content_hash)
+                    new_ids.append(content_hash)
+                    documents.append(legacy["documents"][i])
+                    metadatas.append(legacy["metadatas"][i])
+                    embeddings.append(legacy["embeddings"][i])
+                
+                if new_ids:
+                    self.collection.add(
+                        ids=new_ids,
+                        documents=documents,
+                        metadatas=metadatas,
+                        embeddings=embeddings
+                    )
+                self.collection.delete(ids=legacy["ids"])
+            # Tag index entries point at the old IDs, so rebuild it
+            self.index.set_meta("built", "0")
+            logger.info(f"Migrated {len(migrated)} memories, dropped {len(legacy_ids) - len(migrated)} duplicates")
+        
+        self.index.set_meta("ids_migrated", "1")
+        return len(legacy_ids)
 
-            # Delete memories
-            self.collection.delete(ids=ids_to_delete)
+    def migrate_timestamps(self) -> int:
+        """
+        Convert timestamps stored as strings into floats.
+        
+        Older versions wrote str(timestamp) into the metadata, which ChromaDB's
+        $gte/$lte range filters cannot compare numerically. Returns the number of
+        rows converted.
+        """
+        converted = 0
+        for page in self.iter_memories():
+            ids, metadatas = [], []
+            for memory_id, metadata in zip(page["ids"], page["metadatas"]):
+                if metadata and isinstance(metadata.get("timestamp"), str):
+                    timestamp = parse_timestamp(metadata)
+                    if timestamp is None:
+                        continue
+                    ids.append(memory_id)
+                    metadatas.append({**metadata, "timestamp": timestamp})
+            if ids:
+                self.collection.update(ids=ids, metadatas=metadatas)
+                converted += len(ids)
+        
+        if converted:
+            logger.info(f"Converted {converted} string timestamps to numbers")
+        
+        self.index.set_meta("timestamps_migrated", "1")
+        return converted
 
-            return len(ids_to_delete), f"Successfully deleted {len(ids_to_delete)} memories with tag: {tag}"
+    def migrate_tag_keys(self) -> int:
+        """
+        Add the boolean "tag:<name>" metadata keys that tag filters query.
+        
+        Older versions only stored the JSON-encoded tags string, which ChromaDB
+        cannot filter on. Returns the number of rows updated.
+        """
+        updated = 0
+        for page in self.iter_memories():
+            ids, metadatas = [], []
+            for memory_id, metadata in zip(page["ids"], page["metadatas"]):
+                synced = sync_tag_keys(metadata or {})
+                if synced is not None:
+                    ids.append(memory_id)
+                    metadatas.append(synced)
+            if ids:
+                self.collection.update(ids=ids, metadatas=metadatas)
+                updated += len(ids)
+        
+        if updated:
+            logger.info(f"Added tag keys to {updated} memories")
+        
+        self.index.set_meta("tag_keys_migrated", "1")
+        return updated
 
-        except Exception as e:
-            logger.error(f"Error deleting memories by tag: {e}")
-            return 0, f"Error deleting memories by tag: {e}"
-      
-    async def delete(self, content_hash: str) -> Tuple[bool, str]:
-        """Delete a memory by its hash."""
-        try:
-            # First check if the memory exists
-            existing = self.collection.get(
-                where={"content_hash": content_hash}
-            )
-            
-            if not existing["ids"]:
-                return False, f"No memory found with hash {content_hash}"
+    async def _cleanup_exact_duplicates(self, dry_run: bool) -> Tuple[int, str]:
+        """
+        Remove rows stored under another ID than their content hash whose hash is already stored.
+        
+        IDs are unique and normally equal the content hash, so only rows stored
+        under some other ID can be duplicates. Tracking just those keeps memory
+        flat however large the collection is.
+        """
+        seen_hashes: Set[str] = set()
+        duplicates = []
+        scanned = 0
+        
+        async for page in self.aiter_memories():
+            scanned += len(page["ids"])
+            hashes = [metadata.get("content_hash") for metadata in page["metadatas"]]
+            missing = [page["ids"][i] for i, content_hash in enumerate(hashes) if not content_hash]
+            if missing:
+                # Generate hash if missing
+                documents = await self.run_in_executor(
+                    self.collection.get, ids=missing, include=["documents"]
+                )
+                documents = dict(zip(documents["ids"], documents["documents"]))
+                hashes = [
+                    content_hash or generate_content_hash(documents[page["ids"][i]], page["metadatas"][i])
+                    for i, content_hash in enumerate(hashes)
+                ]
             
-            # Delete the memory
-            self.collection.delete(
-                where={"content_hash": content_hash}
+            candidates = [
+                (memory_id, content_hash)
+                for memory_id, content_hash in zip(page["ids"], hashes)
+                if content_hash != memory_id
+            ]
+            if not candidates:
+                continue
+            stored = await self.run_in_executor(
+                self._existing, list({content_hash for _, content_hash in candidates})
             )
-            
-            return True, f"Successfully deleted memory with hash {content_hash}"
-        except Exception as e:
-            logger.error(f"Error deleting memory: {str(e)}")
-            return False, f"Error deleting memory: {str(e)}"
-
-    async def cleanup_duplicates(self) -> Tuple[int, str]:
-        """Remove duplicate memories based on content hash."""
-        try:
-            # Get all memories
-            results = self.collection.get()
-            
-            if not results["ids"]:
-                return 0, "No memories found in database"
-            
-            # Track seen hashes and duplicates
-            seen_hashes: Set[str] = set()
-            duplicates = []
-            
-            for i, metadata in enumerate(results["metadatas"]):
-                content_hash = metadata.get("content_hash")
-                if not content_hash:
-                    # Generate hash if missing
-                    content_hash = generate_content_hash(results["documents"][i], metadata)
-                
-                if content_hash in seen_hashes:
-                    duplicates.append(results["ids"][i])
+            for memory_id, content_hash in candidates:
+                if content_hash in stored or content_hash in seen_hashes:
+                    duplicates.append(memory_id)
                 else:
                     seen_hashes.add(content_hash)
-            
-            # Delete duplicates if found
-            if duplicates:
-                self.collection.delete(
-                    ids=duplicates
-                )
-                return len(duplicates), f"Successfully removed {len(duplicates)} duplicate memories"
-            
-            return 0, "No duplicate memories found"
-            
-        except Exception as e:
-            logger.error(f"Error cleaning up duplicates: {str(e)}")
-            return 0, f"Error cleaning up duplicates: {str(e)}"
+        
+        if not scanned:
+            return 0, "No memories found in database"
+        
+        # Delete duplicates if found
+        if duplicates:
+            if dry_run:
+                return len(duplicates), f"Found {len(duplicates)} duplicate memories (dry run, nothing deleted)"
+            await self._delete_ids(duplicates)
+            return len(duplicates), f"Successfully removed {len(duplicates)} duplicate memories"
+        
+        return 0, "No duplicate memories found"
 
-    async def recall(self, query: Optional[str] = None, n_results: int = 5, start_timestamp: Optional[float] = None, end_timestamp: Optional[float] = None) -> List[MemoryQueryResult]:
+    async def find_near_duplicates(self, similarity_threshold: float) -> List[Dict[str, Any]]:
         """
-        Retrieve memories with combined time filtering and optional semantic search.
+        Cluster memories whose embeddings are at least similarity_threshold cosine-similar.
         
-        Args:
-            query: Optional semantic search query. If None, only time filtering is applied.
-            n_results: Maximum number of results to return.
-            start_timestamp: Optional start time for filtering.
-            end_timestamp: Optional end time for filtering.
-            
-        Returns:
-            List of MemoryQueryResult objects.
+        Embeddings are read page by page into one float32 matrix and compared
+        with blocked matrix products across all cores. Each cluster keeps its
+        oldest memory:
+        {"keep": {...}, "duplicates": [{..., "similarity": float}, ...]}, where
+        each memory has content_hash, content and timestamp and similarity is
+        to the kept memory.
         """
-        try:
-            # Check if collection is initialized
-            if self.collection is None:
-                logger.error("Collection not initialized, cannot retrieve memories")
-                return []
-                
-            # Build time filtering where clause
-            where_clause = {}
-            if start_timestamp is not None or end_timestamp is not None:
-                where_clause = {"$and": []}
-                
-                if start_timestamp is not None:
-                    where_clause["$and"].append({"timestamp": {"$gte": float(start_timestamp)}})
-                
-                if end_timestamp is not None:
-                    where_clause["$and"].append({"timestamp": {"$lte": float(end_timestamp)}})
-
-            # If there's no valid where clause, set it to None to avoid ChromaDB errors
-            if not where_clause.get("$and", []):
-                where_clause = None
-                
-            # Determine whether to use semantic search or just time-based filtering
-            if query:
-                # Combined semantic search with time filtering
-                try:
-                    results = self.collection.query(
-                        query_texts=[query],
-                        n_results=n_results,
-                        where=where_clause,
-                        include=["documents", "metadatas", "distances"]
-                    )
-                    
-                    if not results["ids"] or not results["ids"][0]:
-                        return []
-                    
-                    memory_results = []
-                    for i in range(len(results["ids"][0])):
-                        metadata = results["metadatas"][0][i]
-                        
-                        # Parse tags from JSON string
-                        try:
-                            tags = json.loads(metadata.get("tags", "[]"))
-                        except json.JSONDecodeError:
-                            tags = []
-                        
-                        # Reconstruct memory object
-                        timestamp = float(metadata.get("timestamp", time.time()))
-                        memory = Memory(
-                            content=results["documents"][0][i],
-                            content_hash=metadata["content_hash"],
-                            tags=tags,
-                            memory_type=metadata.get("memory_type", ""),
-                            timestamp=timestamp,
-                            metadata={k: v for k, v in metadata.items() 
-                                    if k not in ["content_hash", "tags", "memory_type", "timestamp"]}
-                        )
-                        
-                        # Calculate cosine similarity from distance
-                        similarity = 1.0 - results["distances"][0][i]
-                        
-                        memory_results.append(MemoryQueryResult(memory=memory, relevance_score=similarity))
-                    
-                    return memory_results
-                except Exception as query_error:
-                    logger.error(f"Error in semantic search: {str(query_error)}")
-                    # Fall back to time-based retrieval on error
-                    logger.info("Falling back to time-based retrieval")
-            
-            # Time-based filtering only (or fallback from failed semantic search)
-            results = self.collection.get(
-                where=where_clause,
-                limit=n_results,
-                include=["metadatas", "documents"]
+        ids, timestamps, matrix = await self.run_in_executor(self._load_embedding_matrix)
+        pairs = await self.run_in_executor(find_similar_pairs, matrix, similarity_threshold)
+        clusters = cluster_pairs(pairs, oldest_first(timestamps))
+        if not clusters:
+            return []
+        
+        members = [ids[row] for rows in clusters for row in rows]
+        contents: Dict[str, str] = {}
+        for offset in range(0, len(members), SCAN_BATCH_SIZE):
+            page = await self.run_in_executor(
+                self.collection.get,
+                ids=members[offset:offset + SCAN_BATCH_SIZE],
+                include=["documents"]
             )
-
-            if not results["ids"]:
-                return []
-                
-            memory_results = []
-            for i in range(len(results["ids"])):
-                metadata = results["metadatas"][i]
-                try:
-                    retrieved_tags = json.loads(metadata.get("tags", "[]"))
-                except json.JSONDecodeError:
-                    retrieved_tags = []
-                
-                # Ensure timestamp is a float
-                try:
-                    timestamp = float(metadata.get("timestamp", time.time()))
-                except (ValueError, TypeError):
-                    timestamp = time.time()
-
-                memory = Memory(
-                    content=results["documents"][i],
-                    content_hash=metadata["content_hash"],
-                    tags=retrieved_tags,
-                    memory_type=metadata.get("type", ""),
-                    timestamp=timestamp,
-                    metadata={k: v for k, v in metadata.items() 
-                             if k not in ["type", "content_hash", "tags", "timestamp"]}
-                )
-                # For time-based retrieval, we don't have a relevance score
-                memory_results.append(MemoryQueryResult(memory=memory, relevance_score=None))
-
-            return memory_results
-
-        except Exception as e:
-            logger.error(f"Error in recall: {str(e)}")
-            logger.error(traceback.format_exc())
+            contents.update(zip(page["ids"], page["documents"]))
+        
+        return group_near_duplicates(ids, timestamps, matrix, clusters, contents)
+
+    def _load_embedding_matrix(self) -> Tuple[List[str], List[Optional[float]], np.ndarray]:
+        """Read every embedding into a unit-normalized float32 matrix, with IDs and timestamps by row."""
+        ids: List[str] = []
+        timestamps: List[Optional[float]] = []
+        blocks = []
+        for page in self.iter_memories(include=("metadatas", "embeddings")):
+            ids.extend(page["ids"])
+            timestamps.extend(parse_timestamp(metadata or {}) for metadata in page["metadatas"])
+            blocks.append(normalize_rows(page["embeddings"]))
+        matrix = np.vstack(blocks) if blocks else np.empty((0, 0), dtype=np.float32)
+        return ids, timestamps, matrix
+
+    async def _rank_candidates(self, query: str, candidate_ids: List[str], n_results: int) -> List[MemoryQueryResult]:
+        """Rank a small set of memories by exact cosine similarity to the query."""
+        if not candidate_ids or n_results <= 0:
             return []
-
-    async def delete_by_timeframe(self, start_date: date, end_date: Optional[date] = None, tag: Optional[str] = None) -> Tuple[int, str]:
-        """Delete memories within a timeframe and optionally filtered by tag."""
-        try:
-            if end_date is None:
-                end_date = start_date
-
-            start_datetime = datetime(start_date.year, start_date.month, start_date.day, 0, 0, 0)
-            end_datetime = datetime(end_date.year, end_date.month, end_date.day, 23, 59, 59)
-
-            start_timestamp = start_datetime.timestamp()
-            end_timestamp = end_datetime.timestamp()
-
-            where_clause = {
-                "$and": [
-                    {"timestamp": {"$gte": start_timestamp}},
-                    {"timestamp": {"$lte": end_timestamp}}
-                ]
-            }
-
-            results = self.collection.get(include=["metadatas"], where=where_clause)
-            ids_to_delete = []
-
-            if results.get("ids"):
-                for i, meta in enumerate(results["metadatas"]):
-                    try:
-                        retrieved_tags = json.loads(meta.get("tags", "[]"))
-                    except json.JSONDecodeError:
-                        retrieved_tags = []
-
-                    if tag is None or tag in retrieved_tags:
-                        ids_to_delete.append(results["ids"][i])
-
-            if not ids_to_delete:
-                return 0, "No memories found matching the criteria."
-
-            self.collection.delete(ids=ids_to_delete)
-            return len(ids_to_delete), None
-
-        except Exception as e:
-            logger.exception("Error deleting memories by timeframe:")
-            return 0, str(e)
-
-    async def delete_before_date(self, before_date: date, tag: Optional[str] = None) -> Tuple[int, str]:
-        """Delete memories before a given date and optionally filtered by tag."""
+        
+        query_embedding = await self.run_in_executor(self.embed_query, query)
+        results = await self.run_in_executor(
+            self.collection.get,
+            ids=candidate_ids,
+            include=["embeddings", "documents", "metadatas"]
+        )
+        if not results["ids"]:
+            return []
+        
+        embeddings = np.asarray(results["embeddings"], dtype=np.float32)
+        norms = np.linalg.norm(embeddings, axis=1) * np.linalg.norm(query_embedding)
+        similarities = (embeddings @ query_embedding) / np.maximum(norms, 1e-12)
+        
+        k = min(n_results, len(similarities))
+        top = np.argpartition(-similarities, k - 1)[:k]
+        top = top[np.argsort(-similarities[top])]
+        return [
+            MemoryQueryResult(
+                memory=memory_from_metadata(results["documents"][i], results["metadatas"][i]),
+                relevance_score=float(similarities[i])
+            )
+            for i in top
+        ]
+
+    async def _search(
+        self,
+        query: str,
+        n_results: int,
+        memory_filter: MemoryFilter,
+        start_timestamp: Optional[float] = None,
+        end_timestamp: Optional[float] = None
+    ) -> List[MemoryQueryResult]:
+        """
+        Semantic search restricted to a time window and memory filter.
+        
+        When the side index can resolve the restriction (time window, tags and
+        memory type) to at most TIME_FILTER_BRUTE_FORCE_LIMIT memories, they are
+        ranked exactly. Otherwise the conditions are pushed into the HNSW query
+        as a pre-filter. If that returns fewer than n_results although more
+        memories match (filtered HNSW search can stop early, and legacy rows
+        may lack the filter keys), the query falls back to post-filtering.
+        """
+        expected = None
+        restricted = start_timestamp is not None or end_timestamp is not None or bool(memory_filter)
+        if restricted and memory_filter.indexed and self.model is not None:
+            # One past the limit tells us whether the candidate set is small enough
+            candidate_ids = await self.run_in_executor(
+                self.index.find_matching,
+                memory_filter.tags,
+                memory_filter.match_all,
+                memory_filter.memory_type,
+                start_timestamp,
+                end_timestamp,
+                TIME_FILTER_BRUTE_FORCE_LIMIT + 1
+            )
+            if len(candidate_ids) <= TIME_FILTER_BRUTE_FORCE_LIMIT:
+                return await self._rank_candidates(query, candidate_ids, n_results)
+            expected = n_results
+        
+        where_clause = combine_conditions(time_conditions(start_timestamp, end_timestamp) + memory_filter.conditions())
         try:
-            before_datetime = datetime(before_date.year, before_date.month, before_date.day, 23, 59, 59)
-            before_timestamp = before_datetime.timestamp()
-
-            where_clause = {"timestamp": {"$lt": before_timestamp}}
-
-            results = self.collection.get(include=["metadatas"], where=where_clause)
-            ids_to_delete = []
-
-            if results.get("ids"):
-                for i, meta in enumerate(results["metadatas"]):
-                    try:
-                        retrieved_tags = json.loads(meta.get("tags", "[]"))
-                    except json.JSONDecodeError:
-                        retrieved_tags = []
-
-                    if tag is None or tag in retrieved_tags:
-                        ids_to_delete.append(results["ids"][i])
-
-            if not ids_to_delete:
-                return 0, "No memories found matching the criteria."
-
-            self.collection.delete(ids=ids_to_delete)
-            return len(ids_to_delete), None
-
-        except Exception as e:
-            logger.exception("Error deleting memories before date:")
-            return 0, str(e)
-
-
-    def _format_metadata_for_chroma(self, memory: Memory) -> Dict[str, Any]:
-        """Format metadata to be compatible with ChromaDB requirements."""
-        metadata = {
-            "content_hash": memory.content_hash,
-            "memory_type": memory.memory_type if memory.memory_type else "",
-            "timestamp": str(memory.timestamp.timestamp())
-        }
-        
-        # Properly serialize tags
-        if memory.tags:
-            if isinstance(memory.tags, list):
-                metadata["tags"] = json.dumps([str(tag).strip() for tag in memory.tags if str(tag).strip()])
-            elif isinstance(memory.tags, str):
-                tags = [tag.strip() for tag in memory.tags.split(",") if tag.strip()]
-                metadata["tags"] = json.dumps(tags)
-        else:
-            metadata["tags"] = "[]"
-        
-        # Add any additional metadata
-        for key, value in memory.metadata.items():
-            if isinstance(value, (str, int, float, bool)):
-                metadata[key] = value
-        
-        return metadata
+            results = await self._query_filtered(query, n_results, where_clause)
+        except Exception as query_error:
+            if not memory_filter:
+                raise
+            logger.warning(f"Filtered query failed, falling back to post-filtering: {str(query_error)}")
+            return await self._post_filter_query(query, n_results, memory_filter, start_timestamp, end_timestamp)
+        
+        if not memory_filter or len(results) >= n_results:
+            return results
+        if expected is None:
+            matching = await self.run_in_executor(
+                self.collection.get, where=where_clause, limit=n_results, include=[]
+            )
+            expected = len(matching["ids"])
+        if len(results) >= expected:
+            return results
+        return await self._post_filter_query(query, n_results, memory_filter, start_timestamp, end_timestamp)
+
+    async def _post_filter_query(
+        self,
+        query: str,
+        n_results: int,
+        memory_filter: MemoryFilter,
+        start_timestamp: Optional[float],
+        end_timestamp: Optional[float]
+    ) -> List[MemoryQueryResult]:
+        """
+        Query without the memory filter and apply it to the results.
+        
+        Each round fetches FILTER_OVERFETCH_FACTOR times more candidates than the
+        last, until n_results pass the filter or the collection is exhausted.
+        """
+        total = await self.run_in_executor(self.collection.count)
+        where_clause = combine_conditions(time_conditions(start_timestamp, end_timestamp))
+        fetch = n_results * FILTER_OVERFETCH_FACTOR
+        while total:
+            fetch = min(fetch, total)
+            results = await self._query_filtered(query, fetch, where_clause)
+            hits = [result for result in results if memory_filter.matches(result.memory)]
+            if len(hits) >= n_results or fetch >= total:
+                return hits[:n_results]
+            fetch *= FILTER_OVERFETCH_FACTOR
+        return []
+
+    async def _query_filtered(
+        self,
+        query: str,
+        n_results: int,
+        where_clause: Optional[Dict[str, Any]]
+    ) -> List[MemoryQueryResult]:
+        """Semantic search through the HNSW index, filtered by a where clause."""
+        query_arguments = await self._query_arguments(query)
+        results = await self.run_in_executor(
+            self.collection.query,
+            **query_arguments,
+            n_results=n_results,
+            where=where_clause,
+            include=["documents", "metadatas", "distances"]
+        )
+        
+        if not results["ids"] or not results["ids"][0]:
+            return []
+        
+        return query_results_from_rows(results["documents"][0], results["metadatas"][0], results["distances"][0])
 
-    async def retrieve(self, query: str, n_results: int = 5) -> List[MemoryQueryResult]:
-        """Retrieve memories using semantic search with hardware-aware optimizations."""
-        try:
-            # Check if collection is initialized
-            if self.collection is None:
-                logger.error("Collection not initialized, cannot retrieve memories")
-                return []
-            
-            # Check if embedding function is available
-            if self.embedding_function is None:
-                logger.error("Embedding function not initialized, cannot retrieve memories")
-                return []
-            
-            start_time = time.time()
-            
-            try:
-                # Query using the embedding function with hardware-aware settings
-                results = self.collection.query(
-                    query_texts=[query],
-                    n_results=n_results,
-                    include=["documents", "metadatas", "distances"]
-                )
-            except Exception as query_error:
-                logger.warning(f"Error during query operation: {str(query_error)}")
-                
-                # Fallback: Try with direct embedding if the standard query fails
-                try:
-                    logger.info("Attempting fallback query with direct embedding")
-                    
-                    # Generate embedding directly
-                    if self.model:
-                        query_embedding = self.model.encode(
-                            query,
-                            batch_size=self.embedding_settings["batch_size"],
-                            show_progress_bar=False
-                        ).tolist()
-                        
-                        # Use the embedding directly
-                        results = self.collection.query(
-                            query_embeddings=[query_embedding],
-                            n_results=n_results,
-                            include=["documents", "metadatas", "distances"]
-                        )
-                    else:
-                        raise ValueError("Model not available for fallback query")
-                        
-                except Exception as fallback_error:
-                    logger.error(f"Fallback query also failed: {str(fallback_error)}")
-                    return []
-            
-            query_time = time.time() - start_time
-            logger.debug(f"Query completed in {query_time:.4f}s")
-            
-            if not results["ids"] or not results["ids"][0]:
-                return []
-            
-            memory_results = []
-            for i in range(len(results["ids"][0])):
-                metadata = results["metadatas"][0][i]
-                
-                # Parse tags from JSON string if needed
-                tags = []
-                if "tags" in metadata:
-                    try:
-                        if isinstance(metadata["tags"], str):
-                            tags = json.loads(metadata["tags"])
-                        else:
-                            tags = metadata["tags"]
-                    except (json.JSONDecodeError, TypeError):
-                        logger.debug(f"Could not parse tags for memory {metadata.get('content_hash')}")
-                
-                # Reconstruct memory object
-                memory = Memory(
-                    content=results["documents"][0][i],
-                    content_hash=metadata["content_hash"],
-                    tags=tags,
-                    memory_type=metadata.get("memory_type", ""),
-                )
-                
-                # Calculate cosine similarity from distance
-                distance = results["distances"][0][i]
-                similarity = 1 - distance
-                
-                memory_results.append(MemoryQueryResult(memory, similarity))
-            
-            return memory_results
-            
-        except Exception as e:
-            logger.error(f"Error retrieving memories: {str(e)}")
-            logger.error(traceback.format_exc())
-            return []
\ No newline at end of file
+    async def _get_memories(self, memory_ids: List[str]) -> List[Memory]:
+        """Fetch memories by ID, preserving the order of memory_ids."""
+        if not memory_ids:
+            return []
+        results = await self.run_in_executor(
+            self.collection.get,
+            ids=memory_ids,
+            include=["metadatas", "documents"]
+        )
+        memories = dict(zip(results["ids"], memories_from_rows(results["documents"], results["metadatas"])))
+        return [memories[memory_id] for memory_id in memory_ids if memory_id in memories]
@@ -0,0 +1,344 @@
+"""
+MCP Memory Service
+Copyright (c) 2024 Heinrich Krupp
+Licensed under the MIT License. See LICENSE file in the project root for full license text.
+"""
+import base64
+import binascii
+import json
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .index import IndexEntry
+from ..models.memory import Memory, MemoryQueryResult
+
+# Metadata format and helpers shared by the storage backends. Memories are
+# described by a flat metadata dict (JSON-encoded tags, float timestamp,
+# memory_type and any extra scalar keys), as ChromaDB requires.
+
+# Every tag is also stored as a boolean "tag:<name>" key so ChromaDB can filter
+# on it natively. Metadata updates can't delete keys, so a removed tag is False.
+TAG_KEY_PREFIX = "tag:"
+
+def tag_keys(tags: List[str]) -> Dict[str, bool]:
+    """Boolean metadata keys for a memory's tags."""
+    return {f"{TAG_KEY_PREFIX}{tag}": True for tag in tags}
+
+def sync_tag_keys(metadata: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Return metadata with tag keys matching its JSON tags, or None if they already match.
+    
+    Keys of tags the memory no longer has are set to False.
+    """
+    wanted = tag_keys(parse_tags(metadata))
+    current = {key: value for key, value in metadata.items() if key.startswith(TAG_KEY_PREFIX)}
+    synced = {key: key in wanted for key in current}
+    synced.update(wanted)
+    if synced == current:
+        return None
+    return {**metadata, **synced}
+
+def combine_conditions(conditions: List[Dict[str, Any]], operator: str = "$and") -> Optional[Dict[str, Any]]:
+    """Join ChromaDB where conditions, None when there are none."""
+    if not conditions:
+        return None
+    if len(conditions) == 1:
+        # ChromaDB rejects $and/$or with fewer than two conditions
+        return conditions[0]
+    return {operator: conditions}
+
+def tag_filter(tags: List[str], match_all: bool = False) -> Optional[Dict[str, Any]]:
+    """ChromaDB where clause matching memories with any (or all) of the tags."""
+    return combine_conditions([{key: True} for key in tag_keys(tags)], "$and" if match_all else "$or")
+
+def time_conditions(start_timestamp: Optional[float], end_timestamp: Optional[float]) -> List[Dict[str, Any]]:
+    """ChromaDB where conditions for a time window; either bound may be None."""
+    conditions = []
+    if start_timestamp is not None:
+        conditions.append({"timestamp": {"$gte": float(start_timestamp)}})
+    if end_timestamp is not None:
+        conditions.append({"timestamp": {"$lte": float(end_timestamp)}})
+    return conditions
+
+# Metadata keys written by the storage itself rather than by callers
+RESERVED_METADATA_KEYS = ("content_hash", "tags", "memory_type", "type", "timestamp")
+
+@dataclass(frozen=True)
+class MemoryFilter:
+    """
+    Restricts a search to memories with given tags, memory type and metadata values.
+    
+    Hashable, so it can be part of a result cache key. An empty filter is falsy.
+    """
+    tags: Tuple[str, ...] = ()
+    match_all: bool = False
+    memory_type: Optional[str] = None
+    metadata: Tuple[Tuple[str, Any], ...] = ()
+    
+    @classmethod
+    def create(
+        cls,
+        tags: Optional[List[str]] = None,
+        match_all: bool = False,
+        memory_type: Optional[str] = None,
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> "MemoryFilter":
+        """
+        Build a filter from tool-style arguments.
+        
+        Raises:
+            ValueError: If a metadata filter targets a reserved key or has a
+                value that isn't a string, number or boolean.
+        """
+        metadata = metadata or {}
+        for key, value in metadata.items():
+            if key in RESERVED_METADATA_KEYS or key.startswith(TAG_KEY_PREFIX):
+                raise ValueError(f"Cannot filter on reserved metadata key: {key}")
+            if not isinstance(value, (str, int, float, bool)):
+                raise ValueError(f"Metadata filter values must be strings, numbers or booleans, got {key}={value!r}")
+        return cls(
+            tags=tuple(dict.fromkeys(str(tag).strip() for tag in tags or () if str(tag).strip())),
+            match_all=match_all,
+            memory_type=memory_type or None,
+            metadata=tuple(sorted(metadata.items()))
+        )
+    
+    def __bool__(self) -> bool:
+        return bool(self.tags or self.memory_type or self.metadata)
+    
+    @property
+    def indexed(self) -> bool:
+        """Whether the side index alone can resolve the filter (no metadata conditions)."""
+        return not self.metadata
+    
+    def conditions(self) -> List[Dict[str, Any]]:
+        """ChromaDB where conditions for the filter."""
+        conditions = []
+        if self.tags:
+            conditions.append(tag_filter(list(self.tags), self.match_all))
+        if self.memory_type:
+            conditions.append({"memory_type": self.memory_type})
+        conditions.extend({key: value} for key, value in self.metadata)
+        return conditions
+    
+    def matches(self, memory: Memory) -> bool:
+        """Whether a decoded memory passes the filter."""
+        if self.tags:
+            found = [tag in memory.tags for tag in self.tags]
+            if not (all(found) if self.match_all else any(found)):
+                return False
+        if self.memory_type and memory.memory_type != self.memory_type:
+            return False
+        return all(memory.metadata.get(key) == value for key, value in self.metadata)
+
+def parse_tags(metadata: Dict[str, Any]) -> List[str]:
+    """Decode the JSON-encoded tags string stored in memory metadata."""
+    try:
+        tags = json.loads(metadata.get("tags", "[]"))
+    except (json.JSONDecodeError, TypeError):
+        return []
+    if not isinstance(tags, list):
+        return []
+    return [str(tag).strip() for tag in tags if str(tag).strip()]
+
+def parse_timestamp(metadata: Dict[str, Any]) -> Optional[float]:
+    """Read the timestamp stored in memory metadata, which older databases kept as a string."""
+    try:
+        return float(metadata["timestamp"])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+def index_entry(memory_id: str, metadata: Dict[str, Any], content: Optional[str] = None) -> IndexEntry:
+    """Build the side-index entry for a memory from its metadata and, for keyword search, its content."""
+    return (
+        memory_id,
+        parse_tags(metadata),
+        parse_timestamp(metadata),
+        metadata.get("memory_type") or metadata.get("type") or None,
+        content
+    )
+
+def encode_cursor(timestamp: float, content_hash: str) -> str:
+    """Encode the position after a recalled memory as an opaque pagination cursor."""
+    return base64.urlsafe_b64encode(json.dumps([timestamp, content_hash]).encode("utf-8")).decode("ascii")
+
+def decode_cursor(cursor: str) -> Tuple[float, str]:
+    """Decode a cursor produced by encode_cursor; raises ValueError if it is malformed."""
+    try:
+        timestamp, content_hash = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return float(timestamp), str(content_hash)
+    except (binascii.Error, UnicodeError, ValueError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+# Ranking modes of retrieve: embedding similarity, BM25 keyword relevance, or both fused
+SEARCH_MODES = ("semantic", "lexical", "hybrid")
+
+def reciprocal_rank_fusion(rankings: List[List[str]], k: int) -> List[Tuple[str, float]]:
+    """
+    Fuse ranked lists of memory IDs with reciprocal-rank fusion.
+    
+    An ID scores the sum of 1 / (k + rank) over the lists it appears in, with
+    ranks starting at 1, so agreement between rankings beats a single high
+    rank. Returns (id, score) pairs, best first.
+    """
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, memory_id in enumerate(ranking, start=1):
+            scores[memory_id] = scores.get(memory_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+# Clusters listed in near-duplicate cleanup messages
+DUPLICATE_REPORT_LIMIT = 20
+
+def oldest_first(timestamps: List[Optional[float]]) -> List[int]:
+    """Rows ordered oldest first; memories without a timestamp go last."""
+    return sorted(range(len(timestamps)), key=lambda row: (timestamps[row] is None, timestamps[row] or 0.0, row))
+
+def group_near_duplicates(
+    ids: List[str],
+    timestamps: List[Optional[float]],
+    matrix: np.ndarray,
+    clusters: List[List[int]],
+    contents: Dict[str, str]
+) -> List[Dict[str, Any]]:
+    """
+    Describe clusters of embedding-matrix rows, keeping the first row of each.
+    
+    Clusters come from cluster_pairs visiting rows oldest_first, so the kept
+    memory is the oldest and every duplicate is similar to it directly.
+    Returns {"keep": {...}, "duplicates": [{..., "similarity": float}, ...]} per
+    cluster, where each memory has content_hash, content and timestamp and
+    similarity is to the kept memory.
+    """
+    def describe(row: int) -> Dict[str, Any]:
+        return {"content_hash": ids[row], "content": contents.get(ids[row], ""), "timestamp": timestamps[row]}
+    
+    results = []
+    for rows in clusters:
+        keep, rest = rows[0], rows[1:]
+        similarities = matrix[rest] @ matrix[keep]
+        results.append({
+            "keep": describe(keep),
+            "duplicates": [
+                {**describe(row), "similarity": round(float(similarity), 4)}
+                for row, similarity in zip(rest, similarities)
+            ]
+        })
+    return results
+
+def format_duplicate_clusters(clusters: List[Dict[str, Any]]) -> str:
+    """Render near-duplicate clusters as an indented text report."""
+    def preview(content: str) -> str:
+        content = " ".join(content.split())
+        return content if len(content) <= 80 else content[:77] + "..."
+    
+    lines = []
+    for number, cluster in enumerate(clusters[:DUPLICATE_REPORT_LIMIT], 1):
+        keep = cluster["keep"]
+        lines.append(f"Cluster {number}: keep {keep['content_hash'][:12]} \"{preview(keep['content'])}\"")
+        for memory in cluster["duplicates"]:
+            lines.append(
+                f"  - {memory['content_hash'][:12]} ({memory['similarity']:.3f}) \"{preview(memory['content'])}\""
+            )
+    if len(clusters) > DUPLICATE_REPORT_LIMIT:
+        lines.append(f"... and {len(clusters) - DUPLICATE_REPORT_LIMIT} more clusters")
+    return "\n".join(lines)
+
+def summarize_near_duplicates(clusters: List[Dict[str, Any]], similarity_threshold: float, dry_run: bool) -> str:
+    """Message reporting a near-duplicate cleanup, with the cluster report."""
+    if not clusters:
+        return f"No near-duplicate memories found at similarity {similarity_threshold}"
+    
+    removed = sum(len(cluster["duplicates"]) for cluster in clusters)
+    report = format_duplicate_clusters(clusters)
+    if dry_run:
+        return (
+            f"Dry run: {removed} memories in {len(clusters)} near-duplicate clusters "
+            f"would be removed (similarity >= {similarity_threshold})\n{report}"
+        )
+    return (
+        f"Successfully removed {removed} near-duplicate memories from {len(clusters)} clusters "
+        f"(similarity >= {similarity_threshold})\n{report}"
+    )
+
+def format_metadata(memory: Memory) -> Dict[str, Any]:
+    """Format metadata to be compatible with ChromaDB requirements."""
+    metadata = {
+        "content_hash": memory.content_hash,
+        "memory_type": memory.memory_type if memory.memory_type else "",
+        "timestamp": memory.timestamp.timestamp()
+    }
+    
+    # Properly serialize tags
+    if memory.tags:
+        if isinstance(memory.tags, list):
+            metadata["tags"] = json.dumps([str(tag).strip() for tag in memory.tags if str(tag).strip()])
+        elif isinstance(memory.tags, str):
+            tags = [tag.strip() for tag in memory.tags.split(",") if tag.strip()]
+            metadata["tags"] = json.dumps(tags)
+    else:
+        metadata["tags"] = "[]"
+    metadata.update(tag_keys(parse_tags(metadata)))
+    
+    # Add any additional metadata
+    for key, value in memory.metadata.items():
+        if isinstance(value, (str, int, float, bool)):
+            metadata[key] = value
+    
+    return metadata
+
+def decode_metadata(metadata: Dict[str, Any]) -> Tuple[List[str], Dict[str, Any]]:
+    """Split stored metadata into the memory's tags and its extra (non-reserved) keys."""
+    return parse_tags(metadata), {
+        key: value for key, value in metadata.items()
+        if key not in RESERVED_METADATA_KEYS and not key.startswith(TAG_KEY_PREFIX)
+    }
+
+def memory_from_metadata(document: str, metadata: Dict[str, Any]) -> Memory:
+    """Rebuild a memory from its stored document and metadata; tags and extra keys decode on access."""
+    timestamp = parse_timestamp(metadata)
+    return Memory.from_stored(
+        document,
+        metadata["content_hash"],
+        metadata.get("memory_type") or metadata.get("type", ""),
+        timestamp if timestamp is not None else time.time(),
+        metadata,
+        decode_metadata
+    )
+
+def memories_from_rows(documents: List[str], metadatas: List[Dict[str, Any]]) -> List[Memory]:
+    """Rebuild the memories of a ChromaDB get() result (or any parallel document/metadata lists)."""
+    return list(map(memory_from_metadata, documents, metadatas))
+
+def query_results_from_rows(
+    documents: List[str],
+    metadatas: List[Dict[str, Any]],
+    distances: List[float]
+) -> List[MemoryQueryResult]:
+    """
+    Turn one query of a ChromaDB query() result into scored results, best first.
+
+    Cosine distances are converted to similarities for the whole batch at once.
+    """
+    scores = (1.0 - np.asarray(distances, dtype=np.float64)).tolist()
+    return list(map(MemoryQueryResult, memories_from_rows(documents, metadatas), scores))
+
+def sanitize_tags(tags) -> str:
+    """Normalize comma-separated or list tags into the stored JSON string."""
+    if tags is None:
+        return json.dumps([])
+    
+    # If we get a string, split it into an array
+    if isinstance(tags, str):
+        tags = [tag.strip() for tag in tags.split(",") if tag.strip()]
+    # If we get an array, use it directly
+    elif isinstance(tags, list):
+        tags = [str(tag).strip() for tag in tags if str(tag).strip()]
+    else:
+        return json.dumps([])
+            
+    # Return JSON string representation of the array
+    return json.dumps(tags)
@@ -0,0 +1,206 @@
+"""
+MCP Memory Service
+Copyright (c) 2024 Heinrich Krupp
+Licensed under the MIT License. See LICENSE file in the project root for full license text.
+"""
+import logging
+import os
+import platform
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Union, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
+
+from ..config import USE_ONNX, ONNX_CACHE_PATH
+
+logger = logging.getLogger(__name__)
+
+# List of models to try in order of preference
+# From most capable to least capable
+MODEL_FALLBACKS = [
+    'all-mpnet-base-v2',      # High quality, larger model
+    'all-MiniLM-L6-v2',       # Good balance of quality and size
+    'paraphrase-MiniLM-L6-v2', # Alternative with similar size
+    'paraphrase-MiniLM-L3-v2', # Smaller model for constrained environments
+    'paraphrase-albert-small-v2' # Smallest model, last resort
+]
+
+
+def load_sentence_transformer(model_name: str, device: str, batch_size: int) -> "SentenceTransformer":
+    """
+    Load a sentence-transformer and run a test encoding to make sure it works.
+
+    With MCP_MEMORY_USE_ONNX on a CPU device, the int8-quantized ONNX Runtime
+    model is tried first and PyTorch is the fallback.
+    """
+    if USE_ONNX and device == "cpu":
+        try:
+            return load_onnx_sentence_transformer(model_name, batch_size)
+        except Exception as e:
+            logger.warning(f"ONNX backend unavailable for {model_name}, using PyTorch: {str(e)}")
+
+    # Imported here so a lazy start doesn't pay for importing transformers up front
+    from sentence_transformers import SentenceTransformer
+    model = SentenceTransformer(model_name, device=device)
+    model.max_seq_length = 384  # Default max sequence length
+    _ = model.encode("Test encoding", batch_size=batch_size)
+    return model
+
+
+def onnx_quantization_config() -> str:
+    """Name of the dynamic int8 quantization config matching this CPU's instruction set."""
+    if platform.machine().lower() in ("arm64", "aarch64"):
+        return "arm64"
+    try:
+        with open("/proc/cpuinfo") as cpuinfo:
+            flags = cpuinfo.read()
+    except OSError:
+        flags = ""
+    if "avx512_vnni" in flags:
+        return "avx512_vnni"
+    if "avx512" in flags:
+        return "avx512"
+    return "avx2"
+
+
+def load_onnx_sentence_transformer(
+    model_name: str,
+    batch_size: int,
+    cache_path: str = ONNX_CACHE_PATH
+) -> "SentenceTransformer":
+    """
+    Load a model as a dynamically int8-quantized ONNX Runtime export.
+
+    The first load exports the model to ONNX, quantizes it for this CPU and
+    saves both under cache_path/<model name>; later loads read the quantized
+    file directly.
+
+    Raises:
+        ImportError: If optimum or onnxruntime isn't installed.
+    """
+    from sentence_transformers import SentenceTransformer, export_dynamic_quantized_onnx_model
+    config = onnx_quantization_config()
+    model_dir = os.path.join(cache_path, model_name.replace("/", "--"))
+    file_name = f"onnx/model_qint8_{config}.onnx"
+
+    if not os.path.exists(os.path.join(model_dir, file_name)):
+        logger.info(f"Exporting {model_name} to int8 ONNX ({config}) in {model_dir}")
+        start_time = time.time()
+        exported = SentenceTransformer(model_name, device="cpu", backend="onnx")
+        exported.save_pretrained(model_dir)
+        export_dynamic_quantized_onnx_model(exported, config, model_dir)
+        logger.info(f"Exported {model_name} to ONNX in {time.time() - start_time:.2f}s")
+
+    model = SentenceTransformer(model_dir, device="cpu", backend="onnx", model_kwargs={"file_name": file_name})
+    model.max_seq_length = 384  # Default max sequence length
+    _ = model.encode("Test encoding", batch_size=batch_size)
+    return model
+
+
+def load_embedding_model(
+    settings: Dict[str, Any],
+    loader: Callable[[str, str, int], Any] = load_sentence_transformer
+) -> Optional["SharedEmbeddingModel"]:
+    """
+    Load the preferred embedding model, falling back to smaller models and to the CPU.
+
+    ``settings`` are the hardware-aware embedding settings (model_name, device,
+    batch_size); device and batch_size are updated in place when the model only
+    loads on the CPU. Returns None if no model could be loaded.
+    """
+    # Start with the optimal model for this system
+    preferred_model = settings["model_name"]
+    device = settings["device"]
+    batch_size = settings["batch_size"]
+    
+    # Try the preferred model first, then fall back to alternatives
+    models_to_try = [preferred_model] + [m for m in MODEL_FALLBACKS if m != preferred_model]
+    
+    for model_name in models_to_try:
+        try:
+            logger.info(f"Attempting to load model: {model_name} on {device}")
+            start_time = time.time()
+            
+            # Try to initialize the model with the current settings
+            model = loader(model_name, device, batch_size)
+            
+            load_time = time.time() - start_time
+            logger.info(f"Successfully loaded model {model_name} in {load_time:.2f}s")
+            logger.info(f"Embedding function initialized with model {model_name}")
+            return SharedEmbeddingModel(model, model_name, device, batch_size)
+            
+        except Exception as e:
+            logger.warning(f"Failed to initialize model {model_name} on {device}: {str(e)}")
+            
+            # If we're not on CPU already, try falling back to CPU
+            if device != "cpu":
+                try:
+                    logger.info(f"Falling back to CPU for model: {model_name}")
+                    cpu_batch_size = max(1, batch_size // 2)
+                    model = loader(model_name, "cpu", cpu_batch_size)
+                    
+                    # Update settings to reflect CPU usage
+                    settings["device"] = "cpu"
+                    settings["batch_size"] = cpu_batch_size
+                    
+                    logger.info(f"Successfully loaded model {model_name} on CPU")
+                    return SharedEmbeddingModel(model, model_name, "cpu", cpu_batch_size)
+                except Exception as cpu_e:
+                    logger.warning(f"Failed to initialize model {model_name} on CPU: {str(cpu_e)}")
+    
+    return None
+
+
+class SharedEmbeddingModel:
+    """
+    Holder for a single loaded sentence-transformer model.
+
+    The same instance is used as ``storage.model`` for direct ``encode`` calls and
+    as the ChromaDB embedding function, so the model weights are only loaded once.
+    """
+
+    def __init__(self, model: Any, model_name: str, device: str, batch_size: int):
+        self._model = model
+        self.model_name = model_name
+        self.device = device
+        self.batch_size = batch_size
+
+    @property
+    def embedding_dimension(self) -> int:
+        """Dimension of the vectors produced by the model."""
+        return self._model.get_sentence_embedding_dimension()
+
+    def encode(self, sentences: Union[str, Sequence[str]], **kwargs) -> Any:
+        """Encode text with the shared model, defaulting to the hardware-aware batch size."""
+        kwargs.setdefault("batch_size", self.batch_size)
+        kwargs.setdefault("show_progress_bar", False)
+        return self._model.encode(sentences, **kwargs)
+
+    def __call__(self, input: Sequence[str]) -> List[List[float]]:
+        """ChromaDB ``EmbeddingFunction`` interface."""
+        embeddings = self.encode(list(input), convert_to_numpy=True)
+        return [embedding.tolist() for embedding in embeddings]
+
+    def __getattr__(self, name: str) -> Any:
+        # Only called for attributes not found on the holder itself, so callers that
+        # expect a raw SentenceTransformer (e.g. max_seq_length) keep working.
+        if name == "_model":
+            raise AttributeError(name)
+        return getattr(self._model, name)
+
+
+class DeferredEmbeddingFunction:
+    """
+    ChromaDB embedding function that resolves the real one on first use.
+
+    Lets the collection be opened before the model has loaded; ``resolve`` blocks
+    until the model is ready and returns its embedding function.
+    """
+
+    def __init__(self, resolve: Callable[[], Callable[[Sequence[str]], List[List[float]]]]):
+        self._resolve = resolve
+
+    def __call__(self, input: Sequence[str]) -> List[List[float]]:
+        """ChromaDB ``EmbeddingFunction`` interface."""
+        return self._resolve()(input)
@@ -0,0 +1,354 @@
+"""
+MCP Memory Service
+Copyright (c) 2024 Heinrich Krupp
+Licensed under the MIT License. See LICENSE file in the project root for full license text.
+"""
+import os
+import re
+import sqlite3
+import threading
+import logging
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILENAME = "memory_index.sqlite3"
+
+# Single-file database of the SQLite storage backend, which extends this schema
+STORE_FILENAME = "memories.sqlite3"
+
+# Bumped whenever the schema gains data that has to be backfilled from the collection
+INDEX_VERSION = "4"
+
+# (content_hash, tags, timestamp[, memory_type[, content]]) as stored by add_many and rebuild
+IndexEntry = Tuple[str, List[str], Optional[float], Optional[str], Optional[str]]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS index_meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS memory_tags (
+    tag TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    PRIMARY KEY (tag, content_hash)
+);
+CREATE INDEX IF NOT EXISTS idx_memory_tags_hash ON memory_tags (content_hash);
+CREATE TABLE IF NOT EXISTS memories (
+    content_hash TEXT PRIMARY KEY,
+    timestamp REAL,
+    memory_type TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_memories_timestamp ON memories (timestamp, content_hash);
+CREATE VIRTUAL TABLE IF NOT EXISTS memory_terms USING fts5(content);
+"""
+
+# Run after SCHEMA, once any columns added since version 2 exist
+SCHEMA_INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_memories_type ON memories (memory_type);
+"""
+
+
+def match_expression(query: str) -> Optional[str]:
+    """
+    Turn free text into an FTS5 query matching any of its words.
+
+    Each word is quoted, so query syntax characters in the text are never
+    interpreted. Snake-case identifiers like ERR_CONN_RESET stay together and
+    match as a phrase of their parts, which is how the tokenizer splits them.
+    """
+    terms = dict.fromkeys(re.findall(r"[^\W_]+(?:_+[^\W_]+)*", query.lower()))
+    if not terms:
+        return None
+    return " OR ".join(f'"{term}"' for term in terms)
+
+
+class MemoryIndex:
+    """
+    SQLite side index stored next to the ChromaDB data.
+
+    Keeps a tag -> content_hash inverted index so tag lookups cost O(matches)
+    instead of scanning and JSON-decoding every row in the collection, and a
+    B-tree on memory timestamps so a time window resolves to its content hashes
+    with a range search. Memory types are kept alongside for statistics, and
+    an FTS5 table over memory content (keyed by the memories rowid) serves
+    BM25-ranked keyword search.
+    """
+
+    def __init__(self, path: str, filename: str = INDEX_FILENAME):
+        self.db_path = os.path.join(path, filename)
+        self._lock = threading.Lock()
+        # Accessed from the storage thread pool, serialized by self._lock
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(memories)")}
+        if "memory_type" not in columns:
+            # Version 2 index; the column is backfilled by the rebuild its version triggers
+            self._conn.execute("ALTER TABLE memories ADD COLUMN memory_type TEXT")
+        self._conn.executescript(SCHEMA_INDEXES)
+        self._conn.commit()
+
+    def get_meta(self, key: str) -> Optional[str]:
+        """Read a value from the index bookkeeping table."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM index_meta WHERE key = ?", (key,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key: str, value: str):
+        """Write a value to the index bookkeeping table."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO index_meta (key, value) VALUES (?, ?)", (key, value)
+            )
+
+    def is_built(self) -> bool:
+        """Whether the index has been populated from the collection with the current schema."""
+        return self.get_meta("built") == "1" and self.get_meta("version") == INDEX_VERSION
+
+    def rebuild(self, entries: Iterable[IndexEntry]):
+        """Replace the index contents with (content_hash, tags, timestamp[, memory_type[, content]]) entries."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM memory_tags")
+            self._conn.execute("DELETE FROM memory_terms")
+            self._conn.execute("DELETE FROM memories")
+            self._insert(entries)
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO index_meta (key, value) VALUES (?, ?)",
+                [("built", "1"), ("version", INDEX_VERSION)]
+            )
+
+    def add(
+        self,
+        content_hash: str,
+        tags: List[str],
+        timestamp: Optional[float],
+        memory_type: Optional[str] = None,
+        content: Optional[str] = None
+    ):
+        """Index a single memory."""
+        self.add_many([(content_hash, tags, timestamp, memory_type, content)])
+
+    def add_many(self, entries: Iterable[IndexEntry]):
+        """Index several memories in one transaction."""
+        with self._lock, self._conn:
+            self._insert(entries)
+
+    def _insert(self, entries: Iterable[IndexEntry]):
+        # Callers hold self._lock inside a transaction. The upsert keeps the
+        # rowid of a re-indexed memory, which keys its row in memory_terms.
+        for content_hash, tags, timestamp, *optional in entries:
+            memory_type = optional[0] if optional else None
+            content = optional[1] if len(optional) > 1 else None
+            self._conn.execute(
+                "INSERT INTO memories (content_hash, timestamp, memory_type) VALUES (?, ?, ?) "
+                "ON CONFLICT (content_hash) DO UPDATE SET "
+                "timestamp = excluded.timestamp, memory_type = excluded.memory_type",
+                (content_hash, timestamp, memory_type)
+            )
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO memory_tags (tag, content_hash) VALUES (?, ?)",
+                ((tag, content_hash) for tag in tags)
+            )
+            if content is not None:
+                rowid = self._conn.execute(
+                    "SELECT rowid FROM memories WHERE content_hash = ?", (content_hash,)
+                ).fetchone()[0]
+                self._conn.execute("DELETE FROM memory_terms WHERE rowid = ?", (rowid,))
+                self._conn.execute("INSERT INTO memory_terms (rowid, content) VALUES (?, ?)", (rowid, content))
+
+    def _delete(self, params: List[Tuple[str]]):
+        # Callers hold self._lock inside a transaction
+        self._conn.executemany("DELETE FROM memory_tags WHERE content_hash = ?", params)
+        self._conn.executemany(
+            "DELETE FROM memory_terms WHERE rowid = (SELECT rowid FROM memories WHERE content_hash = ?)", params
+        )
+        self._conn.executemany("DELETE FROM memories WHERE content_hash = ?", params)
+
+    def remove(self, content_hashes: Iterable[str]):
+        """Drop every index entry for the given memories."""
+        params = [(content_hash,) for content_hash in content_hashes]
+        with self._lock, self._conn:
+            self._delete(params)
+
+    def search_terms(self, query: str, limit: int) -> List[Tuple[str, float]]:
+        """
+        Rank memories by BM25 relevance of their content to the words of a query.
+
+        Returns:
+            Up to limit (content_hash, score) pairs, best first. Scores are
+            positive and higher is better; memories sharing no word with the
+            query are not returned.
+        """
+        expression = match_expression(query)
+        if expression is None or limit <= 0:
+            return []
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT memories.content_hash, -bm25(memory_terms) AS score FROM memory_terms "
+                "JOIN memories ON memories.rowid = memory_terms.rowid "
+                "WHERE memory_terms MATCH ? ORDER BY score DESC LIMIT ?",
+                (expression, int(limit))
+            ).fetchall()
+        return [(content_hash, score) for content_hash, score in rows]
+
+    def find_by_time_range(
+        self,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        limit: Optional[int] = None
+    ) -> List[str]:
+        """
+        Return content hashes of memories stored within [start, end], newest first.
+
+        Either bound may be None for an open range. Memories without a timestamp
+        are never returned.
+        """
+        query = "SELECT content_hash FROM memories WHERE timestamp IS NOT NULL "
+        params: List = []
+        if start is not None:
+            query += "AND timestamp >= ? "
+            params.append(float(start))
+        if end is not None:
+            query += "AND timestamp <= ? "
+            params.append(float(end))
+        query += "ORDER BY timestamp DESC, content_hash DESC"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(int(limit))
+
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [row[0] for row in rows]
+
+    def find_by_tags(self, tags: List[str], match_all: bool = False) -> List[str]:
+        """
+        Return content hashes of memories carrying the given tags.
+
+        Args:
+            tags: Tags to look up (exact, case-sensitive match).
+            match_all: If True, a memory must carry every tag (AND);
+                otherwise any of them is enough (OR).
+        """
+        tags = list(dict.fromkeys(tags))
+        if not tags:
+            return []
+
+        placeholders = ",".join("?" for _ in tags)
+        query = (
+            f"SELECT content_hash FROM memory_tags WHERE tag IN ({placeholders}) "
+            "GROUP BY content_hash "
+        )
+        params: List = list(tags)
+        if match_all:
+            query += "HAVING COUNT(DISTINCT tag) = ? "
+            params.append(len(tags))
+        query += "ORDER BY MIN(rowid)"
+
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [row[0] for row in rows]
+
+    def find_matching(
+        self,
+        tags: Sequence[str] = (),
+        match_all: bool = False,
+        memory_type: Optional[str] = None,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        limit: Optional[int] = None
+    ) -> List[str]:
+        """
+        Return content hashes of memories matching tags, memory type and time window, newest first.
+
+        Every condition is optional. Without time bounds, memories without a
+        timestamp are included after the others.
+        """
+        query = "SELECT content_hash FROM memories WHERE 1 = 1 "
+        params: List = []
+        if start is not None:
+            query += "AND timestamp >= ? "
+            params.append(float(start))
+        if end is not None:
+            query += "AND timestamp <= ? "
+            params.append(float(end))
+        if memory_type:
+            query += "AND memory_type = ? "
+            params.append(memory_type)
+        tags = list(dict.fromkeys(tags))
+        if tags:
+            placeholders = ",".join("?" for _ in tags)
+            query += (
+                f"AND content_hash IN (SELECT content_hash FROM memory_tags WHERE tag IN ({placeholders}) "
+                "GROUP BY content_hash "
+            )
+            params.extend(tags)
+            if match_all:
+                query += "HAVING COUNT(DISTINCT tag) = ? "
+                params.append(len(tags))
+            query += ") "
+        query += "ORDER BY timestamp IS NULL, timestamp DESC, content_hash DESC"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(int(limit))
+
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [row[0] for row in rows]
+
+    def page_by_time_range(
+        self,
+        start: Optional[float],
+        end: Optional[float],
+        page_size: int,
+        after: Optional[Tuple[float, str]] = None
+    ) -> List[Tuple[str, float]]:
+        """
+        Return one page of (content_hash, timestamp) within [start, end], newest first.
+
+        Keyset pagination: ``after`` is the (timestamp, content_hash) of the last
+        row of the previous page, so every page is a single bounded range scan.
+        """
+        query = "SELECT content_hash, timestamp FROM memories WHERE timestamp IS NOT NULL "
+        params: List = []
+        if start is not None:
+            query += "AND timestamp >= ? "
+            params.append(float(start))
+        if end is not None:
+            query += "AND timestamp <= ? "
+            params.append(float(end))
+        if after is not None:
+            query += "AND (timestamp < ? OR (timestamp = ? AND content_hash < ?)) "
+            params.extend([after[0], after[0], after[1]])
+        query += "ORDER BY timestamp DESC, content_hash DESC LIMIT ?"
+        params.append(int(page_size))
+
+        with self._lock:
+            return self._conn.execute(query, params).fetchall()
+
+    def tag_counts(self, limit: Optional[int] = None) -> Tuple[int, List[Tuple[str, int]]]:
+        """Return the number of distinct tags and (tag, memories) pairs, most used first."""
+        query = "SELECT tag, COUNT(*) AS uses FROM memory_tags GROUP BY tag ORDER BY uses DESC, tag"
+        params: List = []
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(int(limit))
+        with self._lock:
+            distinct = self._conn.execute("SELECT COUNT(DISTINCT tag) FROM memory_tags").fetchone()[0]
+            rows = self._conn.execute(query, params).fetchall()
+        return distinct, rows
+
+    def memory_type_counts(self) -> Dict[Optional[str], int]:
+        """Return the number of memories per memory type; untyped memories are counted under None."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT NULLIF(memory_type, ''), COUNT(*) FROM memories GROUP BY 1"
+            ).fetchall()
+        return dict(rows)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
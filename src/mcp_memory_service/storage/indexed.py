@@ -0,0 +1,677 @@
+"""
+MCP Memory Service
+Copyright (c) 2024 Heinrich Krupp
+Licensed under the MIT License. See LICENSE file in the project root for full license text.
+"""
+import asyncio
+import contextvars
+import functools
+import time
+import traceback
+import logging
+from abc import abstractmethod
+from typing import List, Dict, Any, Tuple, Set, Optional, Callable, Iterator, AsyncIterator, Sequence
+from datetime import datetime, date
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import numpy as np
+
+from .base import MemoryStorage
+from ..config import (
+    STORAGE_THREAD_WORKERS,
+    QUERY_EMBEDDING_CACHE_SIZE,
+    QUERY_EMBEDDING_CACHE_MAX_BYTES,
+    RESULT_CACHE_SIZE,
+    RESULT_CACHE_TTL,
+    FILTER_OVERFETCH_FACTOR,
+    HYBRID_CANDIDATE_FACTOR,
+    HYBRID_RRF_K,
+    SCAN_BATCH_SIZE
+)
+from .embeddings import load_sentence_transformer
+from .common import (
+    encode_cursor,
+    decode_cursor,
+    format_metadata,
+    sanitize_tags,
+    summarize_near_duplicates,
+    MemoryFilter,
+    SEARCH_MODES,
+    reciprocal_rank_fusion
+)
+from ..models.memory import Memory, MemoryQueryResult
+from ..utils.cache import LRUCache
+from ..utils.performance import timed
+from ..utils.system_detection import get_optimal_embedding_settings
+
+logger = logging.getLogger(__name__)
+
+# (content_hash, content, metadata) of a memory about to be written
+MemoryRow = Tuple[str, str, Dict[str, Any]]
+
+
+class IndexedMemoryStorage(MemoryStorage):
+    """
+    Storage backend logic shared by ChromaMemoryStorage and SQLiteMemoryStorage.
+
+    Both keep memories keyed by content hash next to a MemoryIndex of tags,
+    timestamps, memory types and keywords, embed with one shared model and run
+    every blocking call on a dedicated thread pool. Everything resolved through
+    that index (tag search, time windows, paging, keyword search, deletes) and
+    the model, caching and result plumbing lives here; a backend only supplies
+    access to its stored rows and vectors through the abstract methods below.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.model = None
+        self.embedding_function = None
+        self._model_future: Optional[Future] = None
+        self.index = None
+        self.stats = None
+        self._embedding_dimension = None
+        self.query_embedding_cache = LRUCache(
+            max_entries=QUERY_EMBEDDING_CACHE_SIZE,
+            max_bytes=QUERY_EMBEDDING_CACHE_MAX_BYTES,
+            sizeof=lambda embedding: embedding.nbytes
+        )
+        # Query results are cached per write generation; every write bumps it
+        self.result_cache = LRUCache(max_entries=RESULT_CACHE_SIZE, ttl=RESULT_CACHE_TTL)
+        self._write_generation = 0
+        self.embedding_settings = get_optimal_embedding_settings()
+
+        # Dedicated pool for blocking storage queries and model inference
+        self._executor = ThreadPoolExecutor(
+            max_workers=STORAGE_THREAD_WORKERS,
+            thread_name_prefix="memory-storage"
+        )
+
+    # Model loader used by _initialize_embedding_model
+    _load_sentence_transformer = staticmethod(load_sentence_transformer)
+
+    @abstractmethod
+    def _initialize_embedding_model(self):
+        """Load the embedding model, setting model and embedding_function."""
+
+    @abstractmethod
+    def _embed_documents(self, documents: List[str]) -> Any:
+        """Embed documents in one batched forward pass, in the form _write expects."""
+
+    @abstractmethod
+    def _existing(self, content_hashes: Sequence[str]) -> Set[str]:
+        """Return the subset of content_hashes that are stored."""
+
+    @abstractmethod
+    def _write(self, rows: List[MemoryRow], embeddings: Any):
+        """Store (content_hash, content, metadata) rows with their embeddings and index them."""
+
+    @abstractmethod
+    def _remove(self, memory_ids: List[str]):
+        """Delete memories together with their index entries (and vectors)."""
+
+    @abstractmethod
+    async def _get_memories(self, memory_ids: List[str]) -> List[Memory]:
+        """Fetch memories by ID, preserving the order of memory_ids."""
+
+    @abstractmethod
+    async def _search(
+        self,
+        query: str,
+        n_results: int,
+        memory_filter: MemoryFilter,
+        start_timestamp: Optional[float] = None,
+        end_timestamp: Optional[float] = None
+    ) -> List[MemoryQueryResult]:
+        """Semantic search restricted to a time window and memory filter."""
+
+    @abstractmethod
+    def iter_memories(
+        self,
+        batch_size: int = SCAN_BATCH_SIZE,
+        include: Sequence[str] = ("metadatas",)
+    ) -> Iterator[Dict[str, Any]]:
+        """Yield every memory one page at a time as {"ids": [...], "metadatas": [...], ...}."""
+
+    @abstractmethod
+    async def find_near_duplicates(self, similarity_threshold: float) -> List[Dict[str, Any]]:
+        """Cluster memories whose embeddings are at least similarity_threshold cosine-similar."""
+
+    @abstractmethod
+    async def _cleanup_exact_duplicates(self, dry_run: bool) -> Tuple[int, str]:
+        """Remove memories with the same content hash. Returns (count_removed, message)."""
+
+    def _unavailable_reason(self) -> Optional[str]:
+        """Why the storage cannot serve requests, or None when it can."""
+        return None
+
+    def _start_model_loading(self, lazy_model_loading: bool):
+        """Load the embedding model now, or on the storage thread pool with lazy_model_loading."""
+        if lazy_model_loading:
+            logger.info("Loading embedding model in the background")
+            self._model_future = self._executor.submit(self._initialize_embedding_model)
+        else:
+            self._initialize_embedding_model()
+
+    @property
+    def model_ready(self) -> bool:
+        """Whether the embedding model has finished loading."""
+        return self._model_future is None or self._model_future.done()
+
+    async def wait_for_model(self):
+        """Wait for a background model load to finish; returns at once when loaded eagerly."""
+        if not self.model_ready:
+            await asyncio.wrap_future(self._model_future)
+
+    async def run_in_executor(self, func: Callable, *args, **kwargs) -> Any:
+        """
+        Run a blocking storage or embedding call on the storage thread pool.
+
+        Runs in a copy of the caller's context, so the time is counted as
+        storage time of the current tool call (see utils.performance).
+        """
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()
+        with timed("pool"):
+            return await loop.run_in_executor(self._executor, functools.partial(context.run, func, *args, **kwargs))
+
+    def get_embedding_dimension(self) -> int:
+        """Dimension of the active embedding function, computed once and cached."""
+        if self._embedding_dimension is None:
+            if self.model is not None:
+                self._embedding_dimension = self.model.embedding_dimension
+            else:
+                self._embedding_dimension = len(self.embedding_function(["dimension probe"])[0])
+        return self._embedding_dimension
+
+    def embed_query(self, query: str) -> np.ndarray:
+        """
+        Embed a search query, reusing cached embeddings for repeated queries.
+
+        The cache is keyed by model name and whitespace-normalized query text and
+        holds float32 vectors.
+        """
+        key = (self.model.model_name, " ".join(query.split()))
+        embedding = self.query_embedding_cache.get(key)
+        if embedding is None:
+            with timed("embedding"):
+                embedding = np.asarray(self.model.encode(query, convert_to_numpy=True), dtype=np.float32)
+            self.query_embedding_cache.put(key, embedding)
+        return embedding
+
+    def _bump_write_generation(self):
+        """
+        Invalidate cached query results after a write.
+
+        Called once the write has completed, so a query that raced with the write
+        caches its result under the old generation where it will never be served.
+        """
+        self._write_generation += 1
+
+    async def refresh_stats(self) -> bool:
+        """Recompute the cached statistics if there were writes since the last refresh."""
+        generation = self._write_generation
+        if not self.stats.is_stale(generation):
+            return False
+        await self.run_in_executor(self.stats.refresh, generation)
+        return True
+
+    def close(self):
+        """Shut down the storage thread pool and close the index."""
+        self._executor.shutdown(wait=False)
+        if self.index is not None:
+            self.index.close()
+
+    def sanitized(self, tags):
+        """Normalize comma-separated or list tags into the stored JSON string."""
+        return sanitize_tags(tags)
+
+    async def aiter_memories(
+        self,
+        batch_size: int = SCAN_BATCH_SIZE,
+        include: Sequence[str] = ("metadatas",)
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Async version of iter_memories that reads each page on the storage thread pool."""
+        pages = self.iter_memories(batch_size, include)
+        while True:
+            page = await self.run_in_executor(next, pages, None)
+            if page is None:
+                return
+            yield page
+
+    async def store(self, memory: Memory) -> Tuple[bool, str]:
+        """Store a memory through store_batch, which embeds it with the model."""
+        return (await self.store_batch([memory]))[0]
+
+    async def store_batch(self, memories: List[Memory]) -> List[Tuple[bool, str]]:
+        """
+        Store several memories with one duplicate check, one embedding pass and one write.
+
+        Returns:
+            A (success, message) tuple per input memory, in input order.
+        """
+        reason = self._unavailable_reason()
+        if reason is not None:
+            error_msg = f"{reason}, cannot store memories"
+            logger.error(error_msg)
+            return [(False, error_msg)] * len(memories)
+
+        results: List[Optional[Tuple[bool, str]]] = [None] * len(memories)
+
+        # Duplicates within the batch keep the first occurrence
+        pending: Dict[str, int] = {}
+        for i, memory in enumerate(memories):
+            if memory.content_hash in pending:
+                results[i] = (False, "Duplicate content detected")
+            else:
+                pending[memory.content_hash] = i
+
+        try:
+            # Duplicates already stored, resolved with a single lookup
+            if pending:
+                for content_hash in await self.run_in_executor(self._existing, list(pending)):
+                    results[pending.pop(content_hash)] = (False, "Duplicate content detected")
+
+            rows: List[MemoryRow] = []
+            for content_hash, i in pending.items():
+                try:
+                    metadata = format_metadata(memories[i])
+                    metadata.update(memories[i].metadata)
+                except Exception as e:
+                    results[i] = (False, f"Error storing memory: {str(e)}")
+                    continue
+                rows.append((content_hash, memories[i].content, metadata))
+
+            if rows:
+                # One batched forward pass for every new document
+                await self.wait_for_model()
+                embeddings = await self.run_in_executor(self._embed_documents, [content for _, content, _ in rows])
+                await self.run_in_executor(self._write, rows, embeddings)
+                self._bump_write_generation()
+                for content_hash, _, _ in rows:
+                    results[pending[content_hash]] = (True, f"Successfully stored memory with ID: {content_hash}")
+
+        except Exception as e:
+            error_msg = f"Error storing memory: {str(e)}"
+            logger.error(error_msg)
+            for i, result in enumerate(results):
+                if result is None:
+                    results[i] = (False, error_msg)
+
+        return results
+
+    async def _lexical_search(self, query: str, n_results: int, memory_filter: MemoryFilter) -> List[MemoryQueryResult]:
+        """
+        Rank memories by BM25 keyword relevance through the side index.
+
+        With a filter, FILTER_OVERFETCH_FACTOR times more hits are fetched per
+        round until n_results pass it or the matching memories run out.
+        """
+        fetch = n_results * FILTER_OVERFETCH_FACTOR if memory_filter else n_results
+        while True:
+            hits = await self.run_in_executor(self.index.search_terms, query, fetch)
+            scores = dict(hits)
+            memory_results = [
+                MemoryQueryResult(memory=memory, relevance_score=scores[memory.content_hash])
+                for memory in await self._get_memories([memory_id for memory_id, _ in hits])
+                if memory_filter.matches(memory)
+            ]
+            if len(memory_results) >= n_results or len(hits) < fetch:
+                return memory_results[:n_results]
+            fetch *= FILTER_OVERFETCH_FACTOR
+
+    async def _hybrid_search(self, query: str, n_results: int, memory_filter: MemoryFilter) -> List[MemoryQueryResult]:
+        """Fuse the semantic and keyword rankings with reciprocal-rank fusion; scores are the fused RRF scores."""
+        depth = n_results * HYBRID_CANDIDATE_FACTOR
+        rankings = [
+            await self._search(query, depth, memory_filter),
+            await self._lexical_search(query, depth, memory_filter)
+        ]
+        memories = {result.memory.content_hash: result.memory for ranking in rankings for result in ranking}
+        fused = reciprocal_rank_fusion(
+            [[result.memory.content_hash for result in ranking] for ranking in rankings], HYBRID_RRF_K
+        )
+        return [
+            MemoryQueryResult(memory=memories[memory_id], relevance_score=score)
+            for memory_id, score in fused[:n_results]
+        ]
+
+    async def retrieve(
+        self,
+        query: str,
+        n_results: int = 5,
+        tags: Optional[List[str]] = None,
+        match_all: bool = False,
+        memory_type: Optional[str] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+        mode: str = "semantic"
+    ) -> List[MemoryQueryResult]:
+        """
+        Retrieve memories by semantic search (see the backend's _search).
+
+        With tags, memory_type or metadata, only memories passing that filter
+        (see MemoryFilter) are searched, so up to n_results matching memories
+        are still returned.
+
+        mode "lexical" ranks by BM25 keyword relevance instead, which finds
+        identifiers, error codes and paths that embeddings blur; "hybrid" fuses
+        both rankings with reciprocal-rank fusion.
+
+        Raises:
+            ValueError: If the metadata filter or mode is invalid.
+        """
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Unknown search mode: {mode}. Expected one of {', '.join(SEARCH_MODES)}")
+        memory_filter = MemoryFilter.create(tags, match_all, memory_type, metadata)
+        try:
+            reason = self._unavailable_reason()
+            if reason is not None:
+                logger.error(f"{reason}, cannot retrieve memories")
+                return []
+
+            if mode != "lexical":
+                await self.wait_for_model()
+                if self.embedding_function is None:
+                    logger.error("Embedding function not initialized, cannot retrieve memories")
+                    return []
+
+            cache_key = ("retrieve", query, n_results, memory_filter, mode, self._write_generation)
+            cached = self.result_cache.get(cache_key)
+            if cached is not None:
+                return list(cached)
+
+            start_time = time.time()
+            if mode == "lexical":
+                memory_results = await self._lexical_search(query, n_results, memory_filter)
+            elif mode == "hybrid":
+                memory_results = await self._hybrid_search(query, n_results, memory_filter)
+            else:
+                memory_results = await self._search(query, n_results, memory_filter)
+            logger.debug(f"Query completed in {time.time() - start_time:.4f}s")
+
+            self.result_cache.put(cache_key, memory_results)
+            return list(memory_results)
+
+        except Exception as e:
+            logger.error(f"Error retrieving memories: {str(e)}")
+            logger.error(traceback.format_exc())
+            return []
+
+    async def recall(
+        self,
+        query: Optional[str] = None,
+        n_results: int = 5,
+        start_timestamp: Optional[float] = None,
+        end_timestamp: Optional[float] = None,
+        tags: Optional[List[str]] = None,
+        match_all: bool = False,
+        memory_type: Optional[str] = None,
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> List[MemoryQueryResult]:
+        """
+        Retrieve memories with combined time filtering and optional semantic search.
+
+        The time window is resolved through the timestamp index and semantic
+        search is restricted to it (see the backend's _search). Time-only
+        results are returned newest first.
+
+        Args:
+            query: Optional semantic search query. If None, only time filtering is applied.
+            n_results: Maximum number of results to return.
+            start_timestamp: Optional start time for filtering.
+            end_timestamp: Optional end time for filtering.
+            tags, match_all, memory_type, metadata: Optional filter, see MemoryFilter.
+
+        Returns:
+            List of MemoryQueryResult objects.
+
+        Raises:
+            ValueError: If the metadata filter is invalid.
+        """
+        memory_filter = MemoryFilter.create(tags, match_all, memory_type, metadata)
+        try:
+            reason = self._unavailable_reason()
+            if reason is not None:
+                logger.error(f"{reason}, cannot retrieve memories")
+                return []
+
+            cache_key = ("recall", query, n_results, start_timestamp, end_timestamp, memory_filter, self._write_generation)
+            cached = self.result_cache.get(cache_key)
+            if cached is not None:
+                return list(cached)
+
+            # Determine whether to use semantic search or just time-based filtering
+            if query:
+                try:
+                    await self.wait_for_model()
+                    if self.embedding_function is None:
+                        raise RuntimeError("Embedding model is not initialized")
+                    memory_results = await self._search(
+                        query, n_results, memory_filter, start_timestamp, end_timestamp
+                    )
+                    self.result_cache.put(cache_key, memory_results)
+                    return list(memory_results)
+                except Exception as query_error:
+                    logger.error(f"Error in semantic search: {str(query_error)}")
+                    # Fall back to time-based retrieval on error
+                    logger.info("Falling back to time-based retrieval")
+
+            # Time-based filtering only (or fallback from failed semantic search)
+            memory_results = [
+                # For time-based retrieval, we don't have a relevance score
+                MemoryQueryResult(memory=memory, relevance_score=None)
+                for memory in await self._recent_memories(n_results, memory_filter, start_timestamp, end_timestamp)
+            ]
+
+            self.result_cache.put(cache_key, memory_results)
+            return list(memory_results)
+
+        except Exception as e:
+            logger.error(f"Error in recall: {str(e)}")
+            logger.error(traceback.format_exc())
+            return []
+
+    async def recall_page(
+        self,
+        start_timestamp: Optional[float] = None,
+        end_timestamp: Optional[float] = None,
+        page_size: int = 10,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[MemoryQueryResult], Optional[str]]:
+        """
+        Return one page of memories stored in a time window, newest first.
+
+        Pages are keyset-paginated on (timestamp, content_hash) through the
+        timestamp index, so each page costs one bounded index scan plus a fetch of
+        page_size rows however deep into the window it is.
+
+        Args:
+            start_timestamp: Optional start time for filtering.
+            end_timestamp: Optional end time for filtering.
+            page_size: Maximum number of memories on the page.
+            cursor: Cursor returned with the previous page, None for the first page.
+
+        Returns:
+            Tuple of (results, next_cursor); next_cursor is None on the last page.
+
+        Raises:
+            ValueError: If the cursor is malformed.
+        """
+        after = decode_cursor(cursor) if cursor else None
+        try:
+            reason = self._unavailable_reason()
+            if reason is not None:
+                logger.error(f"{reason}, cannot retrieve memories")
+                return [], None
+
+            # One extra row tells us whether another page follows
+            rows = await self.run_in_executor(
+                self.index.page_by_time_range, start_timestamp, end_timestamp, page_size + 1, after
+            )
+            page, has_more = rows[:page_size], len(rows) > page_size
+            memories = await self._get_memories([content_hash for content_hash, _ in page])
+
+            next_cursor = None
+            if has_more and page:
+                last_hash, last_timestamp = page[-1]
+                next_cursor = encode_cursor(last_timestamp, last_hash)
+
+            return [MemoryQueryResult(memory=memory, relevance_score=None) for memory in memories], next_cursor
+
+        except Exception as e:
+            logger.error(f"Error in recall_page: {str(e)}")
+            logger.error(traceback.format_exc())
+            return [], None
+
+    async def _recent_memories(
+        self,
+        n_results: int,
+        memory_filter: MemoryFilter,
+        start_timestamp: Optional[float],
+        end_timestamp: Optional[float]
+    ) -> List[Memory]:
+        """Newest memories in a time window that pass the memory filter."""
+        memory_ids = await self.run_in_executor(
+            self.index.find_matching,
+            memory_filter.tags,
+            memory_filter.match_all,
+            memory_filter.memory_type,
+            start_timestamp,
+            end_timestamp,
+            n_results if memory_filter.indexed else None
+        )
+        if memory_filter.indexed:
+            return await self._get_memories(memory_ids)
+
+        # Metadata conditions aren't indexed, so check candidates newest first a page at a time
+        memories: List[Memory] = []
+        for offset in range(0, len(memory_ids), SCAN_BATCH_SIZE):
+            for memory in await self._get_memories(memory_ids[offset:offset + SCAN_BATCH_SIZE]):
+                if memory_filter.matches(memory):
+                    memories.append(memory)
+                    if len(memories) == n_results:
+                        return memories
+        return memories
+
+    async def search_by_tag(self, tags: List[str], match_all: bool = False) -> List[Memory]:
+        """Search memories by tags using the tag index. Matches ANY tag unless match_all is set."""
+        try:
+            search_tags = [str(tag).strip() for tag in tags if str(tag).strip()]
+            memory_ids = await self.run_in_executor(self.index.find_by_tags, search_tags, match_all)
+            return await self._get_memories(memory_ids)
+        except Exception as e:
+            logger.error(f"Error searching by tags: {e}")
+            return []
+
+    async def _delete_ids(self, memory_ids: List[str]):
+        """Delete memories by ID in bounded chunks, together with their index entries."""
+        for offset in range(0, len(memory_ids), SCAN_BATCH_SIZE):
+            await self.run_in_executor(self._remove, memory_ids[offset:offset + SCAN_BATCH_SIZE])
+        self._bump_write_generation()
+
+    async def delete(self, content_hash: str) -> Tuple[bool, str]:
+        """Delete a memory by its hash."""
+        try:
+            if not await self.run_in_executor(self._existing, [content_hash]):
+                return False, f"No memory found with hash {content_hash}"
+
+            await self._delete_ids([content_hash])
+            return True, f"Successfully deleted memory with hash {content_hash}"
+        except Exception as e:
+            logger.error(f"Error deleting memory: {str(e)}")
+            return False, f"Error deleting memory: {str(e)}"
+
+    async def delete_by_tag(self, tag: str) -> Tuple[int, str]:
+        """Deletes memories that match the specified tag."""
+        try:
+            ids_to_delete = await self.run_in_executor(self.index.find_by_tags, [tag])
+            if not ids_to_delete:
+                return 0, f"No memories found with tag: {tag}"
+
+            await self._delete_ids(ids_to_delete)
+            return len(ids_to_delete), f"Successfully deleted {len(ids_to_delete)} memories with tag: {tag}"
+        except Exception as e:
+            logger.error(f"Error deleting memories by tag: {e}")
+            return 0, f"Error deleting memories by tag: {e}"
+
+    async def _find_by_timeframe(
+        self,
+        start_timestamp: Optional[float],
+        end_timestamp: Optional[float],
+        tag: Optional[str] = None
+    ) -> List[str]:
+        """Resolve a time window, optionally restricted to one tag, through the side index."""
+        memory_ids = await self.run_in_executor(self.index.find_by_time_range, start_timestamp, end_timestamp)
+        if tag is not None:
+            tagged = set(await self.run_in_executor(self.index.find_by_tags, [tag]))
+            memory_ids = [memory_id for memory_id in memory_ids if memory_id in tagged]
+        return memory_ids
+
+    async def delete_by_timeframe(self, start_date: date, end_date: Optional[date] = None, tag: Optional[str] = None) -> Tuple[int, str]:
+        """Delete memories within a timeframe and optionally filtered by tag."""
+        try:
+            if end_date is None:
+                end_date = start_date
+
+            start_timestamp = datetime(start_date.year, start_date.month, start_date.day, 0, 0, 0).timestamp()
+            end_timestamp = datetime(end_date.year, end_date.month, end_date.day, 23, 59, 59).timestamp()
+
+            ids_to_delete = await self._find_by_timeframe(start_timestamp, end_timestamp, tag)
+            if not ids_to_delete:
+                return 0, "No memories found matching the criteria."
+
+            await self._delete_ids(ids_to_delete)
+            tag_note = f" with tag: {tag}" if tag is not None else ""
+            return len(ids_to_delete), (
+                f"Successfully deleted {len(ids_to_delete)} memories from {start_date} to {end_date}{tag_note}"
+            )
+
+        except Exception as e:
+            logger.exception("Error deleting memories by timeframe:")
+            return 0, f"Error deleting memories by timeframe: {str(e)}"
+
+    async def delete_before_date(self, before_date: date, tag: Optional[str] = None) -> Tuple[int, str]:
+        """Delete memories before a given date and optionally filtered by tag."""
+        try:
+            before_timestamp = datetime(before_date.year, before_date.month, before_date.day, 23, 59, 59).timestamp()
+
+            ids_to_delete = await self._find_by_timeframe(None, before_timestamp, tag)
+            if not ids_to_delete:
+                return 0, "No memories found matching the criteria."
+
+            await self._delete_ids(ids_to_delete)
+            tag_note = f" with tag: {tag}" if tag is not None else ""
+            return len(ids_to_delete), (
+                f"Successfully deleted {len(ids_to_delete)} memories up to {before_date}{tag_note}"
+            )
+
+        except Exception as e:
+            logger.exception("Error deleting memories before date:")
+            return 0, f"Error deleting memories before date: {str(e)}"
+
+    async def cleanup_duplicates(
+        self,
+        similarity_threshold: Optional[float] = None,
+        dry_run: bool = False
+    ) -> Tuple[int, str]:
+        """
+        Remove duplicate memories.
+
+        By default only exact content-hash duplicates are removed. With a
+        similarity_threshold, memories whose embeddings are at least that
+        cosine-similar are clustered and all but the oldest memory of each
+        cluster are removed; the message lists the clusters. With dry_run
+        nothing is deleted and the count is what would have been removed.
+        """
+        try:
+            if similarity_threshold is None:
+                return await self._cleanup_exact_duplicates(dry_run)
+
+            clusters = await self.find_near_duplicates(similarity_threshold)
+            duplicates = [memory["content_hash"] for cluster in clusters for memory in cluster["duplicates"]]
+            if duplicates and not dry_run:
+                await self._delete_ids(duplicates)
+            return len(duplicates), summarize_near_duplicates(clusters, similarity_threshold, dry_run)
+
+        except Exception as e:
+            logger.error(f"Error cleaning up duplicates: {str(e)}")
+            return 0, f"Error cleaning up duplicates: {str(e)}"
@@ -0,0 +1,160 @@
+"""
+MCP Memory Service
+Copyright (c) 2024 Heinrich Krupp
+Licensed under the MIT License. See LICENSE file in the project root for full license text.
+"""
+import logging
+import os
+from typing import Optional
+
+import numpy as np
+
+from ..utils.similarity import normalize_rows
+
+logger = logging.getLogger(__name__)
+
+# Saved next to the store it was fitted on
+PROJECTION_FILENAME = "projection.npz"
+
+REDUCTION_METHODS = ("pca", "truncate")
+
+# PCA is fitted once there are this many memories per reduced dimension, on a
+# sample of at most PCA_MAX_SAMPLES of them
+MIN_SAMPLES_PER_DIMENSION = 4
+PCA_MAX_SAMPLES = 20000
+
+
+class EmbeddingProjection:
+    """
+    Linear map from full embeddings to a smaller search dimension.
+
+    "pca" centres the vectors on the fitted mean and projects them onto the
+    top principal components; "truncate" keeps the leading dimensions, which
+    is only meaningful for Matryoshka-trained models. Projected vectors are
+    unit length, so their dot product approximates the full cosine similarity.
+    """
+
+    def __init__(
+        self,
+        method: str,
+        source_dimension: int,
+        dimensions: int,
+        mean: Optional[np.ndarray] = None,
+        components: Optional[np.ndarray] = None,
+        sample_size: int = 0
+    ):
+        if method not in REDUCTION_METHODS:
+            raise ValueError(f"Unknown reduction method {method!r}, expected one of {', '.join(REDUCTION_METHODS)}")
+        if not 0 < dimensions <= source_dimension:
+            raise ValueError(f"Cannot reduce {source_dimension}-dimensional embeddings to {dimensions} dimensions")
+        self.method = method
+        self.source_dimension = source_dimension
+        self.dimensions = dimensions
+        self.mean = mean
+        self.components = components
+        self.sample_size = sample_size
+
+    @classmethod
+    def fit_pca(
+        cls,
+        embeddings: np.ndarray,
+        dimensions: int,
+        max_samples: int = PCA_MAX_SAMPLES,
+        seed: int = 0
+    ) -> "EmbeddingProjection":
+        """Fit the top principal components of the (unit-normalized) embeddings."""
+        embeddings = normalize_rows(embeddings)
+        if len(embeddings) < dimensions:
+            raise ValueError(f"Need at least {dimensions} embeddings to fit {dimensions} components")
+        if len(embeddings) > max_samples:
+            sample = np.random.default_rng(seed).choice(len(embeddings), max_samples, replace=False)
+            embeddings = embeddings[sample]
+        mean = embeddings.mean(axis=0)
+        _, _, vt = np.linalg.svd(embeddings - mean, full_matrices=False)
+        return cls(
+            "pca",
+            embeddings.shape[1],
+            dimensions,
+            mean=mean.astype(np.float32),
+            components=np.ascontiguousarray(vt[:dimensions].T, dtype=np.float32),
+            sample_size=len(embeddings)
+        )
+
+    @classmethod
+    def truncation(cls, source_dimension: int, dimensions: int) -> "EmbeddingProjection":
+        """Keep the leading dimensions of Matryoshka embeddings."""
+        return cls("truncate", source_dimension, dimensions)
+
+    def transform(self, vectors: np.ndarray) -> np.ndarray:
+        """Project a matrix of full embeddings to unit-length reduced rows."""
+        vectors = normalize_rows(np.reshape(vectors, (-1, self.source_dimension)))
+        if self.method == "truncate":
+            return normalize_rows(vectors[:, :self.dimensions])
+        return normalize_rows((vectors - self.mean) @ self.components)
+
+    def save(self, path: str):
+        """Write the projection to an .npz file, replacing it atomically."""
+        arrays = {
+            "method": np.array(self.method),
+            "shape": np.array([self.source_dimension, self.dimensions, self.sample_size])
+        }
+        if self.method == "pca":
+            arrays.update(mean=self.mean, components=self.components)
+        temp_path = f"{path}.tmp.npz"
+        np.savez(temp_path, **arrays)
+        os.replace(temp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> Optional["EmbeddingProjection"]:
+        """Read a saved projection; None if the file is missing or unreadable."""
+        if not os.path.exists(path):
+            return None
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                source_dimension, dimensions, sample_size = (int(value) for value in data["shape"])
+                method = str(data["method"])
+                return cls(
+                    method,
+                    source_dimension,
+                    dimensions,
+                    mean=data["mean"] if method == "pca" else None,
+                    components=data["components"] if method == "pca" else None,
+                    sample_size=sample_size
+                )
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable embedding projection {path}: {str(e)}")
+            return None
+
+
+def fit_projection(embeddings: np.ndarray, dimensions: int, method: str) -> Optional[EmbeddingProjection]:
+    """
+    Fit a projection of the stored embeddings to dimensions.
+
+    Returns None when there is nothing to reduce: no embeddings yet, a target
+    at least as large as the embeddings, or (for PCA) fewer than
+    MIN_SAMPLES_PER_DIMENSION memories per reduced dimension.
+    """
+    if not len(embeddings) or dimensions >= embeddings.shape[1]:
+        return None
+    if method == "truncate":
+        return EmbeddingProjection.truncation(embeddings.shape[1], dimensions)
+    if len(embeddings) < dimensions * MIN_SAMPLES_PER_DIMENSION:
+        return None
+    return EmbeddingProjection.fit_pca(embeddings, dimensions)
+
+
+def next_fit_size(projection: Optional[EmbeddingProjection], count: int, dimensions: int) -> float:
+    """
+    Store size at which the projection should be fitted (again).
+
+    A missing projection is retried once enough memories were added, a PCA
+    projection is refitted each time the store doubles past its sample size
+    (until the sample is capped), and a truncation never needs refitting.
+    """
+    if not dimensions:
+        return float("inf")
+    if projection is None:
+        return max(dimensions * MIN_SAMPLES_PER_DIMENSION, 2 * count)
+    if projection.method == "pca" and projection.sample_size < PCA_MAX_SAMPLES:
+        return 2 * projection.sample_size
+    return float("inf")
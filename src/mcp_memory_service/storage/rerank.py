@@ -0,0 +1,138 @@
+"""
+MCP Memory Service
+Copyright (c) 2024 Heinrich Krupp
+Licensed under the MIT License. See LICENSE file in the project root for full license text.
+"""
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple, TYPE_CHECKING
+
+from ..config import RERANK_MODEL, RERANK_BATCH_SIZE, RERANK_CACHE_SIZE
+from ..models.memory import MemoryQueryResult
+from ..utils.cache import LRUCache
+
+if TYPE_CHECKING:
+    from sentence_transformers import CrossEncoder
+
+logger = logging.getLogger(__name__)
+
+
+def load_cross_encoder(model_name: str) -> "CrossEncoder":
+    """Load a cross-encoder on the CPU."""
+    # Imported here so the server doesn't pay for importing transformers unless reranking is used
+    from sentence_transformers import CrossEncoder
+    return CrossEncoder(model_name, device="cpu")
+
+
+class CrossEncoderReranker:
+    """
+    Second retrieval stage that rescores (query, memory) pairs with a cross-encoder.
+
+    The model loads in a background thread on first use; until it is ready,
+    and whenever scoring runs past the request's time budget, the first-stage
+    order is returned unchanged. Scores are cached by (query, content hash),
+    so a repeated query only scores memories it hasn't seen.
+    """
+
+    def __init__(
+        self,
+        model_name: str = RERANK_MODEL,
+        batch_size: int = RERANK_BATCH_SIZE,
+        cache_size: int = RERANK_CACHE_SIZE,
+        loader: Callable[[str], Any] = load_cross_encoder
+    ):
+        self.model_name = model_name
+        self.batch_size = max(1, batch_size)
+        self.model = None
+        self.load_error: Optional[str] = None
+        self.score_cache = LRUCache(cache_size)
+        self._loader = loader
+        self._lock = threading.Lock()
+        # Separate from self._lock, which load() holds while the model loads
+        self._loading_lock = threading.Lock()
+        self._loading: Optional[threading.Thread] = None
+
+    def load(self):
+        """Load the cross-encoder now, in the calling thread. Load errors are logged, not raised."""
+        with self._lock:
+            if self.model is not None or self.load_error is not None:
+                return
+            try:
+                start_time = time.time()
+                self.model = self._loader(self.model_name)
+                logger.info(f"Loaded reranking model {self.model_name} in {time.time() - start_time:.2f}s")
+            except Exception as e:
+                self.load_error = str(e)
+                logger.warning(f"Failed to load reranking model {self.model_name}: {str(e)}")
+
+    def _start_loading(self):
+        with self._loading_lock:
+            if self._loading is None and self.model is None:
+                self._loading = threading.Thread(target=self.load, name="rerank-model-loader", daemon=True)
+                self._loading.start()
+
+    def rerank(
+        self,
+        query: str,
+        results: List[MemoryQueryResult],
+        n_results: int,
+        budget_seconds: float
+    ) -> Tuple[List[MemoryQueryResult], bool]:
+        """
+        Reorder first-stage results by cross-encoder score and keep the top n_results.
+
+        Uncached pairs are scored in batches; the budget is checked before each
+        batch, so a call can overrun it by at most one batch. Blocking, so run
+        it on the storage thread pool.
+
+        Returns:
+            (results, reranked). Reranked results carry the cross-encoder score
+            as relevance_score and the first-stage score and rank in debug_info.
+            If the model isn't available or the budget ran out, the first
+            n_results in first-stage order are returned with reranked False.
+        """
+        deadline = time.monotonic() + budget_seconds
+        self._start_loading()
+        if self.model is None:
+            return results[:n_results], False
+
+        scores: Dict[str, float] = {}
+        pending = []
+        for result in results:
+            score = self.score_cache.get((query, result.memory.content_hash))
+            if score is None:
+                pending.append(result)
+            else:
+                scores[result.memory.content_hash] = score
+
+        for offset in range(0, len(pending), self.batch_size):
+            if time.monotonic() >= deadline:
+                logger.info(f"Reranking budget of {budget_seconds * 1000:.0f}ms exhausted, keeping first-stage order")
+                return results[:n_results], False
+            batch = pending[offset:offset + self.batch_size]
+            batch_scores = self.model.predict(
+                [(query, result.memory.content) for result in batch],
+                batch_size=len(batch),
+                show_progress_bar=False
+            )
+            for result, score in zip(batch, batch_scores):
+                scores[result.memory.content_hash] = float(score)
+                self.score_cache.put((query, result.memory.content_hash), float(score))
+
+        # Stable sort: equal scores keep their first-stage order
+        ranked = sorted(
+            enumerate(results), key=lambda item: scores[item[1].memory.content_hash], reverse=True
+        )[:n_results]
+        return [
+            MemoryQueryResult(
+                memory=result.memory,
+                relevance_score=scores[result.memory.content_hash],
+                debug_info={
+                    **result.debug_info,
+                    "first_stage_score": result.relevance_score,
+                    "first_stage_rank": rank + 1
+                }
+            )
+            for rank, result in ranked
+        ], True
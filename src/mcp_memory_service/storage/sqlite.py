@@ -0,0 +1,596 @@
+"""
+MCP Memory Service
+Copyright (c) 2024 Heinrich Krupp
+Licensed under the MIT License. See LICENSE file in the project root for full license text.
+"""
+import asyncio
+import json
+import os
+import threading
+import time
+import logging
+import numpy as np
+from concurrent.futures import Future
+from typing import List, Dict, Any, Tuple, Set, Optional, Iterable, Iterator, Sequence
+
+from .indexed import IndexedMemoryStorage, MemoryRow
+from ..config import (
+    LAZY_MODEL_LOADING,
+    FILTER_OVERFETCH_FACTOR,
+    REDUCED_DIMENSIONS,
+    REDUCTION_METHOD,
+    REDUCED_CANDIDATE_FACTOR,
+    SCAN_BATCH_SIZE,
+    STATS_REFRESH_INTERVAL
+)
+from .embeddings import load_embedding_model
+from .projection import PROJECTION_FILENAME, EmbeddingProjection, fit_projection, next_fit_size
+from .index import INDEX_VERSION, STORE_FILENAME, MemoryIndex
+from .common import (
+    index_entry,
+    group_near_duplicates,
+    oldest_first,
+    memory_from_metadata,
+    MemoryFilter
+)
+from .stats import StorageStats
+from ..models.memory import Memory, MemoryQueryResult
+from ..utils.performance import timed
+from ..utils.similarity import normalize_rows, find_similar_pairs, cluster_pairs
+
+logger = logging.getLogger(__name__)
+
+# Memory contents, metadata and embeddings, next to the index tables of MemoryIndex
+STORE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS memory_data (
+    content_hash TEXT PRIMARY KEY,
+    content TEXT NOT NULL,
+    metadata TEXT NOT NULL,
+    embedding BLOB NOT NULL
+);
+"""
+
+# Content hashes per IN (...) lookup, below SQLite's default limit of 999 parameters
+LOOKUP_CHUNK = 500
+
+# (content_hash, content, metadata, embedding) as written by MemoryStore.put_many
+StoredMemory = Tuple[str, str, Dict[str, Any], np.ndarray]
+
+
+class MemoryStore(MemoryIndex):
+    """
+    Single-file SQLite database of the sqlite storage backend.
+
+    Extends the side index schema (tags, timestamps and memory types in
+    indexed tables) with a table holding each memory's content, JSON metadata
+    and float32 embedding, so one transaction writes a memory and its index
+    entries together.
+    """
+
+    def __init__(self, path: str):
+        super().__init__(path, STORE_FILENAME)
+        self._conn.executescript(STORE_SCHEMA)
+        self._conn.commit()
+        if self.get_meta("version") != INDEX_VERSION:
+            # Stores written before the keyword index existed get it filled from memory_data
+            with self._lock, self._conn:
+                self._conn.execute("DELETE FROM memory_terms")
+                self._conn.execute(
+                    "INSERT INTO memory_terms (rowid, content) "
+                    "SELECT memories.rowid, memory_data.content FROM memory_data "
+                    "JOIN memories ON memories.content_hash = memory_data.content_hash"
+                )
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO index_meta (key, value) VALUES (?, ?)", ("version", INDEX_VERSION)
+                )
+
+    def put_many(self, rows: List[StoredMemory]):
+        """Store and index several memories in one transaction."""
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO memory_data (content_hash, content, metadata, embedding) VALUES (?, ?, ?, ?)",
+                (
+                    (content_hash, content, json.dumps(metadata), np.asarray(embedding, dtype=np.float32).tobytes())
+                    for content_hash, content, metadata, embedding in rows
+                )
+            )
+            self._insert(index_entry(content_hash, metadata, content) for content_hash, content, metadata, _ in rows)
+
+    def remove(self, content_hashes: Iterable[str]):
+        """Delete memories together with their index entries."""
+        params = [(content_hash,) for content_hash in content_hashes]
+        with self._lock, self._conn:
+            self._conn.executemany("DELETE FROM memory_data WHERE content_hash = ?", params)
+            self._delete(params)
+
+    def _select(self, columns: str, content_hashes: Sequence[str]) -> List[Tuple]:
+        rows = []
+        with self._lock:
+            for offset in range(0, len(content_hashes), LOOKUP_CHUNK):
+                chunk = list(content_hashes[offset:offset + LOOKUP_CHUNK])
+                placeholders = ",".join("?" for _ in chunk)
+                rows.extend(self._conn.execute(
+                    f"SELECT content_hash, {columns} FROM memory_data WHERE content_hash IN ({placeholders})",
+                    chunk
+                ).fetchall())
+        return rows
+
+    def existing(self, content_hashes: Sequence[str]) -> Set[str]:
+        """Return the subset of content_hashes that are stored."""
+        return {row[0] for row in self._select("1", content_hashes)}
+
+    def get_many(self, content_hashes: Sequence[str]) -> Dict[str, Tuple[str, Dict[str, Any]]]:
+        """Return {content_hash: (content, metadata)} for the stored memories among content_hashes."""
+        return {
+            content_hash: (content, json.loads(metadata))
+            for content_hash, content, metadata in self._select("content, metadata", content_hashes)
+        }
+
+    def find_by_content(self, content: str) -> List[Tuple[str, Dict[str, Any]]]:
+        """Return (content, metadata) of memories whose content is exactly content."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT content, metadata FROM memory_data WHERE content = ?", (content,)
+            ).fetchall()
+        return [(document, json.loads(metadata)) for document, metadata in rows]
+
+    def page(self, after: Optional[str], limit: int) -> List[Tuple[str, str, str, bytes]]:
+        """Return up to limit (content_hash, content, metadata, embedding) rows after a content hash."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT content_hash, content, metadata, embedding FROM memory_data "
+                "WHERE content_hash > ? ORDER BY content_hash LIMIT ?",
+                (after or "", int(limit))
+            ).fetchall()
+
+    def load_embeddings(self) -> Tuple[List[str], np.ndarray]:
+        """Read every stored embedding into one float32 matrix, with content hashes by row."""
+        with self._lock:
+            rows = self._conn.execute("SELECT content_hash, embedding FROM memory_data ORDER BY rowid").fetchall()
+        if not rows:
+            return [], np.empty((0, 0), dtype=np.float32)
+        if len({len(embedding) for _, embedding in rows}) > 1:
+            raise ValueError("Stored embeddings have different dimensions; was the embedding model changed?")
+        matrix = np.frombuffer(b"".join(embedding for _, embedding in rows), dtype=np.float32)
+        return [content_hash for content_hash, _ in rows], matrix.reshape(len(rows), -1)
+
+    def get_embeddings(self, content_hashes: Sequence[str]) -> Tuple[List[str], np.ndarray]:
+        """Read the stored embeddings of the given memories, with content hashes by row."""
+        rows = self._select("embedding", content_hashes)
+        if not rows:
+            return [], np.empty((0, 0), dtype=np.float32)
+        matrix = np.frombuffer(b"".join(embedding for _, embedding in rows), dtype=np.float32)
+        return [content_hash for content_hash, _ in rows], matrix.reshape(len(rows), -1)
+
+    def timestamps(self) -> Dict[str, Optional[float]]:
+        """Return the timestamp of every memory by content hash."""
+        with self._lock:
+            return dict(self._conn.execute("SELECT content_hash, timestamp FROM memories").fetchall())
+
+    def count(self) -> int:
+        """Number of stored memories."""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM memory_data").fetchone()[0]
+
+
+class VectorTable:
+    """
+    In-memory matrix of unit-length embeddings searched by brute force.
+
+    Rows live in one float32 matrix whose capacity doubles when it fills up,
+    and a delete moves the last row into the freed slot, so the matrix stays
+    dense and a search is a single matrix-vector product. Exact, and fast
+    enough for personal memory stores of up to a few hundred thousand rows.
+
+    With a projection, added vectors and queries are projected first, so the
+    table holds (and searches) the reduced vectors only.
+    """
+
+    def __init__(self, projection: Optional[EmbeddingProjection] = None):
+        self.projection = projection
+        self._lock = threading.Lock()
+        self._ids: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._matrix = np.empty((0, 0), dtype=np.float32)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, memory_id: str) -> bool:
+        return memory_id in self._rows
+
+    @property
+    def dimension(self) -> Optional[int]:
+        """Dimension of the stored vectors, None while the table is empty."""
+        return self._matrix.shape[1] if self._ids else None
+
+    @property
+    def input_dimension(self) -> Optional[int]:
+        """Dimension of the vectors passed to add and search, None while unknown."""
+        return self.projection.source_dimension if self.projection is not None else self.dimension
+
+    def _project(self, vectors: np.ndarray) -> np.ndarray:
+        if self.projection is None:
+            return normalize_rows(vectors)
+        return self.projection.transform(vectors)
+
+    def add(self, ids: List[str], vectors: np.ndarray):
+        """Append vectors for new IDs; they are projected and normalized to unit length."""
+        if not ids:
+            return
+        vectors = self._project(vectors)
+        with self._lock:
+            size = len(self._ids)
+            if size and vectors.shape[1] != self._matrix.shape[1]:
+                raise ValueError(
+                    f"Embedding dimension mismatch: stored vectors have {self._matrix.shape[1]} "
+                    f"dimensions, got {vectors.shape[1]}"
+                )
+            needed = size + len(vectors)
+            if needed > len(self._matrix) or vectors.shape[1] != self._matrix.shape[1]:
+                matrix = np.empty((max(needed, 2 * len(self._matrix), 1024), vectors.shape[1]), dtype=np.float32)
+                if size:
+                    matrix[:size] = self._matrix[:size]
+                self._matrix = matrix
+            self._matrix[size:needed] = vectors
+            for row, memory_id in enumerate(ids, size):
+                self._rows[memory_id] = row
+            self._ids.extend(ids)
+
+    def remove(self, ids: Iterable[str]):
+        """Drop the vectors of the given IDs; unknown IDs are ignored."""
+        with self._lock:
+            for memory_id in ids:
+                row = self._rows.pop(memory_id, None)
+                if row is None:
+                    continue
+                last = len(self._ids) - 1
+                if row != last:
+                    moved = self._ids[last]
+                    self._matrix[row] = self._matrix[last]
+                    self._ids[row] = moved
+                    self._rows[moved] = row
+                self._ids.pop()
+
+    def search(
+        self,
+        query: np.ndarray,
+        k: int,
+        candidates: Optional[Sequence[str]] = None
+    ) -> List[Tuple[str, float]]:
+        """
+        Return the k most cosine-similar (id, similarity) pairs, best first.
+
+        With candidates, only those IDs are ranked.
+        """
+        query = self._project(np.reshape(query, (1, -1)))[0]
+        with self._lock:
+            if not self._ids or k <= 0:
+                return []
+            if candidates is None:
+                rows = np.arange(len(self._ids))
+                similarities = self._matrix[:len(self._ids)] @ query
+            else:
+                rows = np.fromiter(
+                    (self._rows[memory_id] for memory_id in candidates if memory_id in self._rows),
+                    dtype=np.intp
+                )
+                similarities = self._matrix[rows] @ query
+            k = min(k, len(similarities))
+            if k == 0:
+                return []
+            top = np.argpartition(-similarities, k - 1)[:k]
+            top = top[np.argsort(-similarities[top])]
+            return [(self._ids[rows[i]], float(similarities[i])) for i in top]
+
+    def snapshot(self) -> Tuple[List[str], np.ndarray]:
+        """Copy of the IDs and their (projected) vectors, by row."""
+        with self._lock:
+            return list(self._ids), self._matrix[:len(self._ids)].copy()
+
+
+def search_vectors(
+    vectors: VectorTable,
+    store: MemoryStore,
+    query: np.ndarray,
+    k: int,
+    candidates: Optional[Sequence[str]] = None,
+    candidate_factor: int = REDUCED_CANDIDATE_FACTOR
+) -> List[Tuple[str, float]]:
+    """
+    Return the k (id, similarity) pairs most similar to the query, best first.
+
+    Without a projection this is an exact search of the vector table. With
+    one, the reduced vectors shortlist k x candidate_factor memories, which
+    are reranked by their full embeddings read from the store, so the
+    similarities returned are always full-dimension cosines.
+    """
+    if vectors.projection is None:
+        return vectors.search(query, k, candidates)
+    shortlist = vectors.search(query, k * candidate_factor, candidates)
+    ids, matrix = store.get_embeddings([memory_id for memory_id, _ in shortlist])
+    if not ids or k <= 0:
+        return []
+    similarities = normalize_rows(matrix) @ normalize_rows(np.reshape(query, (1, -1)))[0]
+    k = min(k, len(similarities))
+    top = np.argpartition(-similarities, k - 1)[:k]
+    top = top[np.argsort(-similarities[top])]
+    return [(ids[i], float(similarities[i])) for i in top]
+
+
+class SQLiteMemoryStorage(IndexedMemoryStorage):
+    def __init__(self, path: str, lazy_model_loading: bool = LAZY_MODEL_LOADING):
+        """
+        Initialize single-file SQLite storage with in-memory NumPy vector search.
+
+        Memories, their metadata and float32 embeddings live in one SQLite
+        database; tags, timestamps and memory types are indexed columns of the
+        same file. Opening it does not import ChromaDB, which makes this backend
+        quicker to start.
+
+        Args:
+            path: Directory holding the database file.
+            lazy_model_loading: Load the embedding model on the storage thread pool
+                instead of blocking here. Embedding-dependent calls wait for it
+                through wait_for_model().
+        """
+        super().__init__(path)
+        self.vectors = VectorTable()
+        # Held while the vector table is written or replaced by a refit projection
+        self._vectors_lock = threading.Lock()
+        self._next_projection_fit = float("inf")
+        # Background projection refit, and the writes made since its snapshot
+        self._projection_future: Optional[Future] = None
+        self._refit_changes: Optional[List[Tuple[str, List[str], Optional[np.ndarray]]]] = None
+
+        self._start_model_loading(lazy_model_loading)
+
+        logger.info(f"Opening SQLite memory store at path: {path}")
+        start_time = time.time()
+        self.index = MemoryStore(path)
+        ids, matrix = self.index.load_embeddings()
+        self.vectors, self._next_projection_fit = self._build_vectors(ids, matrix)
+        self.stats = StorageStats(path, self.index, STATS_REFRESH_INTERVAL)
+        logger.info(f"Loaded {len(ids)} embeddings in {time.time() - start_time:.2f}s")
+
+    def _build_vectors(self, ids: List[str], matrix: np.ndarray) -> Tuple[VectorTable, float]:
+        """
+        Fill a new vector table with the stored embeddings.
+
+        With REDUCED_DIMENSIONS set, the table holds projected vectors. The
+        projection saved next to the database is reused while it matches the
+        settings and the embedding dimension; otherwise, and whenever the store
+        has outgrown it (see next_fit_size), it is fitted again and saved.
+        Returns the table and the store size at which to refit next.
+        """
+        projection = None
+        if REDUCED_DIMENSIONS:
+            projection_path = os.path.join(self.path, PROJECTION_FILENAME)
+            projection = EmbeddingProjection.load(projection_path)
+            if projection is not None and (
+                projection.dimensions != REDUCED_DIMENSIONS
+                or projection.method != REDUCTION_METHOD
+                or (len(ids) and projection.source_dimension != matrix.shape[1])
+            ):
+                projection = None
+            if projection is None or len(ids) >= next_fit_size(projection, len(ids), REDUCED_DIMENSIONS):
+                start_time = time.time()
+                fitted = fit_projection(matrix, REDUCED_DIMENSIONS, REDUCTION_METHOD)
+                if fitted is not None:
+                    fitted.save(projection_path)
+                    projection = fitted
+                    logger.info(
+                        f"Fitted {fitted.method} projection to {fitted.dimensions} dimensions "
+                        f"on {len(ids)} embeddings in {time.time() - start_time:.2f}s"
+                    )
+        vectors = VectorTable(projection)
+        vectors.add(ids, matrix)
+        return vectors, next_fit_size(projection, len(ids), REDUCED_DIMENSIONS)
+
+    def _refit_vectors(self):
+        """
+        Refit the projection on a snapshot of the store and swap in the new table.
+
+        Runs on the storage thread pool, so writes and searches go on against
+        the old table meanwhile. Writes made since the snapshot was started are
+        replayed onto the new table under the lock before it replaces the old one.
+        """
+        try:
+            vectors, next_fit = self._build_vectors(*self.index.load_embeddings())
+            with self._vectors_lock:
+                for action, ids, embeddings in self._refit_changes:
+                    if action == "add":
+                        # Writes that landed before the snapshot was read are already in it
+                        new = [row for row, memory_id in enumerate(ids) if memory_id not in vectors]
+                        vectors.add([ids[row] for row in new], embeddings[new])
+                    else:
+                        vectors.remove(ids)
+                self.vectors = vectors
+                self._next_projection_fit = next_fit
+                self._refit_changes = None
+        except Exception as e:
+            logger.error(f"Error refitting embedding projection: {str(e)}")
+            with self._vectors_lock:
+                self._refit_changes = None
+
+    async def wait_for_projection(self):
+        """Wait for a background projection refit to finish, if one is running."""
+        if self._projection_future is not None and not self._projection_future.done():
+            await asyncio.wrap_future(self._projection_future)
+
+    def _initialize_embedding_model(self):
+        """Load the embedding model with fallbacks for different hardware."""
+        self.model = load_embedding_model(self.embedding_settings, self._load_sentence_transformer)
+        if self.model is None:
+            logger.error("Failed to initialize any embedding model. Memories cannot be stored or searched.")
+        self.embedding_function = self.model
+
+    def _embed_documents(self, documents: List[str]) -> np.ndarray:
+        """Embed documents in one batched forward pass."""
+        if self.model is None:
+            raise RuntimeError("Embedding model is not initialized")
+        with timed("embedding"):
+            return np.asarray(self.model.encode(
+                documents,
+                batch_size=self.embedding_settings["batch_size"],
+                convert_to_numpy=True
+            ), dtype=np.float32)
+
+    def count(self) -> int:
+        """Number of stored memories."""
+        return self.index.count()
+
+    def iter_memories(
+        self,
+        batch_size: int = SCAN_BATCH_SIZE,
+        include: Sequence[str] = ("metadatas",)
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Yield every memory one page at a time, in content-hash order.
+
+        Pages have the same shape as ChromaMemoryStorage.iter_memories pages
+        (ids plus the included metadatas, documents and embeddings), so scans
+        work against either backend. Pages are keyset-paginated, so writes
+        during the scan don't skip rows.
+        """
+        after = None
+        while True:
+            rows = self.index.page(after, batch_size)
+            if not rows:
+                return
+            page: Dict[str, Any] = {"ids": [row[0] for row in rows]}
+            if "documents" in include:
+                page["documents"] = [row[1] for row in rows]
+            if "metadatas" in include:
+                page["metadatas"] = [json.loads(row[2]) for row in rows]
+            if "embeddings" in include:
+                page["embeddings"] = [np.frombuffer(row[3], dtype=np.float32) for row in rows]
+            yield page
+            if len(rows) < batch_size:
+                return
+            after = rows[-1][0]
+
+    def _existing(self, content_hashes: Sequence[str]) -> Set[str]:
+        """Return the subset of content_hashes that are stored."""
+        return self.index.existing(content_hashes)
+
+    def _write(self, rows: List[MemoryRow], embeddings: np.ndarray):
+        """Persist (content_hash, content, metadata) rows with their embeddings, then make them searchable."""
+        embeddings = normalize_rows(embeddings)
+        with self._vectors_lock:
+            dimension = self.vectors.input_dimension
+            if dimension is not None and embeddings.shape[1] != dimension:
+                raise ValueError(
+                    f"Embedding dimension mismatch: stored vectors have {dimension} "
+                    f"dimensions, the embedding model produces {embeddings.shape[1]}"
+                )
+            self.index.put_many([
+                (content_hash, content, metadata, embedding)
+                for (content_hash, content, metadata), embedding in zip(rows, embeddings)
+            ])
+            ids = [content_hash for content_hash, _, _ in rows]
+            self.vectors.add(ids, embeddings)
+            if self._refit_changes is not None:
+                self._refit_changes.append(("add", ids, embeddings))
+            elif len(self.vectors) >= self._next_projection_fit:
+                self._refit_changes = []
+                self._projection_future = self._executor.submit(self._refit_vectors)
+
+    def _remove(self, memory_ids: List[str]):
+        """Delete memories, their index entries and their vectors."""
+        with self._vectors_lock:
+            self.index.remove(memory_ids)
+            self.vectors.remove(memory_ids)
+            if self._refit_changes is not None:
+                self._refit_changes.append(("remove", list(memory_ids), None))
+
+    def _vector_search(
+        self,
+        query_embedding: np.ndarray,
+        k: int,
+        candidates: Optional[Sequence[str]] = None
+    ) -> List[Tuple[str, float]]:
+        """Search the vector table, reranking reduced-dimension matches with the full embeddings."""
+        return search_vectors(self.vectors, self.index, query_embedding, k, candidates)
+
+    async def _get_memories(self, memory_ids: List[str]) -> List[Memory]:
+        """Fetch memories by content hash, preserving the order of memory_ids."""
+        if not memory_ids:
+            return []
+        rows = await self.run_in_executor(self.index.get_many, memory_ids)
+        return [memory_from_metadata(*rows[memory_id]) for memory_id in memory_ids if memory_id in rows]
+
+    async def _search(
+        self,
+        query: str,
+        n_results: int,
+        memory_filter: MemoryFilter,
+        start_timestamp: Optional[float] = None,
+        end_timestamp: Optional[float] = None
+    ) -> List[MemoryQueryResult]:
+        """
+        Rank memories by cosine similarity to the query.
+
+        The time window, tags and memory type are resolved through the index
+        and only those candidates are ranked. Metadata conditions are applied
+        to the ranked results, over-fetching FILTER_OVERFETCH_FACTOR times
+        more per round until n_results pass or the candidates run out.
+        """
+        candidates = None
+        if start_timestamp is not None or end_timestamp is not None or memory_filter:
+            candidates = await self.run_in_executor(
+                self.index.find_matching,
+                memory_filter.tags,
+                memory_filter.match_all,
+                memory_filter.memory_type,
+                start_timestamp,
+                end_timestamp
+            )
+        query_embedding = await self.run_in_executor(self.embed_query, query)
+        total = len(self.vectors) if candidates is None else len(candidates)
+        fetch = n_results if memory_filter.indexed else n_results * FILTER_OVERFETCH_FACTOR
+        while True:
+            hits = await self.run_in_executor(self._vector_search, query_embedding, fetch, candidates)
+            rows = await self.run_in_executor(self.index.get_many, [memory_id for memory_id, _ in hits])
+            memory_results = [
+                MemoryQueryResult(memory=memory_from_metadata(*rows[memory_id]), relevance_score=similarity)
+                for memory_id, similarity in hits
+                if memory_id in rows
+            ]
+            if not memory_filter.indexed:
+                memory_results = [result for result in memory_results if memory_filter.matches(result.memory)]
+            if len(memory_results) >= n_results or fetch >= total:
+                return memory_results[:n_results]
+            fetch *= FILTER_OVERFETCH_FACTOR
+
+    async def _cleanup_exact_duplicates(self, dry_run: bool) -> Tuple[int, str]:
+        """Memories are keyed by content hash, so exact duplicates are rejected on store."""
+        if not await self.run_in_executor(self.index.count):
+            return 0, "No memories found in database"
+        return 0, "No duplicate memories found"
+
+    async def find_near_duplicates(self, similarity_threshold: float) -> List[Dict[str, Any]]:
+        """
+        Cluster memories whose embeddings are at least similarity_threshold cosine-similar.
+
+        Same result format as ChromaMemoryStorage.find_near_duplicates; the
+        embeddings are already in memory, so no scan of the database is needed
+        (unless the table holds reduced vectors; then the full ones are read).
+        """
+        if self.vectors.projection is None:
+            ids, matrix = await self.run_in_executor(self.vectors.snapshot)
+        else:
+            ids, matrix = await self.run_in_executor(self.index.load_embeddings)
+            matrix = normalize_rows(matrix)
+        pairs = await self.run_in_executor(find_similar_pairs, matrix, similarity_threshold)
+        if not pairs:
+            return []
+
+        stored_timestamps = await self.run_in_executor(self.index.timestamps)
+        timestamps = [stored_timestamps.get(memory_id) for memory_id in ids]
+        clusters = cluster_pairs(pairs, oldest_first(timestamps))
+        stored = await self.run_in_executor(
+            self.index.get_many, [ids[row] for rows in clusters for row in rows]
+        )
+        contents = {memory_id: content for memory_id, (content, _) in stored.items()}
+        return group_near_duplicates(ids, timestamps, matrix, clusters, contents)
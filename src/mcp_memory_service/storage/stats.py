@@ -0,0 +1,154 @@
+"""
+MCP Memory Service
+Copyright (c) 2024 Heinrich Krupp
+Licensed under the MIT License. See LICENSE file in the project root for full license text.
+"""
+import os
+import threading
+import time
+import uuid
+import logging
+from typing import Any, Dict, Optional
+
+from .index import INDEX_FILENAME, STORE_FILENAME, MemoryIndex
+
+logger = logging.getLogger(__name__)
+
+CHROMA_DB_FILENAME = "chroma.sqlite3"
+
+# Most used tags listed in the statistics
+TOP_TAGS = 10
+
+
+def _tree_size(path: str) -> int:
+    """Total size in bytes of the files under path."""
+    size = 0
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                size += _tree_size(entry.path)
+            elif entry.is_file(follow_symlinks=False):
+                size += entry.stat(follow_symlinks=False).st_size
+    return size
+
+
+def _is_segment_dir(name: str) -> bool:
+    # ChromaDB names each HNSW segment directory after the segment's UUID
+    try:
+        uuid.UUID(name)
+        return True
+    except ValueError:
+        return False
+
+
+def component_sizes(path: str) -> Dict[str, Any]:
+    """Break the size of a storage directory down into database, index and HNSW files."""
+    components: Dict[str, Any] = {
+        "chroma_sqlite_bytes": 0,
+        "memory_index_bytes": 0,
+        "memory_store_bytes": 0,
+        "hnsw_segments_bytes": {},
+        "other_bytes": 0
+    }
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                size = _tree_size(entry.path)
+                if _is_segment_dir(entry.name):
+                    components["hnsw_segments_bytes"][entry.name] = size
+                else:
+                    components["other_bytes"] += size
+                continue
+            if not entry.is_file(follow_symlinks=False):
+                continue
+            size = entry.stat(follow_symlinks=False).st_size
+            # Prefix matches also count SQLite -wal and -shm files
+            if entry.name.startswith(CHROMA_DB_FILENAME):
+                components["chroma_sqlite_bytes"] += size
+            elif entry.name.startswith(INDEX_FILENAME):
+                components["memory_index_bytes"] += size
+            elif entry.name.startswith(STORE_FILENAME):
+                components["memory_store_bytes"] += size
+            else:
+                components["other_bytes"] += size
+    return components
+
+
+class StorageStats:
+    """
+    Cached statistics about a storage directory and its contents.
+
+    Computing sizes walks the storage directory, which is slow on large stores
+    and network filesystems, so the health check serves the last snapshot.
+    Writes only mark it stale (via the storage write generation); it is
+    recomputed by a periodic background refresh, or on demand when
+    refresh_interval is 0.
+    """
+
+    def __init__(self, path: str, index: MemoryIndex, refresh_interval: float):
+        self.path = path
+        self.index = index
+        self.refresh_interval = refresh_interval
+        self._lock = threading.Lock()
+        self._snapshot: Optional[Dict[str, Any]] = None
+        self._generation: Optional[int] = None
+        self._refreshed_at = 0.0
+
+    def is_stale(self, generation: int) -> bool:
+        """Whether writes happened since the snapshot was taken."""
+        return self._snapshot is None or self._generation != generation
+
+    def refresh(self, generation: int) -> Dict[str, Any]:
+        """Recompute the statistics for the given write generation."""
+        start_time = time.time()
+        components = component_sizes(self.path)
+        size = (
+            components["chroma_sqlite_bytes"]
+            + components["memory_index_bytes"]
+            + components["memory_store_bytes"]
+            + sum(components["hnsw_segments_bytes"].values())
+            + components["other_bytes"]
+        )
+        distinct_tags, top_tags = self.index.tag_counts(TOP_TAGS)
+        memory_types = {
+            memory_type or "untyped": count
+            for memory_type, count in self.index.memory_type_counts().items()
+        }
+        snapshot = {
+            "storage": {
+                "path": self.path,
+                "size_bytes": size,
+                "size_mb": round(size / (1024 * 1024), 2),
+                "components": components
+            },
+            "tags": {
+                "distinct": distinct_tags,
+                "top": [{"tag": tag, "memories": count} for tag, count in top_tags]
+            },
+            "memory_types": memory_types
+        }
+        with self._lock:
+            self._snapshot = snapshot
+            self._generation = generation
+            self._refreshed_at = time.time()
+        logger.debug(f"Refreshed storage statistics in {(time.time() - start_time) * 1000:.1f}ms")
+        return snapshot
+
+    def snapshot(self, generation: int) -> Dict[str, Any]:
+        """
+        Return the cached statistics with their age.
+
+        Computed synchronously only the first time, or whenever they are stale
+        and there is no background refresh.
+        """
+        if self._snapshot is None or (self.refresh_interval <= 0 and self.is_stale(generation)):
+            self.refresh(generation)
+        with self._lock:
+            return {
+                **self._snapshot,
+                "refreshed": {
+                    "age_seconds": round(time.time() - self._refreshed_at, 1),
+                    "stale": self._generation != generation,
+                    "refresh_interval_seconds": self.refresh_interval
+                }
+            }
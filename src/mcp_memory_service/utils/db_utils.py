@@ -5,19 +5,79 @@ import os
 import json
 from datetime import datetime
 
+from ..models.memory import Memory
+from .hashing import generate_content_hash
+
 logger = logging.getLogger(__name__)
 
-async def validate_database(storage) -> Tuple[bool, str]:
-    """Validate database health and configuration."""
+def is_sqlite_storage(storage) -> bool:
+    """Whether storage is the sqlite backend, which has no ChromaDB collection."""
+    from ..storage.sqlite import SQLiteMemoryStorage
+    return isinstance(storage, SQLiteMemoryStorage)
+
+async def validate_database(storage, full_check: bool = False) -> Tuple[bool, str]:
+    """
+    Validate database health and configuration.
+    
+    The default check is read-only: it counts the collection, probes one stored
+    row and compares its embedding dimension with the model's cached dimension.
+    Pass full_check=True to also embed, add, query and delete a test document.
+    """
+    if is_sqlite_storage(storage):
+        return await _validate_sqlite_database(storage, full_check)
+    if full_check:
+        return await _validate_database_full(storage)
+    
+    try:
+        if storage.collection is None:
+            return False, "Collection not initialized"
+        
+        count = await storage.run_in_executor(storage.collection.count)
+        if count == 0:
+            return True, "Database is empty but accessible"
+        
+        # Probe a single row instead of touching the whole collection
+        probe = await storage.run_in_executor(
+            storage.collection.get,
+            limit=1,
+            include=["metadatas", "embeddings"]
+        )
+        if not probe["ids"]:
+            return False, f"Collection reports {count} memories but none could be read"
+        
+        metadata = probe["metadatas"][0] or {}
+        if "content_hash" not in metadata:
+            return False, f"Memory {probe['ids'][0]} is missing its content_hash metadata"
+        
+        await storage.wait_for_model()
+        if storage.embedding_function is None:
+            return False, "Embedding function is not initialized"
+        
+        dimension = await storage.run_in_executor(storage.get_embedding_dimension)
+        stored_dimension = len(probe["embeddings"][0])
+        if stored_dimension != dimension:
+            return False, (
+                f"Embedding dimension mismatch: stored vectors have {stored_dimension} "
+                f"dimensions, the embedding model produces {dimension}"
+            )
+        
+        return True, f"Database validation successful ({count} memories)"
+    except Exception as e:
+        logger.error(f"Database validation failed: {str(e)}")
+        return False, f"Database validation failed: {str(e)}"
+
+async def _validate_database_full(storage) -> Tuple[bool, str]:
+    """Validate the database with a write probe: embed, add, query and delete a test document."""
     try:
         # Check if collection exists and is accessible
-        collection_info = storage.collection.count()
+        collection_info = await storage.run_in_executor(storage.collection.count)
         if collection_info == 0:
             logger.info("Database is empty but accessible")
         
         # Verify embedding function is working
+        await storage.wait_for_model()
         test_text = "Database validation test"
-        embedding = storage.embedding_function([test_text])
+        embedding = await storage.run_in_executor(storage.embedding_function, [test_text])
         if not embedding or len(embedding) == 0:
             return False, "Embedding function is not working properly"
         
@@ -25,14 +85,16 @@ async def validate_database(storage) -> Tuple[bool, str]:
         test_id = "test_" + datetime.now().strftime("%Y%m%d_%H%M%S")
         
         # Test add
-        storage.collection.add(
+        await storage.run_in_executor(
+            storage.collection.add,
             documents=[test_text],
             metadatas=[{"test": True}],
             ids=[test_id]
         )
         
         # Test query
-        query_result = storage.collection.query(
+        query_result = await storage.run_in_executor(
+            storage.collection.query,
             query_texts=[test_text],
             n_results=1
         )
@@ -40,40 +102,94 @@ async def validate_database(storage) -> Tuple[bool, str]:
             return False, "Query operation failed"
         
         # Clean up test data
-        storage.collection.delete(ids=[test_id])
+        await storage.run_in_executor(storage.collection.delete, ids=[test_id])
         
         return True, "Database validation successful"
     except Exception as e:
         logger.error(f"Database validation failed: {str(e)}")
         return False, f"Database validation failed: {str(e)}"
 
-def get_database_stats(storage) -> Dict[str, Any]:
-    """Get detailed database statistics."""
+async def _validate_sqlite_database(storage, full_check: bool) -> Tuple[bool, str]:
+    """Validate the sqlite backend: stored rows against loaded vectors and the model dimension."""
     try:
-        count = storage.collection.count()
+        count = await storage.run_in_executor(storage.count)
+        if len(storage.vectors) != count:
+            return False, f"Database holds {count} memories but {len(storage.vectors)} embeddings are loaded"
         
-        # Get collection info
-        collection_info = {
-            "total_memories": count,
-            "embedding_function": storage.embedding_function.__class__.__name__,
-            "metadata": storage.collection.metadata
-        }
+        await storage.wait_for_model()
+        if storage.model is None:
+            return False, "Embedding model is not initialized"
         
-        # Get storage info
-        db_path = storage.path
-        size = 0
-        for root, dirs, files in os.walk(db_path):
-            size += sum(os.path.getsize(os.path.join(root, name)) for name in files)
+        dimension = await storage.run_in_executor(storage.get_embedding_dimension)
+        stored_dimension = storage.vectors.input_dimension
+        if stored_dimension is not None and stored_dimension != dimension:
+            return False, (
+                f"Embedding dimension mismatch: stored vectors have {stored_dimension} "
+                f"dimensions, the embedding model produces {dimension}"
+            )
         
-        storage_info = {
-            "path": db_path,
-            "size_bytes": size,
-            "size_mb": round(size / (1024 * 1024), 2)
-        }
+        if full_check:
+            # Write probe through the public storage API
+            test_text = "Database validation test " + datetime.now().strftime("%Y%m%d_%H%M%S")
+            memory = Memory(content=test_text, content_hash=generate_content_hash(test_text))
+            success, message = await storage.store(memory)
+            if not success:
+                return False, f"Store operation failed: {message}"
+            try:
+                if not await storage.retrieve(test_text, n_results=1):
+                    return False, "Query operation failed"
+            finally:
+                await storage.delete(memory.content_hash)
+        
+        if count == 0:
+            return True, "Database is empty but accessible"
+        return True, f"Database validation successful ({count} memories)"
+    except Exception as e:
+        logger.error(f"Database validation failed: {str(e)}")
+        return False, f"Database validation failed: {str(e)}"
+
+def get_database_stats(storage) -> Dict[str, Any]:
+    """
+    Get detailed database statistics.
+    
+    The memory count is live; storage sizes, tag cardinality and the memory-type
+    histogram are served from the storage's cached statistics snapshot.
+    """
+    try:
+        if is_sqlite_storage(storage):
+            collection_info = {
+                "backend": "sqlite",
+                "total_memories": storage.count(),
+                "embedding_function": storage.embedding_function.__class__.__name__,
+                "loaded_embeddings": len(storage.vectors),
+                "search_dimensions": storage.vectors.dimension
+            }
+        else:
+            # Get collection info
+            collection_info = {
+                "backend": "chroma",
+                "total_memories": storage.collection.count(),
+                "embedding_function": storage.embedding_function.__class__.__name__,
+                "metadata": storage.collection.metadata
+            }
+        
+        # Inference backend of the loaded model: torch, or onnx with MCP_MEMORY_USE_ONNX
+        model = getattr(storage, "model", None)
+        collection_info["embedding_backend"] = getattr(model, "backend", "torch") if model is not None else None
+        
+        # Sizes and tag/type counts come from the cached snapshot instead of
+        # walking the storage directory on every call
+        snapshot = storage.stats.snapshot(storage._write_generation)
         
         return {
             "collection": collection_info,
-            "storage": storage_info,
+            **snapshot,
+            "query_embedding_cache": storage.query_embedding_cache.stats(),
+            "result_cache": {
+                **storage.result_cache.stats(),
+                "ttl_seconds": storage.result_cache.ttl,
+                "write_generation": storage._write_generation
+            },
             "status": "healthy"
         }
     except Exception as e:
@@ -87,35 +203,49 @@ async def repair_database(storage) -> Tuple[bool, str]:
     """Attempt to repair database issues."""
     try:
         # Validate current state
-        is_valid, message = await validate_database(storage)
+        is_valid, message = await validate_database(storage, full_check=True)
         if is_valid:
             return True, "Database is already healthy"
         
-        # Backup current embeddings and metadata
+        if is_sqlite_storage(storage):
+            return False, f"Automatic repair is not supported by the sqlite backend: {message}"
+        
+        # Re-embed into a staging collection one page at a time, so the original
+        # stays intact until the copy is complete
+        staging_name = "memory_collection_repair"
         try:
-            existing_data = storage.collection.get()
-        except Exception as backup_error:
-            logger.error(f"Could not backup existing data: {str(backup_error)}")
-            existing_data = None
+            storage.client.delete_collection(staging_name)
+        except Exception:
+            pass
+        staging = storage.client.create_collection(
+            name=staging_name,
+            metadata={"hnsw:space": "cosine"},
+            embedding_function=storage.embedding_function
+        )
+        try:
+            async for page in storage.aiter_memories(include=("metadatas", "documents")):
+                await storage.run_in_executor(
+                    staging.add,
+                    documents=page["documents"],
+                    metadatas=page["metadatas"],
+                    ids=page["ids"]
+                )
+        except Exception as copy_error:
+            logger.error(f"Could not copy existing data: {str(copy_error)}")
+            storage.client.delete_collection(staging_name)
+            return False, f"Repair aborted, could not copy existing data: {str(copy_error)}"
         
-        # Recreate collection
+        # Swap the staging collection in
         storage.client.delete_collection("memory_collection")
-        storage.collection = storage.client.create_collection(
+        staging.modify(name="memory_collection")
+        storage.collection = storage.client.get_collection(
             name="memory_collection",
-            metadata={"hnsw:space": "cosine"},
             embedding_function=storage.embedding_function
         )
-        
-        # Restore data if backup was successful
-        if existing_data and existing_data["ids"]:
-            storage.collection.add(
-                documents=existing_data["documents"],
-                metadatas=existing_data["metadatas"],
-                ids=existing_data["ids"]
-            )
+        storage._bump_write_generation()
         
         # Validate repair
-        is_valid, message = await validate_database(storage)
+        is_valid, message = await validate_database(storage, full_check=True)
         if is_valid:
             return True, "Database successfully repaired"
         else:
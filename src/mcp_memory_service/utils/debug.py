@@ -2,6 +2,8 @@
 from typing import Dict, Any, List
 import numpy as np
 from ..models.memory import Memory, MemoryQueryResult
+from ..storage.common import memory_from_metadata, query_results_from_rows
+from .db_utils import is_sqlite_storage
 
 def get_raw_embedding(storage, content: str) -> Dict[str, Any]:
     """Get raw embedding vector for content."""
@@ -25,7 +27,7 @@ def check_embedding_model(storage) -> Dict[str, Any]:
         return {
             "status": "healthy",
             "model_loaded": True,
-            "model_name": storage.model._model_card_vars.get('modelname', 'unknown'),
+            "model_name": getattr(storage.model, "model_name", "unknown"),
             "embedding_dimension": len(test_embedding)
         }
     except Exception as e:
@@ -42,36 +44,42 @@ async def debug_retrieve_memory(
 ) -> List[MemoryQueryResult]:
     """Retrieve memories with debug information including raw similarity scores."""
     try:
-        query_embedding = storage.model.encode(query).tolist()
-        results = storage.collection.query(
+        if is_sqlite_storage(storage):
+            # sqlite backend: retrieve already returns exact cosine similarities
+            return [
+                MemoryQueryResult(
+                    memory=result.memory,
+                    relevance_score=result.relevance_score,
+                    debug_info={
+                        "raw_similarity": result.relevance_score,
+                        "raw_distance": 1 - result.relevance_score,
+                        "memory_id": result.memory.content_hash
+                    }
+                )
+                for result in await storage.retrieve(query, n_results)
+                if result.relevance_score >= similarity_threshold
+            ]
+        
+        await storage.wait_for_model()
+        query_embedding = (await storage.run_in_executor(storage.embed_query, query)).tolist()
+        results = await storage.run_in_executor(
+            storage.collection.query,
             query_embeddings=[query_embedding],
-            n_results=n_results
+            n_results=n_results,
+            include=["documents", "metadatas", "distances"]
         )
         
         memory_results = []
-        for i in range(len(results["ids"][0])):
-            memory = Memory.from_dict(
-                {
-                    "content": results["documents"][0][i],
-                    **results["metadatas"][0][i]
-                },
-                embedding=results["embeddings"][0][i] if "embeddings" in results else None
-            )
-            similarity = 1 - results["distances"][0][i]
-            
+        scored = query_results_from_rows(results["documents"][0], results["metadatas"][0], results["distances"][0])
+        for result, memory_id, distance in zip(scored, results["ids"][0], results["distances"][0]):
             # Only include results above threshold
-            if similarity >= similarity_threshold:
-                memory_results.append(
-                    MemoryQueryResult(
-                        memory=memory,
-                        relevance_score=similarity,
-                        debug_info={
-                            "raw_similarity": similarity,
-                            "raw_distance": results["distances"][0][i],
-                            "memory_id": results["ids"][0][i]
-                        }
-                    )
-                )
+            if result.relevance_score >= similarity_threshold:
+                result.debug_info = {
+                    "raw_similarity": result.relevance_score,
+                    "raw_distance": distance,
+                    "memory_id": memory_id
+                }
+                memory_results.append(result)
         
         return memory_results
     except Exception as e:
@@ -80,20 +88,24 @@ async def debug_retrieve_memory(
 async def exact_match_retrieve(storage, content: str) -> List[Memory]:
     """Retrieve memories using exact content match."""
     try:
-        results = storage.collection.get(
-            where={"content": content}
+        if is_sqlite_storage(storage):
+            # sqlite backend: match the stored content column directly
+            rows = await storage.run_in_executor(storage.index.find_by_content, content)
+            return [memory_from_metadata(document, metadata) for document, metadata in rows]
+        
+        # Content is the document, not a metadata field: narrow with a document
+        # filter, then keep only documents equal to the content
+        results = await storage.run_in_executor(
+            storage.collection.get,
+            where_document={"$contains": content},
+            include=["documents", "metadatas"]
         )
         
-        memories = []
-        for i in range(len(results["ids"])):
-            memory = Memory.from_dict(
-                {
-                    "content": results["documents"][i],
-                    **results["metadatas"][i]
-                },
-                embedding=results["embeddings"][i] if "embeddings" in results else None
-            )
-            memories.append(memory)
+        memories = [
+            memory_from_metadata(document, metadata)
+            for document, metadata in zip(results["documents"], results["metadatas"])
+            if document == content
+        ]
         
         return memories
     except Exception as e:
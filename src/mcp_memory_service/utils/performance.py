@@ -0,0 +1,135 @@
+"""Per-tool-call timing: wall, embedding and storage time and response size, accumulated per tool."""
+import contextvars
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterator, Optional
+
+# Latest wall times kept per tool for the percentiles
+LATENCY_WINDOW = 1000
+
+
+class CallTimings:
+    """
+    Seconds one tool call spent embedding and on the storage thread pool.
+
+    Storage time is everything run through the storage's run_in_executor,
+    which includes embeddings computed there; storage_seconds subtracts them.
+    """
+
+    __slots__ = ("embedding", "pool", "_lock")
+
+    def __init__(self):
+        self.embedding = 0.0
+        self.pool = 0.0
+        # Work of one call can run on several pool threads at once
+        self._lock = threading.Lock()
+
+    def add(self, kind: str, seconds: float):
+        with self._lock:
+            setattr(self, kind, getattr(self, kind) + seconds)
+
+    @property
+    def storage_seconds(self) -> float:
+        return max(0.0, self.pool - self.embedding)
+
+
+_current_call: contextvars.ContextVar[Optional[CallTimings]] = contextvars.ContextVar("current_call", default=None)
+
+
+@contextmanager
+def timed(kind: str) -> Iterator[None]:
+    """
+    Add the time spent in the block to the current tool call's "embedding" or "pool" time.
+
+    Outside a tracked call this only costs a context variable lookup. Work
+    handed to a thread pool is attributed to the call only if it runs in a
+    copy of the caller's context (contextvars.copy_context().run).
+    """
+    timings = _current_call.get()
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(kind, time.perf_counter() - start)
+
+
+@contextmanager
+def track_call() -> Iterator[CallTimings]:
+    """Collect the timings of everything run in the block, including awaited storage calls."""
+    timings = CallTimings()
+    token = _current_call.set(timings)
+    try:
+        yield timings
+    finally:
+        _current_call.reset(token)
+
+
+class _ToolTotals:
+    __slots__ = ("calls", "errors", "wall", "max_wall", "embedding", "storage", "response_bytes", "latencies")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.wall = 0.0
+        self.max_wall = 0.0
+        self.embedding = 0.0
+        self.storage = 0.0
+        self.response_bytes = 0
+        self.latencies: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+
+
+def _percentile(values, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] if ordered else 0.0
+
+
+class ToolStats:
+    """Accumulated call statistics per tool, safe to update from concurrent calls."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tools: Dict[str, _ToolTotals] = {}
+        self._since = time.time()
+
+    def record(self, name: str, wall: float, timings: CallTimings, response_bytes: int, error: bool = False):
+        """Add one finished call of a tool."""
+        with self._lock:
+            totals = self._tools.setdefault(name, _ToolTotals())
+            totals.calls += 1
+            totals.errors += int(error)
+            totals.wall += wall
+            totals.max_wall = max(totals.max_wall, wall)
+            totals.embedding += timings.embedding
+            totals.storage += timings.storage_seconds
+            totals.response_bytes += response_bytes
+            totals.latencies.append(wall)
+
+    def reset(self):
+        """Drop all statistics."""
+        with self._lock:
+            self._tools.clear()
+            self._since = time.time()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Per-tool averages, percentiles and totals; times in milliseconds."""
+        with self._lock:
+            tools = {}
+            for name, totals in sorted(self._tools.items()):
+                tools[name] = {
+                    "calls": totals.calls,
+                    "errors": totals.errors,
+                    "wall_ms_avg": round(totals.wall / totals.calls * 1000, 2),
+                    "wall_ms_p50": round(_percentile(totals.latencies, 0.5) * 1000, 2),
+                    "wall_ms_p95": round(_percentile(totals.latencies, 0.95) * 1000, 2),
+                    "wall_ms_max": round(totals.max_wall * 1000, 2),
+                    "embedding_ms_avg": round(totals.embedding / totals.calls * 1000, 2),
+                    "storage_ms_avg": round(totals.storage / totals.calls * 1000, 2),
+                    "response_bytes_avg": round(totals.response_bytes / totals.calls),
+                    "response_bytes_total": totals.response_bytes
+                }
+            return {"since": round(self._since, 3), "tools": tools}
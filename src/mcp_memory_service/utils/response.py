@@ -0,0 +1,141 @@
+"""Compact structured (JSON) tool responses with field selection, snippets and a byte budget."""
+import json
+import re
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from ..models.memory import Memory
+
+RESPONSE_FIELDS = ("hash", "content", "score", "tags", "type", "timestamp", "metadata")
+DEFAULT_RESPONSE_FIELDS = ("hash", "content", "score", "tags", "type", "timestamp")
+
+ELLIPSIS = "…"
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+|\n+")
+_WORD = re.compile(r"\w+")
+
+
+def parse_fields(fields: Optional[Sequence[str]]) -> List[str]:
+    """Validate requested response fields; None means DEFAULT_RESPONSE_FIELDS."""
+    if fields is None:
+        return list(DEFAULT_RESPONSE_FIELDS)
+    if isinstance(fields, str):
+        fields = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = [field for field in fields if field not in RESPONSE_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown response fields {', '.join(unknown)}, expected any of {', '.join(RESPONSE_FIELDS)}")
+    return list(dict.fromkeys(fields))
+
+
+def snippet(content: str, query: Optional[str], max_length: int) -> str:
+    """
+    Shorten content to at most max_length characters around its best-matching sentence.
+
+    The sentence sharing the most words with the query is kept, followed by
+    as much of the text after it as fits; a sentence longer than max_length
+    is cut around its first query word. Without a query (or any match) the
+    start of the content is kept. Cut ends are marked with an ellipsis.
+    """
+    if max_length <= 0 or len(content) <= max_length:
+        return content
+
+    start = 0
+    query_words = {word.lower() for word in _WORD.findall(query or "")}
+    if query_words:
+        best_overlap, position = 0, 0
+        for part in _SENTENCE_END.split(content):
+            position = content.find(part, position)
+            overlap = len(query_words & {word.lower() for word in _WORD.findall(part)})
+            if overlap > best_overlap:
+                best_overlap, start = overlap, position
+                end = position + len(part)
+            position += len(part)
+        if best_overlap and end - start > max_length:
+            # Centre the window on the first query word of an overlong sentence
+            first = min(
+                match.start() for match in _WORD.finditer(content, start, end)
+                if match.group().lower() in query_words
+            )
+            start = max(start, min(first - max_length // 2, end - max_length))
+    start = min(start, len(content) - max_length)
+
+    text = content[start:start + max_length].strip()
+    if start > 0:
+        text = ELLIPSIS + text
+    if start + max_length < len(content):
+        text += ELLIPSIS
+    return text
+
+
+def _timestamp(memory: Memory) -> Optional[str]:
+    timestamp = memory.timestamp
+    if timestamp is None:
+        return None
+    if not isinstance(timestamp, datetime):
+        timestamp = datetime.fromtimestamp(float(timestamp))
+    return timestamp.isoformat(timespec="seconds")
+
+
+def memory_record(
+    memory: Memory,
+    score: Optional[float],
+    fields: Iterable[str],
+    query: Optional[str] = None,
+    max_content_length: Optional[int] = None
+) -> Dict[str, Any]:
+    """One result as a dict of the selected fields, with content snippeted to max_content_length."""
+    record: Dict[str, Any] = {}
+    for field in fields:
+        if field == "hash":
+            record["hash"] = memory.content_hash
+        elif field == "content":
+            record["content"] = snippet(memory.content, query, max_content_length) if max_content_length else memory.content
+        elif field == "score":
+            record["score"] = None if score is None else round(float(score), 4)
+        elif field == "tags":
+            record["tags"] = memory.tags
+        elif field == "type":
+            record["type"] = memory.memory_type or None
+        elif field == "timestamp":
+            record["timestamp"] = _timestamp(memory)
+        elif field == "metadata":
+            record["metadata"] = memory.metadata
+    return record
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+def structured_response(
+    records: List[Dict[str, Any]],
+    max_bytes: Optional[int] = None,
+    **extra: Any
+) -> str:
+    """
+    Serialize result records as one compact JSON object.
+
+    The object holds the records under "results", their "count" and any
+    extra keys. With max_bytes, records are kept in rank order while the
+    UTF-8 encoded response stays within the budget; if any are dropped,
+    "truncated" is true and "omitted" counts them.
+    """
+    if not max_bytes:
+        return _dumps({"count": len(records), "results": records, **extra})
+
+    # Room for the envelope, with the largest count/omitted values it can hold
+    envelope = len(_dumps({
+        "count": len(records), "results": [], **extra, "truncated": True, "omitted": len(records)
+    }).encode("utf-8"))
+    used, kept = envelope, 0
+    for record in records:
+        size = len(_dumps(record).encode("utf-8")) + (1 if kept else 0)
+        if used + size > max_bytes:
+            break
+        used += size
+        kept += 1
+
+    response = {"count": kept, "results": records[:kept], **extra}
+    if kept < len(records):
+        response.update(truncated=True, omitted=len(records) - kept)
+    return _dumps(response)
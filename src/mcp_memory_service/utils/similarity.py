@@ -0,0 +1,124 @@
+"""Vectorized similarity helpers used to find near-duplicate memories."""
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Rows per task and columns per matrix product. A block of similarities is
+# ROW_BLOCK x COLUMN_BLOCK float32 values (32 MB), whatever the collection size.
+ROW_BLOCK = 1024
+COLUMN_BLOCK = 8192
+
+# Lowest threshold accepted for near-duplicate cleanup; below it unrelated
+# memories on the same topic start to match
+MIN_DUPLICATE_SIMILARITY = 0.8
+
+# Most similar later rows kept per row, so a low threshold or a block of
+# near-identical memories cannot produce a quadratic number of pairs
+MAX_PAIRS_PER_ROW = 16
+
+# (row, column, cosine similarity) with row < column
+SimilarPair = Tuple[int, int, float]
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """Return a float32 copy of matrix with unit-length rows. All-zero rows stay zero."""
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def _best_per_row(rows: np.ndarray, columns: np.ndarray, sims: np.ndarray, limit: int):
+    """Keep the limit most similar (row, column, sim) hits of each row."""
+    order = np.lexsort((-sims, rows))
+    rows, columns, sims = rows[order], columns[order], sims[order]
+    # Rank of each hit within its row, counted from the row's first (best) hit
+    first = np.searchsorted(rows, rows, side="left")
+    keep = np.arange(len(rows)) - first < limit
+    return rows[keep], columns[keep], sims[keep]
+
+
+def _pairs_in_row_block(
+    embeddings: np.ndarray,
+    start: int,
+    threshold: float,
+    max_per_row: int
+) -> List[SimilarPair]:
+    stop = min(len(embeddings), start + ROW_BLOCK)
+    rows = embeddings[start:stop]
+    hits_rows, hits_columns, hits_sims = [], [], []
+    # Only columns at or after the block's first row: each pair is compared once
+    for column_start in range(start, len(embeddings), COLUMN_BLOCK):
+        column_stop = min(len(embeddings), column_start + COLUMN_BLOCK)
+        sims = rows @ embeddings[column_start:column_stop].T
+        hit_rows, hit_columns = np.nonzero(sims >= threshold)
+        upper = hit_columns + column_start > hit_rows + start
+        hit_rows, hit_columns = hit_rows[upper], hit_columns[upper]
+        hit_sims = sims[hit_rows, hit_columns]
+        if len(hit_rows) > max_per_row:
+            # Bound what a block of near-identical rows can accumulate
+            hit_rows, hit_columns, hit_sims = _best_per_row(hit_rows, hit_columns, hit_sims, max_per_row)
+        hits_rows.append(hit_rows)
+        hits_columns.append(hit_columns + column_start)
+        hits_sims.append(hit_sims)
+    hit_rows, hit_columns, hit_sims = _best_per_row(
+        np.concatenate(hits_rows), np.concatenate(hits_columns), np.concatenate(hits_sims), max_per_row
+    )
+    return list(zip((hit_rows + start).tolist(), hit_columns.tolist(), hit_sims.tolist()))
+
+
+def find_similar_pairs(
+    embeddings: np.ndarray,
+    threshold: float,
+    workers: Optional[int] = None,
+    max_per_row: int = MAX_PAIRS_PER_ROW
+) -> List[SimilarPair]:
+    """
+    Find pairs of rows whose cosine similarity is at least threshold.
+
+    The rows must already be unit length (see normalize_rows). The upper
+    triangle of the similarity matrix is computed in fixed-size blocks of
+    matrix products, spread over a thread pool (NumPy releases the GIL), so
+    memory stays bounded and nothing is compared in a Python loop. Each row
+    keeps only its max_per_row most similar later rows.
+    """
+    if len(embeddings) < 2:
+        return []
+    starts = range(0, len(embeddings), ROW_BLOCK)
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 1) as pool:
+        blocks = pool.map(lambda start: _pairs_in_row_block(embeddings, start, threshold, max_per_row), starts)
+        return [pair for block in blocks for pair in block]
+
+
+def cluster_pairs(pairs: List[SimilarPair], order: Optional[Sequence[int]] = None) -> List[List[int]]:
+    """
+    Group similar rows around representatives, which come first in each cluster.
+
+    Rows are visited in order (default: by row number). Each row not yet in a
+    cluster becomes a representative and takes every unclustered row paired
+    with it, so every member is at least threshold-similar to its
+    representative: a~b and b~c does not put c with a when a and c are below
+    the threshold. Returns clusters of two or more rows, ordered by their
+    representative's position in order; members after the representative
+    are sorted.
+    """
+    neighbors: Dict[int, List[int]] = {}
+    for row, column, _ in pairs:
+        neighbors.setdefault(row, []).append(column)
+        neighbors.setdefault(column, []).append(row)
+    if order is None:
+        order = sorted(neighbors)
+
+    clustered = set()
+    clusters = []
+    for row in order:
+        if row in clustered or row not in neighbors:
+            continue
+        members = sorted(member for member in neighbors[row] if member not in clustered)
+        if members:
+            clustered.add(row)
+            clustered.update(members)
+            clusters.append([row] + members)
+    return clusters
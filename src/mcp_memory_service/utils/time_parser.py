@@ -9,6 +9,8 @@ import logging
 from datetime import datetime, timedelta, date, time
 from typing import Tuple, Optional, Dict, Any, List
 
+from .cache import LRUCache
+
 logger = logging.getLogger(__name__)
 
 # Named time periods and their approximate date ranges
@@ -57,22 +59,97 @@ PATTERNS = {
     "quarter": re.compile(r'(first|second|third|fourth|1st|2nd|3rd|4th)\s+quarter(?:\s+of\s+(\d{4}))?'),
 }
 
+# Order in which parse_time_expression resolves the patterns when several match
+PARSE_PRIORITY = (
+    "date_range", "specific_date", "full_date", "relative_days", "relative_weeks",
+    "relative_months", "relative_years", "last_period", "this_period", "month_name",
+    "named_period", "half_year", "quarter", "recent", "time_of_day",
+)
+
+# All PATTERNS as named alternatives, so a query is scanned once instead of once per
+# pattern. Tokens start at a word boundary, which also stops "2023-01-15" from being
+# read as the M/D date "23-01-15".
+TOKEN_REGEX = re.compile(
+    r'\b(?:' + '|'.join(f'(?P<{name}>{PATTERNS[name].pattern})' for name in PARSE_PRIORITY) + ')'
+)
+
+# Time expressions recognized (and removed) by extract_time_expression
+TIME_EXPRESSIONS = [
+    r'\b\d+\s+days?\s+ago\b',
+    r'\byesterday\b',
+    r'\btoday\b',
+    r'\b\d+\s+weeks?\s+ago\b',
+    r'\b\d+\s+months?\s+ago\b',
+    r'\b\d+\s+years?\s+ago\b',
+    r'\blast\s+(day|week|month|year|summer|spring|winter|fall|autumn)\b',
+    r'\bthis\s+(day|week|month|year|summer|spring|winter|fall|autumn)\b',
+    r'\b(january|february|march|april|may|june|july|august|september|october|november|december)\b',
+    r'\bbetween\s+.+?\s+and\s+.+?(?:\s|$)',
+    r'\bin\s+the\s+(morning|afternoon|evening|night|noon|midnight)\b',
+    r'\brecent|lately|recently\b',
+    r'\b\d{1,2}[/-]\d{1,2}(?:[/-]\d{2,4})?\b',
+    r'\b\d{4}-\d{1,2}-\d{1,2}\b',
+    r'\b(christmas|new\s*year|valentine|halloween|thanksgiving|spring\s*break|summer\s*break|winter\s*break)\b',
+    r'\b(first|second)\s+half\s+of\s+\d{4}\b',
+    r'\b(first|second|third|fourth|1st|2nd|3rd|4th)\s+quarter(?:\s+of\s+\d{4})?\b',
+    r'\bfrom\s+.+\s+to\s+.+\b'
+]
+TIME_EXPRESSION_REGEX = re.compile('|'.join(f'({expr})' for expr in TIME_EXPRESSIONS), re.IGNORECASE)
+WHITESPACE_REGEX = re.compile(r'\s+')
+
+# Parsed ranges keyed on (normalized query, today's date); relative ranges only change per day
+TIME_PARSE_CACHE_SIZE = 1024
+_parse_cache = LRUCache(max_entries=TIME_PARSE_CACHE_SIZE)
+
+def scan_time_tokens(query: str) -> Dict[str, "re.Match"]:
+    """
+    Find the first match of each kind of time expression in a single pass.
+    
+    Args:
+        query: Lower-cased query text
+        
+    Returns:
+        Mapping of PATTERNS name to its first match in the query
+    """
+    tokens = {}
+    for token in TOKEN_REGEX.finditer(query):
+        kind = token.lastgroup
+        if kind not in tokens:
+            # Re-match the individual pattern at this position to get its own groups
+            tokens[kind] = PATTERNS[kind].match(query, token.start())
+    return tokens
+
 def parse_time_expression(query: str) -> Tuple[Optional[float], Optional[float]]:
     """
     Parse a natural language time expression and return timestamp range.
     
+    Results are cached per day, except for expressions relative to the current
+    time ("recent", "lately").
+    
     Args:
         query: A natural language query with time expressions
         
     Returns:
         Tuple of (start_timestamp, end_timestamp), either may be None
     """
-    query = query.lower().strip()
+    query = ' '.join(query.lower().split())
+    cache_key = (query, date.today())
+    cached = _parse_cache.get(cache_key)
+    if cached is not None:
+        return cached
     
+    tokens = scan_time_tokens(query)
+    result = _parse_time_tokens(query, tokens)
+    if "recent" not in tokens:
+        _parse_cache.put(cache_key, result)
+    return result
+
+def _parse_time_tokens(query: str, tokens: Dict[str, "re.Match"]) -> Tuple[Optional[float], Optional[float]]:
+    """Resolve the scanned time tokens of a query into a timestamp range."""
     # Check for multiple patterns in a single query
     try:
         # First check for date ranges like "between X and Y"
-        date_range_match = PATTERNS["date_range"].search(query)
+        date_range_match = tokens.get("date_range")
         if date_range_match:
             start_expr = date_range_match.group(1)
             end_expr = date_range_match.group(2)
@@ -81,7 +158,7 @@ def parse_time_expression(query: str) -> Tuple[Optional[float], Optional[float]]
             return start_ts, end_ts
             
         # Check for specific dates (MM/DD/YYYY)
-        specific_date_match = PATTERNS["specific_date"].search(query)
+        specific_date_match = tokens.get("specific_date")
         if specific_date_match:
             month, day, year = specific_date_match.groups()
             month = int(month)
@@ -102,7 +179,7 @@ def parse_time_expression(query: str) -> Tuple[Optional[float], Optional[float]]
                 return None, None
         
         # Check for full ISO dates (YYYY-MM-DD)
-        full_date_match = PATTERNS["full_date"].search(query)
+        full_date_match = tokens.get("full_date")
         if full_date_match:
             year, month, day = full_date_match.groups()
             try:
@@ -115,7 +192,7 @@ def parse_time_expression(query: str) -> Tuple[Optional[float], Optional[float]]
                 return None, None
         
         # Relative days: "X days ago", "yesterday", "today"
-        days_ago_match = PATTERNS["relative_days"].search(query)
+        days_ago_match = tokens.get("relative_days")
         if days_ago_match:
             if "yesterday" in query:
                 days = 1
@@ -127,7 +204,7 @@ def parse_time_expression(query: str) -> Tuple[Optional[float], Optional[float]]
             target_date = date.today() - timedelta(days=days)
             
             # Check for time of day modifiers
-            time_of_day_match = PATTERNS["time_of_day"].search(query)
+            time_of_day_match = tokens.get("time_of_day")
             if time_of_day_match:
                 # Narrow the range based on time of day
                 return get_time_of_day_range(target_date, time_of_day_match.group(1))
@@ -138,7 +215,7 @@ def parse_time_expression(query: str) -> Tuple[Optional[float], Optional[float]]
                 return start_dt.timestamp(), end_dt.timestamp()
         
         # Relative weeks: "X weeks ago"
-        weeks_ago_match = PATTERNS["relative_weeks"].search(query)
+        weeks_ago_match = tokens.get("relative_weeks")
         if weeks_ago_match:
             weeks = int(weeks_ago_match.group(1))
             target_date = date.today() - timedelta(weeks=weeks)
@@ -150,7 +227,7 @@ def parse_time_expression(query: str) -> Tuple[Optional[float], Optional[float]]
             return start_dt.timestamp(), end_dt.timestamp()
         
         # Relative months: "X months ago"
-        months_ago_match = PATTERNS["relative_months"].search(query)
+        months_ago_match = tokens.get("relative_months")
         if months_ago_match:
             months = int(months_ago_match.group(1))
             current = datetime.now()
@@ -175,7 +252,7 @@ def parse_time_expression(query: str) -> Tuple[Optional[float], Optional[float]]
             return start_dt.timestamp(), end_dt.timestamp()
         
         # Relative years: "X years ago"
-        years_ago_match = PATTERNS["relative_years"].search(query)
+        years_ago_match = tokens.get("relative_years")
         if years_ago_match:
             years = int(years_ago_match.group(1))
             current_year = datetime.now().year
@@ -185,31 +262,31 @@ def parse_time_expression(query: str) -> Tuple[Optional[float], Optional[float]]
             return start_dt.timestamp(), end_dt.timestamp()
         
         # "Last X" expressions
-        last_period_match = PATTERNS["last_period"].search(query)
+        last_period_match = tokens.get("last_period")
         if last_period_match:
             period = last_period_match.group(1)
             return get_last_period_range(period)
         
         # "This X" expressions
-        this_period_match = PATTERNS["this_period"].search(query)
+        this_period_match = tokens.get("this_period")
         if this_period_match:
             period = this_period_match.group(1)
             return get_this_period_range(period)
         
         # Month names
-        month_match = PATTERNS["month_name"].search(query)
+        month_match = tokens.get("month_name")
         if month_match:
             month_name = month_match.group(1)
             return get_month_range(month_name)
         
         # Named periods (holidays, etc.)
-        named_period_match = PATTERNS["named_period"].search(query)
+        named_period_match = tokens.get("named_period")
         if named_period_match:
             period_name = named_period_match.group(1).replace(" ", "_")
             return get_named_period_range(period_name)
         
         # Half year expressions
-        half_year_match = PATTERNS["half_year"].search(query)
+        half_year_match = tokens.get("half_year")
         if half_year_match:
             half = half_year_match.group(1)
             year_str = half_year_match.group(2)
@@ -225,7 +302,7 @@ def parse_time_expression(query: str) -> Tuple[Optional[float], Optional[float]]
             return start_dt.timestamp(), end_dt.timestamp()
         
         # Quarter expressions
-        quarter_match = PATTERNS["quarter"].search(query)
+        quarter_match = tokens.get("quarter")
         if quarter_match:
             quarter = quarter_match.group(1).lower()
             year_str = quarter_match.group(2)
@@ -247,7 +324,7 @@ def parse_time_expression(query: str) -> Tuple[Optional[float], Optional[float]]
             return start_dt.timestamp(), end_dt.timestamp()
         
         # Recent/fuzzy time expressions
-        recent_match = PATTERNS["recent"].search(query)
+        recent_match = tokens.get("recent")
         if recent_match:
             # Default to last 7 days for "recent"
             end_dt = datetime.now()
@@ -572,34 +649,8 @@ def extract_time_expression(query: str) -> Tuple[str, Tuple[Optional[float], Opt
         Tuple of (cleaned_query, (start_timestamp, end_timestamp))
         The cleaned_query has time expressions removed
     """
-    # Check for time expressions
-    time_expressions = [
-        r'\b\d+\s+days?\s+ago\b',
-        r'\byesterday\b',
-        r'\btoday\b',
-        r'\b\d+\s+weeks?\s+ago\b',
-        r'\b\d+\s+months?\s+ago\b',
-        r'\b\d+\s+years?\s+ago\b',
-        r'\blast\s+(day|week|month|year|summer|spring|winter|fall|autumn)\b',
-        r'\bthis\s+(day|week|month|year|summer|spring|winter|fall|autumn)\b',
-        r'\b(january|february|march|april|may|june|july|august|september|october|november|december)\b',
-        r'\bbetween\s+.+?\s+and\s+.+?(?:\s|$)',
-        r'\bin\s+the\s+(morning|afternoon|evening|night|noon|midnight)\b',
-        r'\brecent|lately|recently\b',
-        r'\b\d{1,2}[/-]\d{1,2}(?:[/-]\d{2,4})?\b',
-        r'\b\d{4}-\d{1,2}-\d{1,2}\b',
-        r'\b(christmas|new\s*year|valentine|halloween|thanksgiving|spring\s*break|summer\s*break|winter\s*break)\b',
-        r'\b(first|second)\s+half\s+of\s+\d{4}\b',
-        r'\b(first|second|third|fourth|1st|2nd|3rd|4th)\s+quarter(?:\s+of\s+\d{4})?\b',
-        r'\bfrom\s+.+\s+to\s+.+\b'
-    ]
-    
-    # Combine all patterns
-    combined_pattern = '|'.join(f'({expr})' for expr in time_expressions)
-    combined_regex = re.compile(combined_pattern, re.IGNORECASE)
-    
     # Find all matches
-    matches = list(combined_regex.finditer(query))
+    matches = list(TIME_EXPRESSION_REGEX.finditer(query))
     if not matches:
         return query, (None, None)
     
@@ -620,6 +671,6 @@ def extract_time_expression(query: str) -> Tuple[str, Tuple[Optional[float], Opt
         cleaned_query = cleaned_query.replace(expr, '')
     
     # Clean up multiple spaces
-    cleaned_query = re.sub(r'\s+', ' ', cleaned_query).strip()
+    cleaned_query = WHITESPACE_REGEX.sub(' ', cleaned_query).strip()
     
     return cleaned_query, (start_ts, end_ts)
\ No newline at end of file
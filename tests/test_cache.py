@@ -0,0 +1,73 @@
+"""Test the bounded LRU cache used by the storage layer."""
+from mcp_memory_service.utils.cache import LRUCache
+
+
+def test_hits_and_misses():
+    """Lookups are counted as hits or misses."""
+    cache = LRUCache(max_entries=2)
+    cache.put("a", 1)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["hit_rate"] == 0.5
+
+
+def test_evicts_least_recently_used():
+    """The least recently used entry is evicted when the entry limit is reached."""
+    cache = LRUCache(max_entries=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_byte_limit():
+    """Entries are evicted to stay under the byte limit."""
+    cache = LRUCache(max_entries=10, max_bytes=10, sizeof=len)
+    cache.put("a", "12345")
+    cache.put("b", "12345")
+    cache.put("c", "123")
+
+    assert cache.get("a") is None
+    assert cache.stats()["bytes"] == 8
+
+    # Values larger than the whole cache are not stored
+    cache.put("d", "x" * 11)
+    assert cache.get("d") is None
+    assert cache.get("b") == "12345"
+
+
+def test_replace_and_disable():
+    """Re-putting a key replaces it; a zero-sized cache stores nothing."""
+    cache = LRUCache(max_entries=2, sizeof=len)
+    cache.put("a", "1")
+    cache.put("a", "123")
+    assert len(cache) == 1
+    assert cache.stats()["bytes"] == 3
+
+    disabled = LRUCache(max_entries=0)
+    disabled.put("a", 1)
+    assert disabled.get("a") is None
+
+
+def test_ttl_expiry(monkeypatch):
+    """Entries older than the TTL are treated as misses."""
+    now = [1000.0]
+    monkeypatch.setattr("mcp_memory_service.utils.cache.time.monotonic", lambda: now[0])
+    cache = LRUCache(max_entries=2, ttl=10)
+    cache.put("a", 1)
+
+    now[0] += 5
+    assert cache.get("a") == 1
+
+    now[0] += 6
+    assert cache.get("a") is None
+    assert len(cache) == 0
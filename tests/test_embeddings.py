@@ -0,0 +1,50 @@
+"""Test embedding model loading with the optional ONNX Runtime backend."""
+import os
+
+import pytest
+
+from mcp_memory_service.storage import embeddings
+
+sentence_transformers = pytest.importorskip("sentence_transformers")
+
+
+class RecordingSentenceTransformer:
+    """Stands in for SentenceTransformer, recording how it was constructed."""
+
+    created = []
+
+    def __init__(self, model_name_or_path, **kwargs):
+        self.created.append((model_name_or_path, kwargs))
+
+    def encode(self, sentences, batch_size=32):
+        return [0.0]
+
+
+@pytest.fixture
+def recorded(monkeypatch):
+    RecordingSentenceTransformer.created = []
+    monkeypatch.setattr(sentence_transformers, "SentenceTransformer", RecordingSentenceTransformer)
+    return RecordingSentenceTransformer.created
+
+
+def test_onnx_falls_back_to_pytorch(monkeypatch, recorded):
+    """Without the ONNX dependencies the PyTorch model is loaded; other devices never try ONNX."""
+    def unavailable(model_name, batch_size):
+        raise ImportError("optimum is not installed")
+
+    monkeypatch.setattr(embeddings, "USE_ONNX", True)
+    monkeypatch.setattr(embeddings, "load_onnx_sentence_transformer", unavailable)
+    embeddings.load_sentence_transformer("all-MiniLM-L6-v2", "cpu", 8)
+    embeddings.load_sentence_transformer("all-MiniLM-L6-v2", "cuda", 8)
+    assert recorded == [("all-MiniLM-L6-v2", {"device": "cpu"}), ("all-MiniLM-L6-v2", {"device": "cuda"})]
+
+
+def test_onnx_loads_cached_export(tmp_path, recorded):
+    """A cached quantized export is loaded directly, without exporting again."""
+    file_name = f"onnx/model_qint8_{embeddings.onnx_quantization_config()}.onnx"
+    model_dir = tmp_path / "sentence-transformers--all-MiniLM-L6-v2"
+    os.makedirs(model_dir / "onnx")
+    (model_dir / file_name).write_bytes(b"")
+
+    embeddings.load_onnx_sentence_transformer("sentence-transformers/all-MiniLM-L6-v2", 8, cache_path=str(tmp_path))
+    assert recorded == [(str(model_dir), {"device": "cpu", "backend": "onnx", "model_kwargs": {"file_name": file_name}})]
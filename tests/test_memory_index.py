@@ -0,0 +1,160 @@
+"""Test the SQLite side index used for tag and time-range lookups."""
+import sqlite3
+
+import pytest
+
+from mcp_memory_service.storage.index import INDEX_FILENAME, MemoryIndex
+
+
+@pytest.fixture
+def index(tmp_path):
+    memory_index = MemoryIndex(str(tmp_path))
+    yield memory_index
+    memory_index.close()
+
+
+def test_find_by_tags_any(index):
+    """OR semantics return every memory carrying at least one tag."""
+    index.add("hash1", ["python", "code"], None)
+    index.add("hash2", ["python"], None)
+    index.add("hash3", ["notes"], None)
+
+    assert index.find_by_tags(["python"]) == ["hash1", "hash2"]
+    assert set(index.find_by_tags(["code", "notes"])) == {"hash1", "hash3"}
+    assert index.find_by_tags(["missing"]) == []
+    assert index.find_by_tags([]) == []
+
+
+def test_find_by_tags_all(index):
+    """AND semantics require every tag to be present."""
+    index.add("hash1", ["python", "code"], None)
+    index.add("hash2", ["python"], None)
+
+    assert index.find_by_tags(["python", "code"], match_all=True) == ["hash1"]
+    assert index.find_by_tags(["python", "python"], match_all=True) == ["hash1", "hash2"]
+
+
+def test_tags_are_case_sensitive(index):
+    """Tag matching is exact, like the previous metadata scan."""
+    index.add("hash1", ["test1"], None)
+
+    assert index.find_by_tags(["TEST1"]) == []
+    assert index.find_by_tags(["test"]) == []
+
+
+def test_remove(index):
+    """Removing a memory drops all of its tag entries."""
+    index.add_many([("hash1", ["a", "b"], 1.0), ("hash2", ["b"], 2.0)])
+    index.remove(["hash1"])
+
+    assert index.find_by_tags(["a"]) == []
+    assert index.find_by_tags(["b"]) == ["hash2"]
+    assert index.find_by_time_range() == ["hash2"]
+
+
+def test_rebuild_and_persistence(tmp_path):
+    """A rebuilt index is marked as built and survives reopening."""
+    memory_index = MemoryIndex(str(tmp_path))
+    assert not memory_index.is_built()
+    memory_index.add("stale", ["old"], None)
+    memory_index.rebuild([("hash1", ["a"], 1.0), ("hash2", [], 2.0)])
+    memory_index.close()
+
+    reopened = MemoryIndex(str(tmp_path))
+    assert reopened.is_built()
+    assert reopened.find_by_tags(["a"]) == ["hash1"]
+    assert reopened.find_by_tags(["old"]) == []
+    assert reopened.find_by_time_range() == ["hash2", "hash1"]
+    reopened.close()
+
+
+def test_find_by_time_range(index):
+    """Time ranges are inclusive, open-ended when a bound is None and newest first."""
+    index.add_many([("old", [], 100.0), ("mid", [], 200.0), ("new", [], 300.0), ("undated", [], None)])
+
+    assert index.find_by_time_range(150.0, 300.0) == ["new", "mid"]
+    assert index.find_by_time_range(None, 200.0) == ["mid", "old"]
+    assert index.find_by_time_range(limit=1) == ["new"]
+    assert index.find_by_time_range(400.0, None) == []
+
+
+
+def test_find_matching(index):
+    """Tag, memory-type and time conditions combine, newest first with undated memories last."""
+    index.add_many([
+        ("old", ["python"], 100.0, "note"),
+        ("new", ["python", "code"], 300.0, "note"),
+        ("other", ["python"], 200.0, "todo"),
+        ("undated", ["python"], None, "note")
+    ])
+
+    assert index.find_matching(["python"]) == ["new", "other", "old", "undated"]
+    assert index.find_matching(["python"], memory_type="note", limit=2) == ["new", "old"]
+    assert index.find_matching(["python", "code"], match_all=True) == ["new"]
+    assert index.find_matching(memory_type="note", start=150.0) == ["new"]
+    assert index.find_matching(["missing"]) == []
+
+
+def test_search_terms(index):
+    """Keyword search ranks by BM25, follows removals and keeps terms when re-indexed without content."""
+    index.add_many([
+        ("hash1", [], 1.0, None, "connection failed with ERR_CONN_RESET in api/client.py"),
+        ("hash2", [], 2.0, None, "client retries the request"),
+        ("hash3", [], 3.0, None, "weekly planning notes")
+    ])
+
+    assert [content_hash for content_hash, _ in index.search_terms("ERR_CONN_RESET client", 5)] == ["hash1", "hash2"]
+    assert index.search_terms('"OR (NEAR* -', 5) == [] and index.search_terms("", 5) == []
+
+    index.add("hash1", ["retagged"], 1.0)
+    assert [content_hash for content_hash, _ in index.search_terms("api/client.py", 1)] == ["hash1"]
+
+    index.remove(["hash1"])
+    assert [content_hash for content_hash, _ in index.search_terms("client", 5)] == ["hash2"]
+
+def test_page_by_time_range(index):
+    """Keyset pages walk the window newest first without gaps, including timestamp ties."""
+    index.add_many([("a", [], 100.0), ("b", [], 200.0), ("c", [], 200.0), ("d", [], 300.0), ("e", [], 400.0)])
+
+    pages, after = [], None
+    while True:
+        page = index.page_by_time_range(150.0, 350.0, 2, after)
+        if not page:
+            break
+        pages.append([content_hash for content_hash, _ in page])
+        content_hash, timestamp = page[-1]
+        after = (timestamp, content_hash)
+
+    assert pages == [["d", "c"], ["b"]]
+
+
+def test_tag_and_memory_type_counts(index):
+    """Tag cardinality and the memory-type histogram come straight from the index."""
+    index.add_many([
+        ("hash1", ["python", "code"], 1.0, "note"),
+        ("hash2", ["python"], 2.0, "note"),
+        ("hash3", [], 3.0, ""),
+        ("hash4", ["notes"], 4.0)
+    ])
+
+    distinct, top = index.tag_counts(limit=2)
+    assert distinct == 3
+    assert top == [("python", 2), ("code", 1)]
+    assert index.memory_type_counts() == {"note": 2, None: 2}
+
+
+def test_upgrade_adds_memory_type(tmp_path):
+    """A version 2 index gains the memory_type column and asks for a rebuild."""
+    conn = sqlite3.connect(str(tmp_path / INDEX_FILENAME))
+    conn.executescript("""
+        CREATE TABLE index_meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+        CREATE TABLE memories (content_hash TEXT PRIMARY KEY, timestamp REAL);
+        INSERT INTO index_meta VALUES ('built', '1'), ('version', '2');
+        INSERT INTO memories VALUES ('hash1', 1.0);
+    """)
+    conn.close()
+
+    memory_index = MemoryIndex(str(tmp_path))
+    assert not memory_index.is_built()
+    assert memory_index.memory_type_counts() == {None: 1}
+    memory_index.close()
@@ -0,0 +1,65 @@
+"""Test the per-tool-call timing: attribution of embedding and pool time, and the accumulated statistics."""
+import asyncio
+import contextvars
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from mcp_memory_service.utils.performance import CallTimings, ToolStats, timed, track_call
+
+
+def test_timed_attributes_to_current_call():
+    """Timed blocks add to the tracked call, also when run on a pool thread in a copy of its context."""
+    with timed("embedding"):
+        pass  # Outside a tracked call this is a no-op
+
+    def work():
+        with timed("pool"):
+            time.sleep(0.02)
+
+    with track_call() as timings:
+        with timed("embedding"):
+            time.sleep(0.01)
+        with ThreadPoolExecutor(1) as pool:
+            pool.submit(contextvars.copy_context().run, work).result()
+            pool.submit(work).result()  # Not in the call's context: not attributed
+    assert timings.embedding >= 0.01
+    assert 0.02 <= timings.pool < 0.04
+    assert timings.storage_seconds == timings.pool - timings.embedding
+
+
+def test_concurrent_calls_are_tracked_separately():
+    """Each task sees only its own call's timings."""
+    async def call(seconds):
+        with track_call() as timings:
+            with timed("embedding"):
+                await asyncio.sleep(seconds)
+        return timings
+
+    async def main():
+        return await asyncio.gather(call(0.01), call(0.05))
+
+    short, long = asyncio.run(main())
+    assert short.embedding < 0.04 <= long.embedding
+
+
+def test_tool_stats_snapshot_and_reset():
+    """Per-tool counts, averages and response sizes; storage time excludes embedding time."""
+    stats = ToolStats()
+    timings = CallTimings()
+    timings.add("embedding", 0.002)
+    timings.add("pool", 0.005)
+    stats.record("retrieve_memory", 0.010, timings, 100)
+    stats.record("retrieve_memory", 0.030, CallTimings(), 300, error=True)
+
+    entry = stats.snapshot()["tools"]["retrieve_memory"]
+    assert entry["calls"] == 2
+    assert entry["errors"] == 1
+    assert entry["wall_ms_avg"] == 20.0
+    assert entry["wall_ms_max"] == 30.0
+    assert entry["embedding_ms_avg"] == 1.0
+    assert entry["storage_ms_avg"] == 1.5
+    assert entry["response_bytes_avg"] == 200
+    assert entry["response_bytes_total"] == 400
+
+    stats.reset()
+    assert stats.snapshot()["tools"] == {}
@@ -0,0 +1,46 @@
+"""Test the PCA and truncation projections behind reduced-dimension search."""
+import numpy as np
+import pytest
+
+from mcp_memory_service.storage.projection import EmbeddingProjection, fit_projection, next_fit_size
+
+
+def low_rank_embeddings(count, dimension=64, rank=6, seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.normal(size=(count, rank)) @ rng.normal(size=(rank, dimension)) + rng.normal(scale=0.01, size=(count, dimension))
+
+
+def test_pca_projection_preserves_neighbours(tmp_path):
+    """On low-rank embeddings a PCA projection keeps the nearest neighbours and survives a save/load."""
+    embeddings = low_rank_embeddings(200)
+    projection = EmbeddingProjection.fit_pca(embeddings, 8)
+    reduced = projection.transform(embeddings)
+    assert reduced.shape == (200, 8)
+    assert np.allclose(np.linalg.norm(reduced, axis=1), 1.0, atol=1e-5)
+
+    full = embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+    for row in range(10):
+        assert np.argsort(-(full @ full[row]))[1] == np.argsort(-(reduced @ reduced[row]))[1]
+
+    path = str(tmp_path / "projection.npz")
+    projection.save(path)
+    loaded = EmbeddingProjection.load(path)
+    assert (loaded.method, loaded.dimensions, loaded.sample_size) == ("pca", 8, 200)
+    assert np.allclose(loaded.transform(embeddings[:3]), reduced[:3])
+    assert EmbeddingProjection.load(str(tmp_path / "missing.npz")) is None
+
+
+def test_fit_projection_thresholds():
+    """PCA waits for enough samples, truncation keeps leading dimensions, oversized targets do nothing."""
+    embeddings = low_rank_embeddings(20)
+    assert fit_projection(embeddings, 8, "pca") is None
+    assert fit_projection(embeddings, 64, "truncate") is None
+
+    truncation = fit_projection(embeddings, 4, "truncate")
+    assert np.allclose(truncation.transform(np.array([[3.0, 4.0, 0, 0] + [1.0] * 60]))[0], [0.6, 0.8, 0, 0])
+    assert next_fit_size(truncation, 20, 4) == float("inf")
+    assert next_fit_size(None, 20, 8) == 40
+    assert next_fit_size(fit_projection(low_rank_embeddings(40), 8, "pca"), 40, 8) == 80
+
+    with pytest.raises(ValueError):
+        EmbeddingProjection("svd", 64, 8)
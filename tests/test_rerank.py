@@ -0,0 +1,65 @@
+"""Test the cross-encoder reranking stage."""
+from mcp_memory_service.models.memory import MemoryQueryResult
+from mcp_memory_service.storage.rerank import CrossEncoderReranker
+
+from .test_storage_conformance import make_memory
+
+
+class OverlapCrossEncoder:
+    """Stands in for a cross-encoder: scores a pair by the share of query words in the document."""
+
+    def __init__(self):
+        self.scored = 0
+
+    def predict(self, pairs, batch_size=32, show_progress_bar=False):
+        self.scored += len(pairs)
+        return [
+            len(set(query.split()) & set(document.split())) / len(query.split())
+            for query, document in pairs
+        ]
+
+
+def first_stage(*contents):
+    return [
+        MemoryQueryResult(memory=make_memory(content), relevance_score=1.0 - i / 10)
+        for i, content in enumerate(contents)
+    ]
+
+
+def loaded_reranker(batch_size=2):
+    model = OverlapCrossEncoder()
+    reranker = CrossEncoderReranker(batch_size=batch_size, loader=lambda name: model)
+    reranker.load()
+    return reranker, model
+
+
+def test_rerank_reorders_and_caches_scores():
+    """Cross-encoder scores decide the order; a repeated query is served from the score cache."""
+    reranker, model = loaded_reranker()
+    results = first_stage("red apple", "green pear", "red apple pie recipe")
+
+    reranked, done = reranker.rerank("apple pie recipe", results, 2, budget_seconds=10)
+    assert done
+    assert [result.memory.content for result in reranked] == ["red apple pie recipe", "red apple"]
+    assert reranked[0].relevance_score == 1.0
+    assert reranked[0].debug_info == {"first_stage_score": 0.8, "first_stage_rank": 3}
+
+    reranker.rerank("apple pie recipe", results, 2, budget_seconds=10)
+    assert model.scored == 3
+
+
+def test_rerank_keeps_first_stage_order_without_budget_or_model():
+    """An exhausted budget or an unavailable model returns the first-stage order."""
+    reranker, _ = loaded_reranker()
+    results = first_stage("red apple", "red apple pie recipe")
+    reranked, done = reranker.rerank("apple pie recipe", results, 1, budget_seconds=0)
+    assert not done and reranked == results[:1]
+
+    def failing_loader(name):
+        raise OSError("model not found")
+
+    unavailable = CrossEncoderReranker(loader=failing_loader)
+    reranked, done = unavailable.rerank("apple pie recipe", results, 1, budget_seconds=10)
+    assert not done and reranked == results[:1]
+    unavailable._loading.join()
+    assert unavailable.model is None and unavailable.load_error == "model not found"
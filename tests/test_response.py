@@ -0,0 +1,46 @@
+"""Test the structured JSON tool responses: field selection, snippets and the byte budget."""
+import json
+
+import pytest
+
+from mcp_memory_service.utils.response import memory_record, parse_fields, snippet, structured_response
+
+from .test_storage_conformance import make_memory
+
+
+def test_snippet_keeps_best_matching_sentence():
+    """The window starts at the sentence sharing most words with the query; cut ends get an ellipsis."""
+    content = "Intro about nothing. The database password rotates monthly. Closing remarks follow here."
+    assert snippet(content, "database password", 200) == content
+    assert snippet(content, "database password", 38) == "…The database password rotates monthly.…"
+    assert snippet(content, None, 20) == "Intro about nothing.…"
+    assert snippet("x" * 50 + " needle " + "y" * 50, "needle", 20) == "…xxxxxxxxx needle yyy…"
+
+
+def test_memory_record_fields():
+    """Only the requested fields are returned, in the requested order; unknown fields are rejected."""
+    memory = make_memory("Some content. More content.", tags=["a"], timestamp=0.0, memory_type="note",
+                         metadata={"source": "x"})
+    record = memory_record(memory, 0.123456, parse_fields(["score", "tags", "hash"]))
+    assert list(record) == ["score", "tags", "hash"]
+    assert record == {"score": 0.1235, "tags": ["a"], "hash": memory.content_hash}
+    assert "metadata" not in memory_record(memory, None, parse_fields(None))
+    assert memory_record(memory, None, ["content", "metadata"], "more", 13) == {
+        "content": "…More content.", "metadata": {"source": "x"}
+    }
+    with pytest.raises(ValueError):
+        parse_fields(["hash", "embedding"])
+
+
+def test_structured_response_byte_budget():
+    """Lower-ranked records are dropped to fit the budget and the omission is reported."""
+    records = [{"hash": f"h{i}", "content": "é" * 40} for i in range(5)]
+    assert json.loads(structured_response(records)) == {"count": 5, "results": records}
+
+    text = structured_response(records, 250, reranked=False)
+    assert len(text.encode("utf-8")) <= 250
+    response = json.loads(text)
+    assert response["results"] == records[:response["count"]] and response["count"] < 5
+    assert response["omitted"] == 5 - response["count"] and response["truncated"] and response["reranked"] is False
+
+    assert json.loads(structured_response(records, 10))["results"] == []
@@ -0,0 +1,51 @@
+"""Test tool calls dispatched through MemoryServer against a real sqlite storage."""
+import asyncio
+
+import pytest
+
+from mcp_memory_service import server as server_module
+from mcp_memory_service.storage.sqlite import SQLiteMemoryStorage
+
+from .test_storage_conformance import HashingModel, make_memory
+
+
+@pytest.fixture
+def memory_server(tmp_path, monkeypatch):
+    monkeypatch.setattr(server_module, "STORAGE_BACKEND", "sqlite")
+    monkeypatch.setattr(SQLiteMemoryStorage, "_load_sentence_transformer", staticmethod(lambda *args: HashingModel()))
+    memory_server = server_module.MemoryServer(lazy_model_loading=False, storage_path=str(tmp_path))
+    yield memory_server
+    memory_server.storage.close()
+
+
+def call(memory_server, name, arguments):
+    registered = memory_server.tools[name]
+    return asyncio.run(memory_server.call_tool(registered, arguments))[0].text
+
+
+def test_delete_by_date_tools_report_what_was_deleted(memory_server):
+    """The time-window delete tools answer with the storage's message, never a bare None."""
+    jan_15 = 1579089600.0  # 2020-01-15 12:00 UTC
+    memories = [
+        make_memory("january note", tags=["keep"], timestamp=jan_15),
+        make_memory("another january note", timestamp=jan_15 + 3600),
+        make_memory("much later note", timestamp=jan_15 + 400 * 86400)
+    ]
+    asyncio.run(memory_server.storage.store_batch(memories))
+
+    text = call(memory_server, "delete_by_timeframe", {"start_date": "2020-01-14", "end_date": "2020-01-16", "tag": "keep"})
+    assert text == "Successfully deleted 1 memories from 2020-01-14 to 2020-01-16 with tag: keep"
+
+    text = call(memory_server, "delete_before_date", {"before_date": "2020-06-01"})
+    assert text == "Successfully deleted 1 memories up to 2020-06-01"
+
+    text = call(memory_server, "delete_before_date", {"before_date": "2020-06-01"})
+    assert text == "No memories found matching the criteria."
+
+
+def test_cleanup_duplicates_rejects_low_thresholds(memory_server):
+    """Thresholds that would match unrelated memories are refused before any search."""
+    text = call(memory_server, "cleanup_duplicates", {"similarity_threshold": 0.3})
+    assert text == "Error: similarity_threshold must be between 0.8 and 1"
+    schema = memory_server.tools["cleanup_duplicates"].tool.inputSchema
+    assert schema["properties"]["similarity_threshold"]["minimum"] == 0.8
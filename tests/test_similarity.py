@@ -0,0 +1,50 @@
+"""Test the blocked near-duplicate search helpers."""
+import numpy as np
+
+from mcp_memory_service.utils import similarity
+from mcp_memory_service.utils.similarity import cluster_pairs, find_similar_pairs, normalize_rows
+
+
+def test_find_similar_pairs_matches_brute_force(monkeypatch):
+    """Blocked search finds the same pairs as the full similarity matrix."""
+    # Small blocks so rows and columns span several blocks
+    monkeypatch.setattr(similarity, "ROW_BLOCK", 7)
+    monkeypatch.setattr(similarity, "COLUMN_BLOCK", 5)
+    rng = np.random.default_rng(0)
+    base = rng.standard_normal((10, 16))
+    embeddings = normalize_rows(np.vstack([base, base[:6] + 0.05 * rng.standard_normal((6, 16))]))
+
+    pairs = find_similar_pairs(embeddings, 0.9, workers=2)
+
+    sims = embeddings @ embeddings.T
+    expected = {(i, j) for i in range(len(sims)) for j in range(i + 1, len(sims)) if sims[i, j] >= 0.9}
+    assert {(i, j) for i, j, _ in pairs} == expected
+    assert len(pairs) == len(expected) >= 6
+    for i, j, sim in pairs:
+        assert abs(sim - sims[i, j]) < 1e-5
+
+
+def test_normalize_rows_keeps_zero_rows():
+    """Zero vectors stay zero instead of becoming NaN."""
+    matrix = normalize_rows([[3.0, 4.0], [0.0, 0.0]])
+    assert matrix.dtype == np.float32
+    assert np.allclose(matrix, [[0.6, 0.8], [0.0, 0.0]])
+
+
+def test_find_similar_pairs_caps_pairs_per_row():
+    """Identical rows keep only max_per_row partners each instead of all of them."""
+    embeddings = normalize_rows(np.ones((50, 8)))
+    pairs = find_similar_pairs(embeddings, 0.9, max_per_row=3)
+    rows = [row for row, _, _ in pairs]
+    assert max(rows.count(row) for row in set(rows)) == 3
+    assert len(pairs) == 3 * 47 + 2 + 1
+
+
+def test_cluster_pairs_groups_around_representatives():
+    """Members join a representative only through a pair with it, never through a chain."""
+    # 0~3 and 3~9, but 0 and 9 are below the threshold
+    pairs = [(5, 7, 0.99), (0, 3, 0.97), (3, 9, 0.96)]
+    assert cluster_pairs(pairs) == [[0, 3], [5, 7]]
+    # Visiting 3 first makes it the representative of both
+    assert cluster_pairs(pairs, order=[3, 9, 0, 5, 7]) == [[3, 0, 9], [5, 7]]
+    assert cluster_pairs([]) == []
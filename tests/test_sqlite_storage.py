@@ -0,0 +1,107 @@
+"""Test the sqlite backend's vector table and persistence."""
+import asyncio
+import threading
+
+import numpy as np
+
+from mcp_memory_service.storage.sqlite import SQLiteMemoryStorage, VectorTable
+
+from .test_storage_conformance import HashingModel, make_memory
+
+
+def test_vector_table_search_after_removal():
+    """Removing rows keeps the remaining IDs searchable, with or without candidates."""
+    table = VectorTable()
+    table.add(["a", "b", "c", "d"], np.eye(4, dtype=np.float32) * 3)
+    table.remove(["a", "missing"])
+
+    assert len(table) == 3
+    assert table.search(np.array([0, 0, 0, 1.0]), 1) == [("d", 1.0)]
+    assert {memory_id for memory_id, _ in table.search(np.array([0, 1.0, 1.0, 0]), 2)} == {"b", "c"}
+    assert table.search(np.array([0, 0, 0, 1.0]), 5, candidates=["b", "a"]) == [("b", 0.0)]
+    assert table.search(np.zeros(4), 0) == []
+
+
+def test_reopen_reloads_embeddings(tmp_path, monkeypatch):
+    """A reopened store searches the embeddings written by the previous instance."""
+    monkeypatch.setattr(SQLiteMemoryStorage, "_load_sentence_transformer", staticmethod(lambda *args: HashingModel()))
+    storage = SQLiteMemoryStorage(str(tmp_path), lazy_model_loading=False)
+    asyncio.run(storage.store_batch([make_memory("sunny beach holiday", tags=["travel"]), make_memory("tax return")]))
+    storage.close()
+
+    reopened = SQLiteMemoryStorage(str(tmp_path), lazy_model_loading=False)
+    try:
+        assert reopened.count() == 2 and len(reopened.vectors) == 2
+        results = asyncio.run(reopened.retrieve("beach", n_results=1))
+        assert results[0].memory.content == "sunny beach holiday"
+        assert results[0].memory.tags == ["travel"]
+    finally:
+        reopened.close()
+
+
+def test_reduced_dimension_search(tmp_path, monkeypatch):
+    """With REDUCED_DIMENSIONS the table holds projected vectors and results keep full-dimension scores."""
+    from mcp_memory_service.storage import sqlite
+
+    monkeypatch.setattr(SQLiteMemoryStorage, "_load_sentence_transformer", staticmethod(lambda *args: HashingModel()))
+    monkeypatch.setattr(sqlite, "REDUCED_DIMENSIONS", 8)
+    words = "alpha bravo charlie delta echo foxtrot golf hotel india juliet kilo lima mike".split()
+    memories = [make_memory(f"{words[i % 13]} {words[(i * 5) % 13]} note {i}") for i in range(40)]
+
+    storage = SQLiteMemoryStorage(str(tmp_path), lazy_model_loading=False)
+    asyncio.run(storage.store_batch(memories[:20]))
+    assert storage.vectors.projection is None and storage.vectors.dimension == 64
+    asyncio.run(storage.store_batch(memories[20:]))
+    asyncio.run(storage.wait_for_projection())
+    assert storage.vectors.projection is not None and storage.vectors.dimension == 8
+    assert (tmp_path / "projection.npz").exists()
+
+    results = asyncio.run(storage.retrieve(memories[7].content, n_results=3))
+    assert results[0].memory.content == memories[7].content
+    assert abs(results[0].relevance_score - 1.0) < 1e-5
+    storage.close()
+
+    reopened = SQLiteMemoryStorage(str(tmp_path), lazy_model_loading=False)
+    try:
+        assert reopened.vectors.projection.sample_size == 40 and len(reopened.vectors) == 40
+        assert asyncio.run(reopened.retrieve(memories[30].content, n_results=1))[0].memory.content == memories[30].content
+    finally:
+        reopened.close()
+
+
+def test_projection_refit_runs_in_the_background(tmp_path, monkeypatch):
+    """Writes don't wait for the refit, and writes made during it reach the new table."""
+    from mcp_memory_service.storage import sqlite
+
+    monkeypatch.setattr(SQLiteMemoryStorage, "_load_sentence_transformer", staticmethod(lambda *args: HashingModel()))
+    monkeypatch.setattr(sqlite, "REDUCED_DIMENSIONS", 8)
+    words = "alpha bravo charlie delta echo foxtrot golf hotel india juliet kilo lima mike".split()
+    memories = [make_memory(f"{words[i % 13]} {words[(i * 5) % 13]} note {i}") for i in range(50)]
+    storage = SQLiteMemoryStorage(str(tmp_path), lazy_model_loading=False)
+
+    started, release = threading.Event(), threading.Event()
+    fit_projection = sqlite.fit_projection
+
+    def slow_fit(*args):
+        started.set()
+        release.wait(10)
+        return fit_projection(*args)
+
+    monkeypatch.setattr(sqlite, "fit_projection", slow_fit)
+    try:
+        asyncio.run(storage.store_batch(memories[:40]))
+        assert started.wait(10)
+        assert storage.vectors.projection is None
+        asyncio.run(storage.store_batch(memories[40:]))
+        asyncio.run(storage.delete(memories[0].content_hash))
+        release.set()
+        asyncio.run(storage.wait_for_projection())
+
+        assert storage.vectors.projection is not None
+        assert storage.vectors.projection.sample_size == 40
+        assert len(storage.vectors) == storage.count() == 49
+        results = asyncio.run(storage.retrieve(memories[45].content, n_results=1))
+        assert results[0].memory.content == memories[45].content
+    finally:
+        release.set()
+        storage.close()
@@ -0,0 +1,74 @@
+"""Test the metadata helpers shared by the storage backends."""
+import pytest
+
+from mcp_memory_service.storage.common import (
+    MemoryFilter,
+    memory_from_metadata,
+    query_results_from_rows,
+    reciprocal_rank_fusion,
+    sync_tag_keys,
+    tag_filter
+)
+
+
+def test_tag_filter():
+    """One tag is a plain condition; several are combined with $or, or $and for match_all."""
+    assert tag_filter([]) is None
+    assert tag_filter(["python"]) == {"tag:python": True}
+    assert tag_filter(["a", "b"]) == {"$or": [{"tag:a": True}, {"tag:b": True}]}
+    assert tag_filter(["a", "b"], match_all=True) == {"$and": [{"tag:a": True}, {"tag:b": True}]}
+
+
+def test_sync_tag_keys():
+    """Missing keys are added and keys of removed tags turn False."""
+    metadata = {"content_hash": "h", "tags": '["new", "kept"]', "tag:kept": True, "tag:old": True}
+    assert sync_tag_keys(metadata) == {**metadata, "tag:new": True, "tag:old": False}
+    assert sync_tag_keys({**metadata, "tag:new": True, "tag:old": False}) is None
+
+
+def test_memory_from_metadata_hides_tag_keys():
+    """Tag keys are storage detail, not user metadata."""
+    memory = memory_from_metadata("content", {
+        "content_hash": "h", "tags": '["a"]', "tag:a": True, "timestamp": 1.0, "source": "chat"
+    })
+    assert memory.tags == ["a"]
+    assert memory.metadata == {"source": "chat"}
+
+
+def test_memory_filter():
+    """Filters build where conditions, match decoded memories and reject reserved keys."""
+    memory_filter = MemoryFilter.create(["a", " a ", ""], memory_type="note", metadata={"source": "chat"})
+    assert memory_filter and not memory_filter.indexed
+    assert memory_filter.conditions() == [{"tag:a": True}, {"memory_type": "note"}, {"source": "chat"}]
+    assert not MemoryFilter.create() and MemoryFilter.create(["a"]).indexed
+
+    memory = memory_from_metadata("content", {
+        "content_hash": "h", "tags": '["a", "b"]', "type": "note", "source": "chat"
+    })
+    assert memory_filter.matches(memory)
+    assert not MemoryFilter.create(["a", "c"], match_all=True).matches(memory)
+    assert not MemoryFilter.create(metadata={"source": "mail"}).matches(memory)
+
+    for metadata in ({"timestamp": 1.0}, {"tag:a": True}, {"source": ["chat"]}):
+        with pytest.raises(ValueError):
+            MemoryFilter.create(metadata=metadata)
+
+
+def test_reciprocal_rank_fusion():
+    """IDs found by both rankings outrank IDs ranked first by only one."""
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["d", "b", "a"]], k=60)
+    assert [memory_id for memory_id, _ in fused] == ["a", "b", "d", "c"]
+    assert fused[0][1] == 1 / 61 + 1 / 63
+
+
+def test_stored_memories_decode_lazily():
+    """Tags and extra metadata are decoded on first access; query rows become scored results."""
+    stored = {"content_hash": "h1", "tags": '["a"]', "tag:a": True, "timestamp": 5.0, "type": "note", "source": "x"}
+    memory = memory_from_metadata("first", stored)
+    assert not hasattr(memory, "__dict__") and memory._stored is stored
+    assert (memory.memory_type, memory.timestamp) == ("note", 5.0)
+    assert memory.tags == ["a"] and memory.metadata == {"source": "x"} and memory._stored is None
+
+    results = query_results_from_rows(["first", "second"], [stored, {"content_hash": "h2"}], [0.25, 1.0])
+    assert [(result.memory.content, result.relevance_score) for result in results] == [("first", 0.75), ("second", 0.0)]
+    assert results[0].memory == memory and results[1].memory.tags == []
@@ -0,0 +1,295 @@
+"""Behaviour every storage backend must share, run against each backend."""
+import asyncio
+import hashlib
+from datetime import date, datetime
+
+import numpy as np
+import pytest
+
+from mcp_memory_service.models.memory import Memory
+from mcp_memory_service import storage as storage_backends
+from mcp_memory_service.storage import create_storage
+from mcp_memory_service.utils.hashing import generate_content_hash
+
+
+class HashingModel:
+    """Deterministic bag-of-words embedder standing in for a sentence-transformer."""
+
+    def __init__(self, dimension=64):
+        self.dimension = dimension
+
+    def get_sentence_embedding_dimension(self):
+        return self.dimension
+
+    def encode(self, sentences, **kwargs):
+        single = isinstance(sentences, str)
+        vectors = np.zeros((1 if single else len(sentences), self.dimension), dtype=np.float32)
+        for row, text in enumerate([sentences] if single else sentences):
+            for word in text.lower().split():
+                vectors[row, int(hashlib.md5(word.encode()).hexdigest(), 16) % self.dimension] += 1
+        return vectors[0] if single else vectors
+
+
+BACKEND_CLASSES = {"sqlite": "SQLiteMemoryStorage", "chroma": "ChromaMemoryStorage"}
+
+
+@pytest.fixture(params=["sqlite", "chroma"])
+def storage(request, tmp_path, monkeypatch):
+    if request.param == "chroma":
+        pytest.importorskip("chromadb")
+    storage_class = getattr(storage_backends, BACKEND_CLASSES[request.param])
+    monkeypatch.setattr(storage_class, "_load_sentence_transformer", staticmethod(lambda *args: HashingModel()))
+    memory_storage = create_storage(request.param, str(tmp_path), lazy_model_loading=False)
+    yield memory_storage
+    memory_storage.close()
+
+
+def make_memory(content, tags=(), timestamp=None, memory_type=None, metadata=None):
+    memory = Memory(
+        content=content,
+        content_hash=generate_content_hash(content),
+        tags=list(tags),
+        memory_type=memory_type,
+        metadata=dict(metadata or {})
+    )
+    if timestamp is not None:
+        memory.timestamp = datetime.fromtimestamp(timestamp)
+    return memory
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_store_and_retrieve(storage):
+    """The closest memory ranks first; storing the same content twice is rejected."""
+    assert run(storage.store(make_memory("the quick brown fox")))[0]
+    assert run(storage.store(make_memory("tea with milk and honey")))[0]
+
+    success, message = run(storage.store(make_memory("the quick brown fox")))
+    assert not success and message == "Duplicate content detected"
+
+    results = run(storage.retrieve("quick fox", n_results=2))
+    assert [result.memory.content for result in results] == ["the quick brown fox", "tea with milk and honey"]
+    assert results[0].relevance_score > results[1].relevance_score
+
+
+def test_store_batch_reports_each_memory(storage):
+    """Batch results come back in input order, duplicates included."""
+    run(storage.store(make_memory("already stored")))
+    results = run(storage.store_batch([
+        make_memory("first new memory"),
+        make_memory("already stored"),
+        make_memory("first new memory"),
+        make_memory("second new memory")
+    ]))
+    assert [success for success, _ in results] == [True, False, False, True]
+    assert [result.memory.content for result in run(storage.retrieve("second new memory", n_results=1))] == [
+        "second new memory"
+    ]
+
+
+def test_tags(storage):
+    """Tag search honours match_all and delete_by_tag removes the tagged memories."""
+    run(storage.store_batch([
+        make_memory("alpha", tags=["python", "code"]),
+        make_memory("beta", tags=["python"]),
+        make_memory("gamma", tags=["notes"])
+    ]))
+
+    assert {memory.content for memory in run(storage.search_by_tag(["python"]))} == {"alpha", "beta"}
+    assert [memory.content for memory in run(storage.search_by_tag(["python", "code"], match_all=True))] == ["alpha"]
+
+    assert run(storage.delete_by_tag("python"))[0] == 2
+    assert run(storage.search_by_tag(["python"])) == []
+    assert run(storage.retrieve("alpha", n_results=5))[0].memory.content == "gamma"
+
+
+def test_recall_time_windows(storage):
+    """Recall restricts semantic and time-only results to the window, newest first."""
+    day = 86400.0
+    base = datetime(2024, 5, 1).timestamp()
+    run(storage.store_batch([
+        make_memory(f"meeting notes number {i}", timestamp=base + i * day) for i in range(5)
+    ]))
+
+    window = run(storage.recall(None, n_results=10, start_timestamp=base + day, end_timestamp=base + 3 * day))
+    assert [result.memory.content for result in window] == [f"meeting notes number {i}" for i in (3, 2, 1)]
+
+    semantic = run(storage.recall("number 4", n_results=1, start_timestamp=base, end_timestamp=base + 3 * day))
+    assert len(semantic) == 1 and semantic[0].memory.content != "meeting notes number 4"
+
+    pages, cursor = [], None
+    while True:
+        page, cursor = run(storage.recall_page(base, None, page_size=2, cursor=cursor))
+        pages.append([result.memory.content for result in page])
+        if cursor is None:
+            break
+    assert [len(page) for page in pages] == [2, 2, 1]
+    assert pages[0][0] == "meeting notes number 4"
+
+
+def test_deletes(storage):
+    """Deleting by hash and by date removes the memories from every lookup."""
+    memory = make_memory("delete me")
+    run(storage.store(memory))
+    run(storage.store(make_memory("old memory", timestamp=datetime(2020, 1, 1).timestamp())))
+
+    assert run(storage.delete(memory.content_hash))[0]
+    assert not run(storage.delete(memory.content_hash))[0]
+
+    count, _ = run(storage.delete_before_date(date(2021, 1, 1)))
+    assert count == 1
+    assert run(storage.retrieve("memory", n_results=5)) == []
+
+
+def test_near_duplicate_cleanup(storage):
+    """Near-duplicates are reported in a dry run and removed otherwise, keeping the oldest."""
+    run(storage.store_batch([
+        make_memory("remember to water the plants", timestamp=1000.0),
+        make_memory("remember to water the plants today", timestamp=2000.0),
+        make_memory("completely unrelated sentence", timestamp=3000.0)
+    ]))
+
+    count, message = run(storage.cleanup_duplicates(similarity_threshold=0.8, dry_run=True))
+    assert count == 1 and message.startswith("Dry run")
+
+    count, _ = run(storage.cleanup_duplicates(similarity_threshold=0.8))
+    assert count == 1
+    remaining = {result.memory.content for result in run(storage.retrieve("remember", n_results=5))}
+    assert remaining == {"remember to water the plants", "completely unrelated sentence"}
+
+
+def test_near_duplicate_cleanup_is_not_transitive(storage):
+    """In a chain a~b~c, c is kept when it is below the threshold to the kept a."""
+    a = "one two three four five six seven eight nine ten"
+    b = "one two three four five six seven eight nine eleven"
+    c = "one two three four five six seven eight twelve eleven"
+    run(storage.store_batch([
+        make_memory(a, timestamp=1000.0),
+        make_memory(b, timestamp=2000.0),
+        make_memory(c, timestamp=3000.0)
+    ]))
+
+    clusters = run(storage.find_near_duplicates(0.9))
+    assert [cluster["keep"]["content"] for cluster in clusters] == [a]
+    assert [memory["content"] for memory in clusters[0]["duplicates"]] == [b]
+    assert clusters[0]["duplicates"][0]["similarity"] >= 0.9
+
+    count, _ = run(storage.cleanup_duplicates(similarity_threshold=0.9))
+    assert count == 1
+    remaining = {result.memory.content for result in run(storage.retrieve(a, n_results=5))}
+    assert remaining == {a, c}
+
+
+def test_retrieve_filtered_by_tags(storage):
+    """Tag-filtered retrieval ranks only memories carrying the tags."""
+    run(storage.store_batch([
+        make_memory("python snake code", tags=["python", "code"]),
+        make_memory("python tutorial", tags=["python"]),
+        make_memory("snake in the zoo", tags=["animals"])
+    ]))
+
+    results = run(storage.retrieve("snake", n_results=5, tags=["python"]))
+    assert [result.memory.content for result in results] == ["python snake code", "python tutorial"]
+    assert results[0].memory.tags == ["python", "code"] and results[0].memory.metadata == {}
+
+    results = run(storage.retrieve("snake", n_results=5, tags=["python", "code"], match_all=True))
+    assert [result.memory.content for result in results] == ["python snake code"]
+    assert run(storage.retrieve("snake", n_results=5, tags=["missing"])) == []
+
+
+def test_filtered_search_returns_k_matches(storage):
+    """Type and metadata filters still fill n_results when most closer memories don't match."""
+    run(storage.store_batch(
+        [make_memory(f"deploy checklist step {i}", memory_type="note") for i in range(20)]
+        + [make_memory(f"deploy notes {i}", memory_type="decision", metadata={"source": "ops"}) for i in range(3)]
+        + [make_memory("deploy notes 9", memory_type="decision", metadata={"source": "dev"})]
+    ))
+
+    results = run(storage.retrieve("deploy checklist step", n_results=3, memory_type="decision"))
+    assert len(results) == 3 and all(result.memory.memory_type == "decision" for result in results)
+
+    results = run(storage.retrieve("deploy checklist step", n_results=3, metadata={"source": "ops"}))
+    assert sorted(result.memory.content for result in results) == [f"deploy notes {i}" for i in range(3)]
+    assert results[0].memory.metadata == {"source": "ops"}
+
+    with pytest.raises(ValueError):
+        run(storage.retrieve("deploy", metadata={"tags": "x"}))
+
+
+def test_recall_with_filter(storage):
+    """Recall applies the filter to semantic and time-only results inside the window."""
+    day = 86400.0
+    base = datetime(2024, 5, 1).timestamp()
+    names = ["alpha", "bravo", "charlie", "delta", "echo", "foxtrot"]
+    run(storage.store_batch([
+        make_memory(f"standup meeting {name}", tags=["work"] if i % 2 else ["home"], timestamp=base + i * day,
+                    metadata={"room": "a" if i < 4 else "b"})
+        for i, name in enumerate(names)
+    ]))
+
+    window = run(storage.recall(None, n_results=10, start_timestamp=base, end_timestamp=base + 4 * day, tags=["work"]))
+    assert [result.memory.content for result in window] == ["standup meeting delta", "standup meeting bravo"]
+
+    window = run(storage.recall(None, n_results=1, tags=["work"], metadata={"room": "b"}))
+    assert [result.memory.content for result in window] == ["standup meeting foxtrot"]
+
+    semantic = run(storage.recall("echo", n_results=2, start_timestamp=base, tags=["home"]))
+    assert len(semantic) == 2 and semantic[0].memory.content == "standup meeting echo"
+    assert all(result.memory.tags == ["home"] for result in semantic)
+
+
+
+def test_lexical_and_hybrid_retrieve(storage):
+    """Keyword search finds exact identifiers; hybrid fuses it with the semantic ranking."""
+    run(storage.store_batch([
+        make_memory("deploy failed with ERR_CONN_RESET", tags=["ops"]),
+        make_memory("deploy went fine"),
+        make_memory("grocery list")
+    ]))
+
+    results = run(storage.retrieve("ERR_CONN_RESET", n_results=5, mode="lexical"))
+    assert [result.memory.content for result in results] == ["deploy failed with ERR_CONN_RESET"]
+    assert run(storage.retrieve("deploy", n_results=5, mode="lexical", tags=["ops"]))[0].memory.tags == ["ops"]
+
+    results = run(storage.retrieve("deploy ERR_CONN_RESET", n_results=2, mode="hybrid"))
+    assert [result.memory.content for result in results] == ["deploy failed with ERR_CONN_RESET", "deploy went fine"]
+
+    with pytest.raises(ValueError):
+        run(storage.retrieve("deploy", mode="fuzzy"))
+
+
+def test_debug_retrieval(storage):
+    """Exact match returns only identical content; debug retrieval reports raw similarities."""
+    from mcp_memory_service.utils.debug import debug_retrieve_memory, exact_match_retrieve
+
+    run(storage.store_batch([make_memory("exact content"), make_memory("exact content, longer")]))
+    assert [memory.content for memory in run(exact_match_retrieve(storage, "exact content"))] == ["exact content"]
+
+    results = run(debug_retrieve_memory(storage, "exact content", n_results=2))
+    assert results[0].memory.content == "exact content"
+    assert abs(results[0].debug_info["raw_similarity"] - 1.0) < 1e-5
+
+
+def test_chroma_post_filter_fallback(tmp_path, monkeypatch):
+    """Rows the pre-filtered HNSW query misses (legacy "type" key) are found by post-filtering."""
+    pytest.importorskip("chromadb")
+    from mcp_memory_service.storage import chroma
+
+    monkeypatch.setattr(chroma.ChromaMemoryStorage, "_load_sentence_transformer", staticmethod(lambda *args: HashingModel()))
+    monkeypatch.setattr(chroma, "TIME_FILTER_BRUTE_FORCE_LIMIT", 0)
+    storage = chroma.ChromaMemoryStorage(str(tmp_path), lazy_model_loading=False)
+    try:
+        run(storage.store_batch([make_memory(f"release plan {i}", memory_type="note") for i in range(10)]))
+        legacy = {"content_hash": "legacy", "tags": "[]", "type": "decision", "timestamp": 1.0}
+        storage.collection.add(
+            ids=["legacy"], documents=["release plan legacy"], metadatas=[legacy],
+            embeddings=[HashingModel().encode("release plan legacy").tolist()]
+        )
+        storage.index.add_many([chroma.index_entry("legacy", legacy)])
+
+        results = run(storage.retrieve("release plan", n_results=1, memory_type="decision"))
+        assert [result.memory.content_hash for result in results] == ["legacy"]
+    finally:
+        storage.close()
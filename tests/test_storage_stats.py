@@ -0,0 +1,62 @@
+"""Test the cached storage statistics served by the health check."""
+import os
+
+from mcp_memory_service.storage.index import MemoryIndex
+from mcp_memory_service.storage.stats import StorageStats, component_sizes
+
+SEGMENT = "0f8fad5b-d9cb-469f-a165-70867728950e"
+
+
+def write(path, size):
+    with open(path, "wb") as f:
+        f.write(b"x" * size)
+
+
+def test_component_sizes(tmp_path):
+    """Files are attributed to ChromaDB, the side index, HNSW segments or other."""
+    write(tmp_path / "chroma.sqlite3", 100)
+    write(tmp_path / "chroma.sqlite3-wal", 10)
+    os.makedirs(tmp_path / SEGMENT)
+    write(tmp_path / SEGMENT / "data_level0.bin", 50)
+    os.makedirs(tmp_path / "backups")
+    write(tmp_path / "backups" / "old.json", 7)
+
+    components = component_sizes(str(tmp_path))
+    assert components["chroma_sqlite_bytes"] == 110
+    assert components["hnsw_segments_bytes"] == {SEGMENT: 50}
+    assert components["other_bytes"] == 7
+
+
+def test_snapshot_is_cached_until_refreshed(tmp_path):
+    """Writes only mark the snapshot stale; it changes when refreshed."""
+    index = MemoryIndex(str(tmp_path))
+    stats = StorageStats(str(tmp_path), index, refresh_interval=60)
+    index.add("hash1", ["a"], 1.0, "note")
+
+    first = stats.snapshot(generation=1)
+    assert first["tags"]["distinct"] == 1
+    assert first["memory_types"] == {"note": 1}
+
+    index.add("hash2", ["b"], 2.0)
+    cached = stats.snapshot(generation=2)
+    assert cached["tags"]["distinct"] == 1
+    assert cached["refreshed"]["stale"] is True
+    assert stats.is_stale(2)
+
+    stats.refresh(2)
+    fresh = stats.snapshot(generation=2)
+    assert fresh["tags"]["distinct"] == 2
+    assert fresh["memory_types"] == {"note": 1, "untyped": 1}
+    assert fresh["refreshed"]["stale"] is False
+    index.close()
+
+
+def test_on_demand_refresh(tmp_path):
+    """Without a background refresh, a stale snapshot is recomputed when read."""
+    index = MemoryIndex(str(tmp_path))
+    stats = StorageStats(str(tmp_path), index, refresh_interval=0)
+    stats.snapshot(generation=0)
+    index.add("hash1", ["a"], 1.0)
+
+    assert stats.snapshot(generation=1)["tags"]["distinct"] == 1
+    index.close()
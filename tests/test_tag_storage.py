@@ -81,9 +81,9 @@ async def run_tag_integration_tests(storage):
     return verify_test_results(tests, expectations)
 
 @pytest.mark.asyncio
-async def test_tag_storage():
+async def test_tag_storage(tmp_path):
     """Main test function that runs all tag storage tests"""
-    storage = ChromaMemoryStorage("tests/test_db")
+    storage = ChromaMemoryStorage(str(tmp_path))
 
     # storage = ChromaMemoryStorage("path/to/your/db")
 
@@ -315,4 +315,19 @@ def test_complex_query_with_time():
     # The cleaned query should remove the time expressions
     assert "last week" not in query
     assert "3 months ago" not in query
-    assert start_ts is not None and end_ts is not None
\ No newline at end of file
+    assert start_ts is not None and end_ts is not None
+
+
+def test_parse_full_date():
+    """Test parsing ISO dates and that tokens must start at a word boundary."""
+    start_ts, end_ts = parse_time_expression("2023-01-15")
+    assert start_ts is not None and end_ts is not None
+
+    start_dt = datetime.fromtimestamp(start_ts)
+    assert (start_dt.year, start_dt.month, start_dt.day) == (2023, 1, 15)
+
+    # "may" inside another word is not a month
+    assert parse_time_expression("dismay") == (None, None)
+
+    # Repeated calls are served from the cache with the same result
+    assert parse_time_expression("last week") == parse_time_expression("  Last   Week ")